@@ -0,0 +1,79 @@
+"""
+同步工具 vs 异步工具的吞吐对比
+
+通过FastMCP的 call_tool 并发调用工具（与SSE/streamable-http会话中的调用路径一致），
+飞书接口由本地桩服务模拟。同步工具在事件循环中串行执行，异步工具可以并发等待。
+
+用法：
+    PYTHONPATH=src python benchmarks/bench_async_tools.py --calls 200 --latency 0.02
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_lark_server import StubLarkServer
+
+
+async def run_calls(mcp, tool_name: str, arguments: dict, calls: int) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(*(mcp.call_tool(tool_name, arguments) for _ in range(calls)))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="sync vs async MCP tool throughput")
+    parser.add_argument("--calls", type=int, default=200, help="每轮并发调用次数")
+    parser.add_argument("--latency", type=float, default=0.02, help="桩服务每个请求的延迟（秒）")
+    args = parser.parse_args()
+
+    stub = StubLarkServer(latency=args.latency).start()
+    os.environ["LARK_MCP_DOMAIN"] = stub.domain
+    # 只比较同步与异步的吞吐，关闭客户端限流
+    os.environ.setdefault("LARK_MCP_RATE_LIMIT_ENABLED", "false")
+
+    import lark_oapi as lark
+    from mcp.server.fastmcp import FastMCP
+    from lark_mcp.mcp_server import register_mcp_server
+    from lark_mcp.mcp_tool.document.get_document_data import get_document
+    from lark_mcp.mcp_tool.folder.list_folder_files import list_folder_files
+
+    sync_mcp = FastMCP("sync")
+    sync_mcp.tool(description=get_document.__doc__)(get_document)
+    sync_mcp.tool(description=list_folder_files.__doc__)(list_folder_files)
+    async_mcp = FastMCP("async")
+    register_mcp_server(async_mcp)
+
+    cases = [
+        ("get_document", {"document_id": "doc", "app_id": "cli_bench", "app_secret": "secret"}),
+        ("list_folder_files", {"folder_token": "fld", "app_id": "cli_bench", "app_secret": "secret"}),
+    ]
+
+    async def bench():
+        # 预热：构建client、获取token、建立连接
+        for name, arguments in cases:
+            await sync_mcp.call_tool(name, arguments)
+            await async_mcp.call_tool(name, arguments)
+        # 避免日志输出影响测量
+        lark.logger.setLevel(logging.ERROR)
+        logging.getLogger("httpx").setLevel(logging.WARNING)
+
+        print(f"calls={args.calls} latency={args.latency * 1000:.0f}ms")
+        print(f"{'tool':<20}{'sync req/s':>12}{'async req/s':>13}{'speedup':>9}")
+        for name, arguments in cases:
+            sync_elapsed = await run_calls(sync_mcp, name, arguments, args.calls)
+            async_elapsed = await run_calls(async_mcp, name, arguments, args.calls)
+            print(f"{name:<20}{args.calls / sync_elapsed:>12.1f}{args.calls / async_elapsed:>13.1f}"
+                  f"{sync_elapsed / async_elapsed:>8.1f}x")
+
+    asyncio.run(bench())
+    stub.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+工具成功返回时记录日志的开销
+
+对同一份序列化后的返回数据，分别测量：
+  sdk-debug   原来的做法，客户端以DEBUG级别构建，飞书SDK的logger同步格式化并写出完整数据
+  sampled     logger.payload，LARK_MCP_LOG_PAYLOAD_SAMPLE_RATIO 为 --ratio（默认0.01）
+  off         logger.payload，不采样（默认配置）
+  tenant-debug logger.payload，当前租户的日志级别覆盖为DEBUG，每次都记录（截断后写出）
+写出的目标都是 /dev/null，统计的是调用方（工具所在的线程）花费的时间，后台线程的写出不计入。
+
+用法：
+    PYTHONPATH=src python benchmarks/bench_logging.py --size 20000 --calls 20000
+"""
+import argparse
+import json
+import logging
+import os
+import time
+
+from lark_mcp.common import log
+from lark_mcp.common.log import logger, bind_log_context, reset_log_context
+
+
+def payload(size: int) -> str:
+    items = [{"name": f"文档 {index}", "token": f"doxcn{index:022d}", "type": "docx"} for index in range(size // 60 + 1)]
+    return json.dumps({"files": items}, ensure_ascii=False, separators=(",", ":"))[:size]
+
+
+def per_call_us(fn, calls: int) -> float:
+    started = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="per-call cost of logging tool results")
+    parser.add_argument("--size", type=int, default=20000, help="返回数据的字符数")
+    parser.add_argument("--calls", type=int, default=20000, help="每种方式记录的次数")
+    parser.add_argument("--ratio", type=float, default=0.01, help="sampled 方式的采样比例")
+    args = parser.parse_args()
+
+    data = payload(args.size)
+    devnull = open(os.devnull, "w", encoding="utf-8")
+    log._handler.target.setStream(devnull)
+
+    # 与飞书SDK的logger相同的配置：StreamHandler + 格式化，DEBUG级别
+    sdk_logger = logging.getLogger("bench.sdk")
+    sdk_handler = logging.StreamHandler(devnull)
+    sdk_handler.setFormatter(logging.Formatter("[Lark] [%(asctime)s] [%(levelname)s] %(message)s"))
+    sdk_logger.addHandler(sdk_handler)
+    sdk_logger.setLevel(logging.DEBUG)
+    sdk_logger.propagate = False
+
+    # 预热：启动日志的后台线程
+    logger.warning("bench warm up")
+    time.sleep(0.1)
+
+    def sampled():
+        log.LOG_PAYLOAD_SAMPLE_RATIO = args.ratio
+        logger.payload("bench", data)
+
+    def off():
+        log.LOG_PAYLOAD_SAMPLE_RATIO = 0
+        logger.payload("bench", data)
+
+    results = {"sdk-debug": per_call_us(lambda: sdk_logger.debug(data), args.calls),
+               "sampled": per_call_us(sampled, args.calls),
+               "off": per_call_us(off, args.calls)}
+    log._TENANT_LEVELS["cli_bench"] = logging.DEBUG
+    token = bind_log_context(app_id="cli_bench")
+    results["tenant-debug"] = per_call_us(lambda: logger.payload("bench", data), args.calls)
+    reset_log_context(token)
+    log._handler.stop()
+
+    print(f"size={len(data)} chars  calls={args.calls}  ratio={args.ratio}  dropped={log.get_log_stats()['dropped']}")
+    print(f"{'mode':<14}{'us/call':>10}")
+    for mode, value in results.items():
+        print(f"{mode:<14}{value:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
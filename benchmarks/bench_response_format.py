@@ -0,0 +1,111 @@
+"""
+工具返回结果序列化：原来的 indent=4 JSON vs 紧凑格式
+
+用各工具典型的飞书返回结构构造SDK响应对象，对比两种序列化方式的输出字节数和耗时。
+原来的方式为 lark.JSON.marshal(response.data, indent=4)，紧凑格式为 format_data(response.data)
+（无缩进、去掉空字段）。
+
+用法：
+    PYTHONPATH=src python benchmarks/bench_response_format.py --rounds 200
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+
+def calendar_event(i: int) -> dict:
+    return {"event_id": f"evt_{i:08d}", "organizer_calendar_id": "feishu.cn_cal@group.calendar.feishu.cn",
+            "summary": f"周会 {i}", "description": "", "need_notification": None, "start_time":
+                {"date": None, "timestamp": "1602504000", "timezone": "Asia/Shanghai"},
+            "end_time": {"date": None, "timestamp": "1602507600", "timezone": "Asia/Shanghai"},
+            "vchat": {"vc_type": "vc", "icon_type": "default", "description": "", "meeting_url": "",
+                      "meeting_settings": None}, "visibility": "default", "attendee_ability": "can_see_others",
+            "free_busy_status": "busy", "location": {"name": "", "address": "", "latitude": None,
+                                                     "longitude": None},
+            "color": -1, "reminders": [], "recurrence": "", "status": "confirmed", "is_exception": False,
+            "recurring_event_id": "", "create_time": "1602504000", "schemas": [], "event_organizer":
+                {"user_id": "ou_xxx", "display_name": "张三"}, "app_link": "https://applink.feishu.cn/client/calendar/event/detail?calendarId=xxx&key=xxx",
+            "attachments": [], "event_check_in": None}
+
+
+def user(i: int) -> dict:
+    return {"union_id": f"on_{i:032d}", "user_id": f"u{i}", "open_id": f"ou_{i:032d}", "name": f"用户{i}",
+            "en_name": "", "nickname": "", "email": f"user{i}@example.com", "mobile": "", "mobile_visible": True,
+            "gender": 0, "avatar": {"avatar_72": f"https://s1.feishu.cn/avatar/{i}_72.jpg",
+                                    "avatar_240": f"https://s1.feishu.cn/avatar/{i}_240.jpg",
+                                    "avatar_640": f"https://s1.feishu.cn/avatar/{i}_640.jpg",
+                                    "avatar_origin": f"https://s1.feishu.cn/avatar/{i}.jpg"},
+            "status": {"is_frozen": False, "is_resigned": False, "is_activated": True, "is_exited": False,
+                       "is_unjoin": False}, "department_ids": [f"od-{i % 7}"], "leader_user_id": "",
+            "city": "", "country": "", "work_station": "", "join_time": 1602504000, "is_tenant_manager": False,
+            "employee_no": "", "employee_type": 1, "orders": [], "custom_attrs": [], "enterprise_email": "",
+            "job_title": "", "dotted_line_leader_user_ids": [], "job_level_id": "", "job_family_id": "",
+            "description": ""}
+
+
+def file(i: int) -> dict:
+    return {"token": f"doxcn{i:022d}", "name": f"文档 {i}", "type": "docx", "parent_token": "fldcnxxxxxxxx",
+            "url": f"https://example.feishu.cn/docx/doxcn{i:022d}", "shortcut_info": None,
+            "created_time": "1602504000", "modified_time": "1602507600", "owner_id": "ou_xxx"}
+
+
+def cases():
+    from lark_oapi.api.calendar.v4 import CreateCalendarEventResponseBody, GetCalendarEventResponseBody
+    from lark_oapi.api.contact.v3 import BatchUserResponseBody, BatchGetIdUserResponseBody
+    from lark_oapi.api.drive.v1 import ListFileResponseBody
+    from lark_oapi.api.docx.v1 import GetDocumentResponseBody
+
+    return [
+        ("create_calendar_event", CreateCalendarEventResponseBody({"event": calendar_event(0)})),
+        ("get_calendar_event", GetCalendarEventResponseBody({"event": calendar_event(1)})),
+        ("batch_get_user_info", BatchUserResponseBody({"items": [user(i) for i in range(50)]})),
+        ("get_id_user_request", BatchGetIdUserResponseBody({"user_list": [
+            {"user_id": f"ou_{i:032d}", "email": f"user{i}@example.com", "mobile": None,
+             "status": {"is_frozen": False, "is_resigned": False, "is_activated": True, "is_exited": False,
+                        "is_unjoin": False}} for i in range(50)]})),
+        ("list_folder_files", ListFileResponseBody({"files": [file(i) for i in range(200)], "has_more": True,
+                                                    "next_page_token": "next"})),
+        ("get_document", GetDocumentResponseBody({"document": {"document_id": "doxcnxxxx", "revision_id": 12,
+                                                               "title": "周报", "display_setting": None,
+                                                               "cover": None}})),
+    ]
+
+
+def timed(fn, data, rounds: int):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        output = fn(data)
+    return output, (time.perf_counter() - start) / rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="indent=4 JSON vs compact response serialization")
+    parser.add_argument("--rounds", type=int, default=200, help="每个工具重复序列化的次数")
+    args = parser.parse_args()
+
+    import lark_oapi as lark
+    from lark_mcp.common.response import format_data
+
+    def pretty(data):
+        return lark.JSON.marshal(data, indent=4)
+
+    print(f"rounds={args.rounds}")
+    print(f"{'tool':<24}{'indent=4 B':>12}{'compact B':>11}{'saved':>8}{'indent=4 us':>13}{'compact us':>12}"
+          f"{'speedup':>9}")
+    total_before = total_after = 0
+    for name, data in cases():
+        before, before_time = timed(pretty, data, args.rounds)
+        after, after_time = timed(format_data, data, args.rounds)
+        size_before, size_after = len(before.encode("utf-8")), len(after.encode("utf-8"))
+        total_before += size_before
+        total_after += size_after
+        print(f"{name:<24}{size_before:>12}{size_after:>11}{1 - size_after / size_before:>8.0%}"
+              f"{before_time * 1e6:>13.0f}{after_time * 1e6:>12.0f}{before_time / after_time:>8.1f}x")
+    print(f"{'total':<24}{total_before:>12}{total_after:>11}{1 - total_after / total_before:>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+服务启动耗时与内存占用
+
+以stdio方式启动 python -m lark_mcp.main，依次发送 initialize、tools/list 和一次工具调用，
+记录每一步完成的时间（从启动进程开始计时）和进程的RSS。飞书接口由本地桩服务模拟。
+eager 模式在启动前先导入 lark_oapi，对应工具模块在导入时就导入SDK的启动方式。
+
+用法：
+    PYTHONPATH=src python benchmarks/bench_startup.py --rounds 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_lark_server import StubLarkServer
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+COMMANDS = {
+    "lazy": [sys.executable, "-m", "lark_mcp.main", "--transport", "stdio"],
+    "eager": [sys.executable, "-c", "import sys, runpy, lark_oapi;"
+                                    " sys.argv = ['lark_mcp.main', '--transport', 'stdio'];"
+                                    " runpy.run_module('lark_mcp.main', run_name='__main__')"],
+}
+
+
+def rss_mb(pid: int) -> Optional[float]:
+    # 只支持Linux，读取 /proc/<pid>/status 中的 VmRSS
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+class StdioSession(object):
+
+    def __init__(self, command, env: Dict[str, str]):
+        self.start = time.perf_counter()
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                        stderr=subprocess.DEVNULL, env=env, text=True, encoding="utf-8")
+
+    def send(self, message: dict) -> None:
+        self.process.stdin.write(json.dumps(message) + "\n")
+        self.process.stdin.flush()
+
+    def request(self, request_id: int, method: str, params: Optional[dict] = None) -> float:
+        """发送请求并等待响应，返回从启动进程到收到响应的秒数"""
+        self.send({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params or {}})
+        while True:
+            line = self.process.stdout.readline()
+            if not line:
+                raise RuntimeError(f"server exited before responding to {method}")
+            try:
+                message = json.loads(line)
+            except ValueError:
+                # 不是JSON-RPC消息的行，跳过
+                continue
+            if message.get("id") == request_id:
+                if "error" in message:
+                    raise RuntimeError(f"{method} failed: {message['error']}")
+                return time.perf_counter() - self.start
+
+    def close(self) -> None:
+        self.process.stdin.close()
+        self.process.wait(timeout=10)
+
+
+def run_once(command, env: Dict[str, str]) -> Dict[str, float]:
+    session = StdioSession(command, env)
+    try:
+        result = {"initialize": session.request(1, "initialize", {
+            "protocolVersion": "2025-03-26", "capabilities": {}, "clientInfo": {"name": "bench", "version": "0"}})}
+        session.send({"jsonrpc": "2.0", "method": "notifications/initialized"})
+        result["tools/list"] = session.request(2, "tools/list")
+        result["rss_idle"] = rss_mb(session.process.pid)
+        result["first_call"] = session.request(3, "tools/call", {"name": "get_document", "arguments": {
+            "document_id": "doc", "app_id": "cli_bench", "app_secret": "secret"}}) - result["tools/list"]
+        result["rss_after_call"] = rss_mb(session.process.pid)
+        return result
+    finally:
+        session.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="lark_mcp.main startup time and RSS")
+    parser.add_argument("--rounds", type=int, default=5, help="每种模式启动的次数，结果取中位数")
+    args = parser.parse_args()
+
+    stub = StubLarkServer(latency=0).start()
+    env = dict(os.environ, LARK_MCP_DOMAIN=stub.domain,
+               PYTHONPATH=os.pathsep.join(filter(None, [os.path.abspath(SRC), os.environ.get("PYTHONPATH")])))
+
+    columns = ["initialize", "tools/list", "rss_idle", "first_call", "rss_after_call"]
+    print(f"rounds={args.rounds}  (seconds since process start; first_call is measured from tools/list; RSS in MB)")
+    print(f"{'mode':<8}" + "".join(f"{column:>16}" for column in columns))
+    for mode, command in COMMANDS.items():
+        runs = [run_once(command, env) for _ in range(args.rounds)]
+        cells = []
+        for column in columns:
+            values = [run[column] for run in runs if run[column] is not None]
+            cells.append(f"{statistics.median(values):>16.3f}" if values else f"{'n/a':>16}")
+        print(f"{mode:<8}" + "".join(cells))
+    stub.stop()
+
+
+if __name__ == "__main__":
+    main()
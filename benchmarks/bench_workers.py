@@ -0,0 +1,136 @@
+"""
+多进程 streamable-http 的吞吐扩展性
+
+依次以不同的工作进程数启动 python -m lark_mcp.main --transport streamable-http --workers N，
+所有轮次都使用无状态模式，等待 /health 可用后，由多个压测进程并发调用 get_document（无状态模式下每个 tools/call 是独立的HTTP请求），
+统计固定时长内完成的调用数。飞书接口由单独进程中的本地桩服务模拟，压测进程和桩服务不与被测服务争抢同一个进程。
+工作进程数不超过CPU核数时，吞吐应随进程数近似线性增长。
+
+用法：
+    PYTHONPATH=src python benchmarks/bench_workers.py --workers 1 2 4 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import List
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_lark_server import StubLarkServer
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+CALL = {"jsonrpc": "2.0", "id": 1, "method": "tools/call", "params": {"name": "get_document", "arguments": {
+    "document_id": "doc", "app_id": "cli_bench", "app_secret": "secret"}}}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def run_stub(latency: float, port_queue) -> None:
+    stub = StubLarkServer(latency=latency).start()
+    port_queue.put(stub.domain)
+    while True:
+        time.sleep(3600)
+
+
+async def _load(url: str, concurrency: int, duration: float) -> List[float]:
+    headers = {"Accept": "application/json, text/event-stream", "Content-Type": "application/json"}
+    latencies, deadline = [], time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+
+        async def loop():
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                response = await client.post(url, headers=headers, content=json.dumps(CALL))
+                # 默认以SSE返回，一次调用一个 message 事件
+                if response.status_code != 200 or '"isError":true' in response.text:
+                    raise RuntimeError(f"tools/call failed: {response.status_code} {response.text[:200]}")
+                latencies.append(time.perf_counter() - start)
+
+        await asyncio.gather(*(loop() for _ in range(concurrency)))
+    return latencies
+
+
+def load(args) -> List[float]:
+    return asyncio.run(_load(*args))
+
+
+def wait_healthy(base_url: str, process: subprocess.Popen, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("server exited during startup")
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("server did not become healthy")
+
+
+def run(workers: int, domain: str, args) -> dict:
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    # 关闭限流：测的是服务本身的处理能力，限流的速率按进程数平分，不随进程数增加
+    env = dict(os.environ, LARK_MCP_DOMAIN=domain, LARK_MCP_STATELESS_HTTP="true", LARK_MCP_RATE_LIMIT_ENABLED="false",
+               PYTHONPATH=os.pathsep.join(filter(None, [os.path.abspath(SRC), os.environ.get("PYTHONPATH")])))
+    command = [sys.executable, "-m", "lark_mcp.main", "--transport", "streamable-http",
+               "--workers", str(workers), "--port", str(port)]
+    process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_healthy(base_url, process)
+        # 预热：每个工作进程导入SDK、创建client、获取token
+        load((f"{base_url}/mcp", workers * 2, 1.0))
+        with multiprocessing.Pool(args.clients) as pool:
+            results = pool.map(load, [(f"{base_url}/mcp", args.concurrency, args.duration)] * args.clients)
+        latencies = sorted(latency for result in results for latency in result)
+        return {"calls": len(latencies), "qps": len(latencies) / args.duration,
+                "p50": latencies[len(latencies) // 2] * 1000, "p99": latencies[int(len(latencies) * 0.99)] * 1000}
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="streamable-http throughput with multiple worker processes")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="依次测试的工作进程数")
+    parser.add_argument("--duration", type=float, default=10, help="每轮压测的时长（秒）")
+    parser.add_argument("--clients", type=int, default=4, help="压测进程数")
+    parser.add_argument("--concurrency", type=int, default=16, help="每个压测进程同时进行的调用数")
+    parser.add_argument("--latency", type=float, default=0.0, help="桩服务每个请求的固定延迟（秒）")
+    args = parser.parse_args()
+
+    port_queue = multiprocessing.Queue()
+    stub = multiprocessing.Process(target=run_stub, args=(args.latency, port_queue), daemon=True)
+    stub.start()
+    domain = port_queue.get(timeout=10)
+
+    print(f"cpus={os.cpu_count()}  duration={args.duration}s  clients={args.clients}x{args.concurrency}"
+          f"  latency={args.latency}s")
+    print(f"{'workers':>8}{'calls':>10}{'qps':>10}{'speedup':>9}{'p50 ms':>10}{'p99 ms':>10}")
+    baseline = None
+    for workers in args.workers:
+        result = run(workers, domain, args)
+        # 以第一轮的吞吐为基准
+        baseline = baseline or result["qps"]
+        print(f"{workers:>8}{result['calls']:>10}{result['qps']:>10.0f}{result['qps'] / baseline:>8.2f}x"
+              f"{result['p50']:>10.1f}{result['p99']:>10.1f}")
+    stub.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+本地飞书开放平台桩服务，供基准测试使用
+
+只模拟鉴权接口和少量业务接口的返回结构，每个请求固定延迟 latency 秒，
+用于在不访问真实飞书的情况下比较不同实现的吞吐。
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # 默认的listen队列只有5，高并发下会丢弃连接
+    request_queue_size = 1024
+
+
+class StubLarkServer(object):
+
+    def __init__(self, latency: float = 0.02, host: str = "127.0.0.1", port: int = 0):
+        self.latency = latency
+        self.counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), self._handler_class())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def domain(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubLarkServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def count(self, path: str) -> None:
+        with self._lock:
+            self.counts[path] = self.counts.get(path, 0) + 1
+
+    def payload(self, method: str, path: str) -> dict:
+        if path.endswith("/tenant_access_token/internal"):
+            return {"code": 0, "msg": "ok", "tenant_access_token": "t-stub", "expire": 7200}
+        if path.endswith("/calendars/primary"):
+            return {"code": 0, "data": {"calendars": [{"calendar": {"calendar_id": "stub_calendar", "type": "primary"}}]}}
+        if path.endswith("/events") and method == "POST":
+            return {"code": 0, "data": {"event": {"event_id": "stub_event", "summary": "stub"}}}
+        if "/docx/v1/documents/" in path:
+            return {"code": 0, "data": {"document": {"document_id": path.rsplit("/", 1)[-1], "revision_id": 1,
+                                                     "title": "stub"}}}
+        if path.endswith("/drive/v1/files"):
+            return {"code": 0, "data": {"files": [{"token": f"file_{i}", "name": f"file_{i}", "type": "docx"}
+                                                  for i in range(20)], "has_more": False}}
+        return {"code": 0, "msg": "success", "data": {}}
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _handle(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+                path = self.path.split("?", 1)[0]
+                stub.count(path)
+                time.sleep(stub.latency)
+                body = json.dumps(stub.payload(self.command, path)).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _handle
+
+        return Handler
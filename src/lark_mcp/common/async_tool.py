@@ -0,0 +1,32 @@
+import inspect
+from typing import Any, Callable, Optional
+
+from mcp.server.fastmcp import Context
+
+
+def async_variant(sync_tool: Callable[..., Any]):
+    """
+    声明某个协程函数是同步工具的异步版本
+
+    异步版本沿用同步工具的参数定义（Field描述、默认值）和文档，
+    注册到FastMCP后对外暴露的工具schema与同步版本完全一致。
+    异步版本额外声明的参数（如 ctx: Context）追加在参数列表末尾，由FastMCP注入，不出现在schema中。
+    """
+
+    def decorator(async_tool: Callable[..., Any]):
+        signature = inspect.signature(sync_tool)
+        extra = [param for name, param in inspect.signature(async_tool).parameters.items()
+                 if name not in signature.parameters]
+        async_tool.__signature__ = signature.replace(parameters=[*signature.parameters.values(), *extra])
+        async_tool.__doc__ = sync_tool.__doc__
+        return async_tool
+
+    return decorator
+
+
+def can_stream(ctx: Optional[Context]) -> bool:
+    """调用方是否请求了进度通知（携带progressToken），只有这时才能通过进度通知逐步推送结果"""
+    if ctx is None:
+        return False
+    meta = ctx.request_context.meta
+    return meta is not None and meta.progressToken is not None
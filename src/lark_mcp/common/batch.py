@@ -0,0 +1,98 @@
+import asyncio
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from lark_mcp.common.response import failure_message, dumps
+from lark_mcp.common.jobs import job_progress
+from lark_mcp.common.lazy_import import lazy_import
+from lark_mcp.common.log import logger
+
+lark = lazy_import("lark_oapi")
+
+# 批量工具同时进行的飞书请求数上限，可通过环境变量覆盖
+BATCH_CONCURRENCY = int(os.getenv("LARK_MCP_BATCH_CONCURRENCY", "8"))
+
+
+async def gather_with_limit(aws: Iterable[Awaitable[Any]], limit: int = BATCH_CONCURRENCY,
+                            progress: bool = True) -> List[Any]:
+    """
+    并发执行，同时运行的数量不超过limit；结果与输入顺序一致，异常作为结果返回。
+    在后台任务中运行且progress为True时，按完成的数量上报任务进度
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(aw: Awaitable[Any]) -> Any:
+        try:
+            async with semaphore:
+                try:
+                    return await aw
+                finally:
+                    if progress:
+                        job_progress()
+        finally:
+            # 排队中被取消时协程还未开始执行，需要关闭
+            if asyncio.iscoroutine(aw):
+                aw.close()
+
+    runs = [run(aw) for aw in aws]
+    if progress:
+        job_progress(0, total=len(runs))
+    return await asyncio.gather(*runs, return_exceptions=True)
+
+
+def map_with_limit(fn: Callable[[Any], Any], items: Iterable[Any], limit: int = BATCH_CONCURRENCY) -> List[Any]:
+    """
+    gather_with_limit 的同步版本：在线程池中并发执行fn(item)，同时运行的数量不超过limit；
+    结果与输入顺序一致，异常作为结果返回。每个任务在调用方上下文的副本中执行，沿用链路追踪的span和日志上下文
+    """
+    items = list(items)
+
+    def run(item: Any) -> Any:
+        try:
+            return fn(item)
+        except Exception as err:
+            return err
+
+    if len(items) <= 1 or limit <= 1:
+        return [run(item) for item in items]
+    context = contextvars.copy_context()
+    with ThreadPoolExecutor(max_workers=min(limit, len(items))) as executor:
+        return list(executor.map(lambda item: context.copy().run(run, item), items))
+
+
+def item_status(index: int, result: Any, **fields: Any) -> Dict[str, Any]:
+    """单个条目的执行结果：成功为ok并附带fields，失败附带错误码和错误信息"""
+    if isinstance(result, BaseException):
+        return {"index": index, "status": "error", "msg": str(result)}
+    if isinstance(result, lark.BaseResponse) and not result.success():
+        return {"index": index, "status": "error", "code": result.code, "msg": result.msg,
+                "log_id": result.get_log_id()}
+    return {"index": index, "status": "ok", **fields}
+
+
+def batch_summary(items: List[Dict[str, Any]], failures_only: bool = False) -> str:
+    """批量工具的紧凑返回结果；failures_only为True时只列出失败的条目"""
+    total = len(items)
+    succeeded = sum(1 for item in items if item["status"] == "ok")
+    if failures_only:
+        items = [item for item in items if item["status"] != "ok"]
+    return dumps({"total": total, "succeeded": succeeded, "failed": total - succeeded, "items": items})
+
+
+def chunked(items: List[Any], size: int) -> List[List[Any]]:
+    """按size拆分列表，保持原有顺序"""
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+def chunk_error(api_name: str, index: int, result: Any, **chunk: Any) -> Optional[Dict[str, Any]]:
+    """分片请求失败时返回该分片的错误信息（附带分片内容），成功返回None"""
+    if isinstance(result, BaseException):
+        error = str(result)
+    elif not result.success():
+        error = failure_message(api_name, result)
+    else:
+        return None
+    logger.error(error)
+    return {"chunk": index, **chunk, "error": error}
@@ -0,0 +1,144 @@
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from lark_mcp.common.lazy_import import lazy_import, aload
+from lark_mcp.common.tracing import start_span
+from lark_mcp.common.log import adopt_logger, bind_log_context, sdk_log_level
+
+lark = lazy_import("lark_oapi")
+transport = lazy_import("lark_mcp.common.transport")
+token_manager = lazy_import("lark_mcp.common.token_manager")
+
+# 客户端池配置，可通过环境变量覆盖
+CLIENT_POOL_MAX_SIZE = int(os.getenv("LARK_MCP_CLIENT_POOL_MAX_SIZE", "256"))
+CLIENT_POOL_TTL = int(os.getenv("LARK_MCP_CLIENT_POOL_TTL", "3600"))
+LARK_DOMAIN = os.getenv("LARK_MCP_DOMAIN", "https://open.feishu.cn")
+
+
+class LarkClientPool(object):
+    """按租户凭证 (app_id, app_secret) 复用 lark.Client，带 LRU + TTL 淘汰"""
+
+    def __init__(self, max_size: int = CLIENT_POOL_MAX_SIZE, ttl: int = CLIENT_POOL_TTL):
+        self._max_size = max_size
+        self._ttl = ttl
+        self._clients: "OrderedDict[Tuple[Optional[str], Optional[str]], Tuple[lark.Client, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, app_id: Optional[str], app_secret: Optional[str]) -> "lark.Client":
+        client = self.get_cached(app_id, app_secret)
+        if client is not None:
+            return client
+
+        # 构建client时校验凭证，可能请求鉴权接口，不持有池的锁
+        client = self._build_client(app_id, app_secret)
+        with self._lock:
+            self._misses += 1
+            self._clients[(app_id, app_secret)] = (client, time.monotonic())
+
+            # 超出容量时淘汰最久未使用的客户端
+            while len(self._clients) > self._max_size:
+                self._clients.popitem(last=False)
+                self._evictions += 1
+            return client
+
+    def get_cached(self, app_id: Optional[str], app_secret: Optional[str]) -> Optional["lark.Client"]:
+        """池中可用的client；不存在、已过期或密钥已不是登记的密钥时返回None"""
+        key = (app_id, app_secret)
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry is None:
+                return None
+            client, created_at = entry
+            if time.monotonic() - created_at < self._ttl and _credentials_current(app_id, app_secret):
+                self._clients.move_to_end(key)
+                self._hits += 1
+                return client
+            # 过期或凭证已被替换的客户端直接丢弃，重新构建时再校验凭证
+            del self._clients[key]
+            self._evictions += 1
+            return None
+
+    def invalidate(self, app_id: Optional[str], app_secret: Optional[str] = None) -> None:
+        """移除某个租户的客户端；不传app_secret时移除该app_id下的全部客户端"""
+        with self._lock:
+            for key in list(self._clients):
+                if key[0] == app_id and (app_secret is None or key[1] == app_secret):
+                    del self._clients[key]
+                    self._evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clients.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._clients),
+                "max_size": self._max_size,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+            }
+
+    @staticmethod
+    def _build_client(app_id: Optional[str], app_secret: Optional[str]) -> "lark.Client":
+        # SDK发出的飞书请求统一复用共享HTTP连接池（启用时按租户限流），第一次构建client时接管
+        transport.install_transport()
+        # SDK的日志默认写到stdout，改为经过日志队列写到stderr
+        adopt_logger(lark.logger)
+        # tenant_access_token 统一由共享的token管理器获取和刷新；密钥错误时在这里抛出异常，不会得到client
+        tokens = token_manager.get_token_manager()
+        tokens.register(app_id, app_secret, LARK_DOMAIN)
+        return lark.Client.builder() \
+            .app_id(app_id) \
+            .app_secret(app_secret) \
+            .domain(LARK_DOMAIN) \
+            .cache(tokens) \
+            .log_level(lark.LogLevel(sdk_log_level())) \
+            .build()
+
+
+def _credentials_current(app_id: Optional[str], app_secret: Optional[str]) -> bool:
+    # token按app_id共享，只有密钥仍是token管理器中登记的密钥时才能继续使用这个client
+    return token_manager.get_token_manager().registered(app_id, app_secret)
+
+
+# 进程级共享的客户端池，所有MCP工具都通过它获取client
+_client_pool = LarkClientPool()
+
+
+def get_lark_client(app_id: Optional[str], app_secret: Optional[str]) -> "lark.Client":
+    """获取租户对应的共享client；凭证缺失或密钥错误时抛出 ObtainAccessTokenException，按租户缓存的数据在它之后读取"""
+    bind_log_context(app_id=app_id)
+    with start_span("lark.client.acquire", attributes={"lark.app_id": app_id}):
+        return _client_pool.get(app_id, app_secret)
+
+
+async def aget_lark_client(app_id: Optional[str], app_secret: Optional[str]) -> "lark.Client":
+    """获取租户对应的共享client，供异步工具使用；凭证校验与 get_lark_client 相同"""
+    bind_log_context(app_id=app_id)
+    with start_span("lark.client.acquire", attributes={"lark.app_id": app_id}):
+        await aload(lark, transport, token_manager)
+        client = _client_pool.get_cached(app_id, app_secret)
+        if client is None:
+            # 第一次使用的凭证需要请求鉴权接口校验，在线程中进行
+            client = await asyncio.to_thread(_client_pool.get, app_id, app_secret)
+        if app_id and app_secret:
+            await token_manager.get_token_manager().aensure_tenant_token(app_id)
+        return client
+
+
+def invalidate_lark_client(app_id: Optional[str], app_secret: Optional[str] = None) -> None:
+    _client_pool.invalidate(app_id, app_secret)
+
+
+def get_client_pool_stats() -> Dict[str, int]:
+    """客户端池的命中/未命中/淘汰计数"""
+    return _client_pool.stats()
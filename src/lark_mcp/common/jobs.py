@@ -0,0 +1,172 @@
+import asyncio
+import contextvars
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from mcp.server.fastmcp.tools import ToolManager
+from lark_mcp.common.log import logger
+
+# 后台任务配置，可通过环境变量覆盖
+JOB_WORKERS = int(os.getenv("LARK_MCP_JOB_WORKERS", "4"))
+JOB_TTL = int(os.getenv("LARK_MCP_JOB_TTL", "3600"))
+JOB_MAX = int(os.getenv("LARK_MCP_JOB_MAX", "1000"))
+
+PENDING, RUNNING, SUCCEEDED, FAILED, CANCELLED = "pending", "running", "succeeded", "failed", "cancelled"
+FINISHED = {SUCCEEDED, FAILED, CANCELLED}
+
+# 当前协程所属的后台任务，工具内部通过 job_progress 上报进度
+_current_job: contextvars.ContextVar[Optional["Job"]] = contextvars.ContextVar("lark_mcp_job", default=None)
+
+
+class JobLimitExceeded(Exception):
+    pass
+
+
+class Job(object):
+    def __init__(self, tool: str, arguments: Dict[str, Any], tenant_id: Optional[str] = None):
+        self.job_id = uuid.uuid4().hex
+        self.tool = tool
+        self.arguments = arguments
+        self.tenant_id = tenant_id
+        self.status = PENDING
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.completed = 0
+        self.total = 0
+        self.result: Optional[str] = None
+        self.error: Optional[str] = None
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+
+    def snapshot(self) -> Dict[str, Any]:
+        snapshot = {"job_id": self.job_id, "tool": self.tool, "status": self.status,
+                    "progress": {"completed": self.completed, "total": self.total},
+                    "created_at": int(self.created_at)}
+        if self.started_at is not None:
+            snapshot["started_at"] = int(self.started_at)
+        if self.finished_at is not None:
+            snapshot["finished_at"] = int(self.finished_at)
+            snapshot["elapsed"] = round(self.finished_at - (self.started_at or self.created_at), 3)
+        if self.error is not None:
+            snapshot["error"] = self.error
+        return snapshot
+
+
+class JobManager(object):
+    """
+    在后台运行已注册的工具
+
+    工具以与直接调用相同的参数校验执行，同时运行的任务数不超过 workers，其余任务排队等待。
+    结束的任务在 ttl 内可以查询结果；任务数超过 max_jobs 时先淘汰最早结束的任务，运行中的任务不会被淘汰。
+    启用租户注册表时任务属于提交它的租户，其他租户查询不到。
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, ttl: int = JOB_TTL, max_jobs: int = JOB_MAX):
+        self._tools = ToolManager()
+        self._workers = workers
+        self._ttl = ttl
+        self._max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._evicted = 0
+
+    def add_tool(self, fn: Callable[..., Any], name: str, description: Optional[str] = None) -> None:
+        self._tools.add_tool(fn, name=name, description=description)
+
+    def has_tool(self, name: str) -> bool:
+        return self._tools.get_tool(name) is not None
+
+    def submit(self, tool: str, arguments: Dict[str, Any], tenant_id: Optional[str] = None) -> Job:
+        """提交任务，必须在事件循环中调用"""
+        self._prune()
+        if len(self._jobs) >= self._max_jobs:
+            raise JobLimitExceeded(f"too many unfinished jobs, limit: {self._max_jobs}")
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._workers)
+        job = Job(tool, arguments, tenant_id)
+        self._jobs[job.job_id] = job
+        job.task = asyncio.ensure_future(self._run(job))
+        return job
+
+    def get(self, job_id: str, tenant_id: Optional[str] = None) -> Optional[Job]:
+        self._prune()
+        job = self._jobs.get(job_id)
+        return job if job is not None and job.tenant_id == tenant_id else None
+
+    def cancel(self, job_id: str, tenant_id: Optional[str] = None) -> Optional[Job]:
+        job = self.get(job_id, tenant_id)
+        if job is not None and not job.finished:
+            job.task.cancel()
+            if job.status == PENDING:
+                # 排队中的任务还未开始执行，直接标记为取消
+                self._finish(job, CANCELLED)
+        return job
+
+    def stats(self) -> Dict[str, int]:
+        counts = {status: 0 for status in (PENDING, RUNNING, SUCCEEDED, FAILED, CANCELLED)}
+        for job in self._jobs.values():
+            counts[job.status] += 1
+        counts["evicted"] = self._evicted
+        return counts
+
+    async def _run(self, job: Job) -> None:
+        try:
+            async with self._semaphore:
+                job.status, job.started_at = RUNNING, time.time()
+                _current_job.set(job)
+                result = await self._tools.call_tool(job.tool, job.arguments)
+            job.result = result if isinstance(result, str) else str(result)
+            self._finish(job, SUCCEEDED)
+        except asyncio.CancelledError:
+            self._finish(job, CANCELLED)
+        except Exception as err:
+            logger.error("job failed", job_id=job.job_id, tool=job.tool, err=err)
+            job.error = str(err)
+            self._finish(job, FAILED)
+
+    def _finish(self, job: Job, status: str) -> None:
+        if job.finished:
+            return
+        job.status, job.finished_at = status, time.time()
+        logger.info("job finished", job_id=job.job_id, tool=job.tool, status=status, completed=job.completed,
+                    total=job.total)
+
+    def _prune(self) -> None:
+        # 删除过期的已结束任务；仍超过上限时删除最早结束的任务
+        expire_before = time.time() - self._ttl
+        finished = sorted((job for job in self._jobs.values() if job.finished), key=lambda job: job.finished_at)
+        overflow = len(self._jobs) - self._max_jobs + 1
+        for job in finished:
+            if job.finished_at >= expire_before and overflow <= 0:
+                break
+            del self._jobs[job.job_id]
+            self._evicted += 1
+            overflow -= 1
+
+
+def job_progress(completed: int = 1, total: int = 0) -> None:
+    """在后台任务中上报进度：完成completed个、新增total个待完成的工作项；不在后台任务中时不做任何事"""
+    job = _current_job.get()
+    if job is not None:
+        job.completed += completed
+        job.total += total
+
+
+# 进程级共享的任务管理器
+_job_manager = JobManager()
+
+
+def get_job_manager() -> JobManager:
+    return _job_manager
+
+
+def get_job_stats() -> Dict[str, int]:
+    """各状态的任务数和淘汰计数"""
+    return _job_manager.stats()
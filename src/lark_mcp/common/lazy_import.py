@@ -0,0 +1,52 @@
+import asyncio
+import importlib
+import sys
+import threading
+from typing import Any
+
+# lark_oapi 的包内存在循环导入，多个线程同时导入时import会报告死锁，由这把锁保证同一时间只有一个线程在导入
+_import_lock = threading.RLock()
+
+
+def _import(name: str):
+    with _import_lock:
+        return importlib.import_module(name)
+
+
+class LazyModule(object):
+    """
+    第一次访问属性时才导入的模块
+
+    lark_oapi 的包初始化会导入全部服务的模型定义，耗时数秒、占用上百MB内存。
+    工具模块通过它引用SDK，服务启动、返回工具列表时都不导入SDK，第一次调用工具时才导入。
+    """
+
+    def __init__(self, name: str):
+        self.__name__ = name
+
+    def __getattr__(self, item: str) -> Any:
+        # 取到的属性缓存在代理对象上，之后的访问不再经过这里
+        value = getattr(_import(self.__name__), item)
+        setattr(self, item, value)
+        return value
+
+    def __repr__(self) -> str:
+        return f"<lazy module {self.__name__!r}>"
+
+
+def lazy_import(name: str) -> Any:
+    """返回模块的延迟导入代理，用法与 import name 得到的模块对象相同"""
+    return LazyModule(name)
+
+
+def load(*modules: LazyModule) -> None:
+    """立即导入模块，用于启动后在后台预先导入"""
+    for module in modules:
+        _import(module.__name__)
+
+
+async def aload(*modules: LazyModule) -> None:
+    """在线程中导入尚未导入的模块，异步工具第一次调用时不阻塞事件循环"""
+    pending = [module for module in modules if module.__name__ not in sys.modules]
+    if pending:
+        await asyncio.to_thread(load, *pending)
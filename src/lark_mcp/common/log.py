@@ -0,0 +1,247 @@
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from lark_mcp.common.lazy_import import lazy_import
+
+tracing = lazy_import("lark_mcp.common.tracing")
+
+_LEVELS = {"DEBUG": logging.DEBUG, "INFO": logging.INFO, "WARNING": logging.WARNING, "ERROR": logging.ERROR,
+           "CRITICAL": logging.CRITICAL}
+
+# 日志配置，可通过环境变量覆盖；日志写到stderr，stdout留给stdio传输
+LOG_LEVEL = os.getenv("LARK_MCP_LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LARK_MCP_LOG_FORMAT", "json")
+# 飞书SDK自身的日志级别，SDK在DEBUG级别会记录每个请求
+SDK_LOG_LEVEL = os.getenv("LARK_MCP_SDK_LOG_LEVEL", "WARNING").upper()
+# 成功返回的数据在INFO级别按比例采样记录，0为不记录；当前租户的级别为DEBUG时全部记录
+LOG_PAYLOAD_SAMPLE_RATIO = float(os.getenv("LARK_MCP_LOG_PAYLOAD_SAMPLE_RATIO", "0"))
+# 单个字段（包括消息本身）最多记录的字符数，超出部分截断
+LOG_MAX_FIELD_SIZE = int(os.getenv("LARK_MCP_LOG_MAX_FIELD_SIZE", "2048"))
+# 按租户覆盖日志级别，如 cli_a:DEBUG,tenant_b:ERROR，键为 app_id 或租户ID
+LOG_TENANT_LEVELS = os.getenv("LARK_MCP_LOG_TENANT_LEVELS", "")
+LOG_QUEUE_SIZE = int(os.getenv("LARK_MCP_LOG_QUEUE_SIZE", "10000"))
+
+
+def _parse_tenant_levels(value: str) -> Dict[str, int]:
+    levels = {}
+    for item in value.split(","):
+        key, _, level = item.strip().rpartition(":")
+        if key.strip() and level.strip().upper() in _LEVELS:
+            levels[key.strip()] = _LEVELS[level.strip().upper()]
+    return levels
+
+
+_BASE_LEVEL = _LEVELS.get(LOG_LEVEL, logging.INFO)
+_TENANT_LEVELS = _parse_tenant_levels(LOG_TENANT_LEVELS)
+
+# 当前调用的日志上下文（app_id、租户ID），附加到每条日志上，也用于查找租户的日志级别；只整体替换，不原地修改
+_log_context: contextvars.ContextVar[Dict[str, Any]] = contextvars.ContextVar("lark_mcp_log_context", default={})
+
+
+def _truncate(value: str) -> str:
+    if len(value) <= LOG_MAX_FIELD_SIZE:
+        return value
+    return f"{value[:LOG_MAX_FIELD_SIZE]}...({len(value)} chars)"
+
+
+def _record_fields(record: logging.LogRecord) -> Dict[str, Any]:
+    fields = dict(getattr(record, "context", None) or {})
+    if getattr(record, "trace_id", None):
+        fields["trace_id"], fields["span_id"] = record.trace_id, record.span_id
+    for key, value in (getattr(record, "fields", None) or {}).items():
+        if value is not None:
+            fields[key] = value if isinstance(value, (bool, int, float)) else _truncate(str(value))
+    return fields
+
+
+class JsonFormatter(logging.Formatter):
+    """每条日志一行JSON：时间、级别、logger、事件和各个字段"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": f"{time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(record.created))}.{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "event": _truncate(record.getMessage()),
+        }
+        entry.update(_record_fields(record))
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """[时间] [级别] 事件 key=value ..."""
+
+    def __init__(self):
+        super().__init__("[%(name)s] [%(asctime)s] [%(levelname)s] %(message)s")
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        fields = " ".join(f"{key}={value}" for key, value in _record_fields(record).items())
+        record.message = _truncate(record.message) + (f" {fields}" if fields else "")
+        return super().formatMessage(record)
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    把日志放入有界队列，由后台线程格式化并写出
+
+    调用方只创建 LogRecord，不做格式化也不等待IO；队列满时丢弃日志并计数，不阻塞工具调用。
+    """
+
+    def __init__(self, queue_size: int = LOG_QUEUE_SIZE, target: Optional[logging.Handler] = None):
+        super().__init__(queue.Queue(queue_size))
+        self.target = target or logging.StreamHandler(sys.stderr)
+        self.target.setFormatter(TextFormatter() if LOG_FORMAT == "text" else JsonFormatter())
+        self._listener: Optional[logging.handlers.QueueListener] = None
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 格式化在后台线程中进行
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        self._ensure_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self) -> None:
+        """写出队列中剩余的日志并停止后台线程"""
+        with self._lock:
+            listener, self._listener = self._listener, None
+        if listener is not None:
+            try:
+                listener.stop()
+            except queue.Full:
+                pass
+
+    def stats(self) -> Dict[str, int]:
+        return {"queued": self.queue.qsize(), "dropped": self.dropped}
+
+    def _ensure_listener(self) -> None:
+        if self._listener is not None:
+            return
+        with self._lock:
+            if self._listener is None:
+                self._listener = logging.handlers.QueueListener(self.queue, self.target)
+                self._listener.start()
+
+
+class StructuredLogger(object):
+    """
+    结构化日志，用法：logger.info("list folder files", pages=3, files=120)
+
+    调用时只按当前租户的级别做判断并记下事件名和字段，JSON序列化、截断和写出都在后台线程中进行，
+    低于当前级别的日志不会创建 LogRecord。字段值只在写出时转换为字符串，调用方不要在之后修改它们。
+    """
+
+    def __init__(self, name: str, handler: logging.Handler):
+        self._logger = logging.getLogger(name)
+        self._logger.setLevel(min([_BASE_LEVEL, *_TENANT_LEVELS.values()]))
+        self._logger.addHandler(handler)
+        self._logger.propagate = False
+
+    def enabled(self, level: int) -> bool:
+        return level >= effective_level()
+
+    def debug(self, event: str, **fields: Any) -> None:
+        if logging.DEBUG >= effective_level():
+            self._emit(logging.DEBUG, event, fields)
+
+    def info(self, event: str, **fields: Any) -> None:
+        if logging.INFO >= effective_level():
+            self._emit(logging.INFO, event, fields)
+
+    def warning(self, event: str, **fields: Any) -> None:
+        if logging.WARNING >= effective_level():
+            self._emit(logging.WARNING, event, fields)
+
+    def error(self, event: str, **fields: Any) -> None:
+        if logging.ERROR >= effective_level():
+            self._emit(logging.ERROR, event, fields)
+
+    def payload(self, event: str, payload: Any, **fields: Any) -> None:
+        """
+        记录成功返回的数据
+
+        当前租户的级别为DEBUG时在DEBUG级别全部记录，否则在INFO级别按 LOG_PAYLOAD_SAMPLE_RATIO 采样记录，
+        未采样时的开销只有一次级别判断和一次随机数；记录的数据超过 LOG_MAX_FIELD_SIZE 时截断。
+        """
+        level = effective_level()
+        if level <= logging.DEBUG:
+            self._emit(logging.DEBUG, event, dict(fields, payload=payload))
+        elif level <= logging.INFO and LOG_PAYLOAD_SAMPLE_RATIO > 0 and random.random() < LOG_PAYLOAD_SAMPLE_RATIO:
+            self._emit(logging.INFO, event, dict(fields, payload=payload, sampled=True))
+
+    def _emit(self, level: int, event: str, fields: Dict[str, Any]) -> None:
+        # 不查找调用位置（findCaller 需要遍历调用栈），直接创建 LogRecord
+        record = self._logger.makeRecord(self._logger.name, level, "", 0, event, (), None)
+        record.fields = fields
+        record.context = _log_context.get()
+        span = tracing.current_span()
+        if span.recording:
+            record.trace_id, record.span_id = f"{span.trace_id:032x}", f"{span.span_id:016x}"
+        self._logger.handle(record)
+
+
+# 进程级共享的日志队列和后台写出线程，lark_mcp 和飞书SDK的日志都经过它
+_handler = NonBlockingQueueHandler()
+atexit.register(_handler.stop)
+
+logger = StructuredLogger("lark_mcp", _handler)
+
+
+def effective_level() -> int:
+    """当前调用所属租户的日志级别，未单独配置时为 LARK_MCP_LOG_LEVEL"""
+    if _TENANT_LEVELS:
+        context = _log_context.get()
+        for key in ("app_id", "tenant_id"):
+            level = _TENANT_LEVELS.get(context.get(key))
+            if level is not None:
+                return level
+    return _BASE_LEVEL
+
+
+def bind_log_context(**fields: Any) -> Optional[contextvars.Token]:
+    """在当前调用的日志上下文中加入字段，如 app_id、tenant_id；返回的token可用于 reset_log_context 恢复"""
+    context = _log_context.get()
+    if all(context.get(key) == value for key, value in fields.items()):
+        return None
+    return _log_context.set({**context, **fields})
+
+
+def reset_log_context(token: Optional[contextvars.Token]) -> None:
+    if token is not None:
+        _log_context.reset(token)
+
+
+def adopt_logger(target: logging.Logger) -> None:
+    """让其他logger（飞书SDK的 Lark logger）的日志也经过日志队列写出；SDK默认写到stdout，会破坏stdio传输"""
+    if target.handlers == [_handler]:
+        return
+    for handler in list(target.handlers):
+        target.removeHandler(handler)
+    target.addHandler(_handler)
+    target.propagate = False
+
+
+def sdk_log_level() -> int:
+    return _LEVELS.get(SDK_LOG_LEVEL, logging.WARNING)
+
+
+def get_log_stats() -> Dict[str, int]:
+    """日志队列中等待写出和因队列满丢弃的日志数"""
+    return _handler.stats()
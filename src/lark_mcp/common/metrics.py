@@ -0,0 +1,252 @@
+import bisect
+import functools
+import inspect
+import os
+import re
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# 指标配置，可通过环境变量覆盖
+METRICS_ENABLED = os.getenv("LARK_MCP_METRICS_ENABLED", "true").lower() == "true"
+
+# 耗时（秒）和字节数的直方图分桶
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# 飞书返回的JSON以 code 开头，只匹配开头的一小段，不解析整个返回内容
+_LARK_CODE = re.compile(rb'\s*\{\s*"code"\s*:\s*(-?\d+)')
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Metric(object):
+    """按标签值分别记录的指标，标签值为按 label_names 顺序排列的元组"""
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return self.header() + [f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}"
+                                for labels, value in values]
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, labels: Tuple[str, ...] = (), amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def inc(self, labels: Tuple[str, ...] = (), amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, labels: Tuple[str, ...] = (), amount: float = 1) -> None:
+        self.inc(labels, -amount)
+
+
+class Histogram(Metric):
+    """
+    直方图
+
+    每次记录只增加一个分桶的计数，累计值在输出时计算，记录的开销与分桶数无关。
+    """
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = DURATION_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(buckets)
+
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                # [各分桶计数（最后一个为 +Inf）, 总和]
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = [(labels, list(counts), total) for labels, (counts, total) in self._values.items()]
+        lines = self.header()
+        names = self.label_names + ("le",)
+        for labels, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(names, labels + (le,))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+
+TOOL_DURATION = Histogram("lark_mcp_tool_duration_seconds", "MCP tool call latency", ("tool",))
+TOOL_RESPONSE_BYTES = Histogram("lark_mcp_tool_response_bytes", "MCP tool response size", ("tool",), BYTES_BUCKETS)
+TOOL_ERRORS = Counter("lark_mcp_tool_errors_total", "MCP tool calls that raised", ("tool", "error"))
+TOOL_IN_FLIGHT = Gauge("lark_mcp_tool_in_flight", "MCP tool calls in progress", ("tool",))
+
+LARK_DURATION = Histogram("lark_mcp_lark_request_duration_seconds",
+                          "Lark API call latency, including rate limiting and retries", ("method", "endpoint"))
+LARK_REQUEST_BYTES = Histogram("lark_mcp_lark_request_bytes", "Lark API request body size (async calls)",
+                               ("method", "endpoint"), BYTES_BUCKETS)
+LARK_RESPONSE_BYTES = Histogram("lark_mcp_lark_response_bytes", "Lark API response body size",
+                                ("method", "endpoint"), BYTES_BUCKETS)
+LARK_ERRORS = Counter("lark_mcp_lark_errors_total", "Failed Lark API calls by Lark code, HTTP status or exception",
+                      ("endpoint", "code"))
+LARK_IN_FLIGHT = Gauge("lark_mcp_lark_in_flight", "Lark API calls in progress", ("endpoint",))
+
+_metrics: List[Metric] = [TOOL_DURATION, TOOL_RESPONSE_BYTES, TOOL_ERRORS, TOOL_IN_FLIGHT,
+                          LARK_DURATION, LARK_REQUEST_BYTES, LARK_RESPONSE_BYTES, LARK_ERRORS, LARK_IN_FLIGHT]
+
+# 输出时读取的各模块统计：(指标名前缀, 标签, 模块, 函数)。只读取已经导入的模块，不会因为抓取指标导入飞书SDK
+_STATS_SOURCES = [
+    ("cache", {"cache": "client_pool"}, "lark_mcp.common.client_pool", "get_client_pool_stats"),
+    ("cache", {"cache": "tenant_registry"}, "lark_mcp.common.tenant_registry", "get_tenant_registry_stats"),
+    ("cache", {"cache": "primary_calendar"}, "lark_mcp.mcp_tool.calendar.primary_calendar",
+     "get_primary_calendar_cache_stats"),
+    ("cache", {"cache": "contact"}, "lark_mcp.mcp_tool.user_info.contact_cache", "get_contact_cache_stats"),
+    ("cache", {"cache": "document"}, "lark_mcp.mcp_tool.document.document_cache", "get_document_cache_stats"),
+    ("cache", {"cache": "folder_snapshot"}, "lark_mcp.mcp_tool.folder.walk_folder_tree", "get_folder_snapshot_stats"),
+    ("token_manager", {}, "lark_mcp.common.token_manager", "get_token_manager_stats"),
+    ("retry", {}, "lark_mcp.common.retry", "get_retry_stats"),
+    ("jobs", {}, "lark_mcp.common.jobs", "get_job_stats"),
+    ("tracing", {}, "lark_mcp.common.tracing", "get_tracer_stats"),
+    ("log", {}, "lark_mcp.common.log", "get_log_stats"),
+]
+# 限流器的统计按 "app_id:family" 分组
+_RATE_LIMITER_SOURCE = ("lark_mcp.common.rate_limiter", "get_rate_limiter_stats")
+# 只增不减的统计项，以 counter 类型输出并加 _total 后缀；其余为当前值，以 gauge 类型输出
+_COUNTER_STATS = frozenset([
+    "hits", "misses", "evictions", "reloads", "store_hits", "bytes_saved",
+    "refreshes", "refresh_failures", "retries", "recovered", "exhausted", "evicted",
+    "finished", "dropped", "export_failures", "acquired", "delayed", "throttled",
+])
+
+
+def lark_error_code(status_code: int, content: Optional[bytes]) -> Optional[str]:
+    """飞书返回的错误码；成功时为None，没有错误码的失败响应为 http_<状态码>"""
+    match = _LARK_CODE.match(content) if content else None
+    if match is not None:
+        return match.group(1).decode() if match.group(1) != b"0" else None
+    return f"http_{status_code}" if status_code >= 400 else None
+
+
+def observe_lark_request(method: str, endpoint: str, duration: float, resp: Any = None,
+                         error: Optional[BaseException] = None) -> None:
+    """记录一次飞书接口调用；resp 为SDK的 RawResponse"""
+    labels = (method, endpoint)
+    LARK_DURATION.observe(labels, duration)
+    if resp is not None:
+        LARK_RESPONSE_BYTES.observe(labels, len(resp.content or b""))
+        code = lark_error_code(resp.status_code, resp.content)
+        if code is not None:
+            LARK_ERRORS.inc((endpoint, code))
+    elif error is not None:
+        LARK_ERRORS.inc((endpoint, type(error).__name__))
+
+
+def instrument_tool(name: str, tool: Callable[..., Any]):
+    """包装工具，记录调用耗时、返回结果大小、异常和进行中的调用数；签名与原工具相同"""
+    labels = (name,)
+
+    @functools.wraps(tool)
+    async def wrapper(*args, **kwargs):
+        TOOL_IN_FLIGHT.inc(labels)
+        started = time.perf_counter()
+        try:
+            result = tool(*args, **kwargs)
+            if inspect.isawaitable(result):
+                result = await result
+        except BaseException as err:
+            TOOL_ERRORS.inc((name, type(err).__name__))
+            raise
+        finally:
+            TOOL_DURATION.observe(labels, time.perf_counter() - started)
+            TOOL_IN_FLIGHT.dec(labels)
+        if isinstance(result, str):
+            TOOL_RESPONSE_BYTES.observe(labels, len(result.encode("utf-8")))
+        return result
+
+    return wrapper
+
+
+def _render_stats(prefix: str, labels: Dict[str, str],
+                  stats: Dict[str, Any]) -> Dict[str, Tuple[str, List[str]]]:
+    names, values = tuple(labels), tuple(labels.values())
+    stats = dict(stats)
+    if "hits" in stats and "misses" in stats and "hit_ratio" not in stats:
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+    rendered = {}
+    for key, value in stats.items():
+        if not isinstance(value, (int, float)):
+            continue
+        metric_type = "counter" if key in _COUNTER_STATS else "gauge"
+        name = f"lark_mcp_{prefix}_{key}_total" if metric_type == "counter" else f"lark_mcp_{prefix}_{key}"
+        rendered[name] = (metric_type, [f"{name}{_format_labels(names, values)} {_format_value(value)}"])
+    return rendered
+
+
+def _collect_stats() -> List[str]:
+    samples: Dict[str, Tuple[str, List[str]]] = {}
+
+    def add(rendered: Dict[str, Tuple[str, List[str]]]) -> None:
+        for name, (metric_type, lines) in rendered.items():
+            samples.setdefault(name, (metric_type, []))[1].extend(lines)
+
+    for prefix, labels, module_name, function in _STATS_SOURCES:
+        module = sys.modules.get(module_name)
+        if module is not None:
+            add(_render_stats(prefix, labels, getattr(module, function)()))
+    module = sys.modules.get(_RATE_LIMITER_SOURCE[0])
+    if module is not None:
+        for key, stats in getattr(module, _RATE_LIMITER_SOURCE[1])().items():
+            app_id, family = key.rsplit(":", 1)
+            add(_render_stats("rate_limiter", {"app_id": app_id, "family": family}, stats))
+
+    lines = []
+    for name, (metric_type, values) in samples.items():
+        lines.append(f"# TYPE {name} {metric_type}")
+        lines.extend(values)
+    return lines
+
+
+def render_metrics() -> str:
+    """Prometheus 文本格式的全部指标"""
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    lines.extend(_collect_stats())
+    return "\n".join(lines) + "\n"
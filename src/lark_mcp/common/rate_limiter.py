@@ -0,0 +1,250 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from lark_oapi.core.model import RawResponse
+
+from lark_mcp.common.log import logger
+
+# 限流配置，可通过环境变量覆盖；单个接口族的速率可用 LARK_MCP_RATE_LIMIT_QPS_<FAMILY> 覆盖，如 LARK_MCP_RATE_LIMIT_QPS_IM
+# 默认不按固定速率限流：飞书的频率限制按接口各不相同，统一的默认速率会让限额更高的接口被无谓地排队，
+# 需要时按所用接口的限额设置 QPS 后开启。未开启时自适应降速（RATE_LIMIT_ADAPTIVE）仍然生效：
+# 某个租户的接口族收到频控响应后才开始按降低后的速率限流，速率恢复到 QPS 后不再限流
+RATE_LIMIT_ENABLED = os.getenv("LARK_MCP_RATE_LIMIT_ENABLED", "false").lower() == "true"
+RATE_LIMIT_QPS = float(os.getenv("LARK_MCP_RATE_LIMIT_QPS", "20"))
+RATE_LIMIT_BURST = float(os.getenv("LARK_MCP_RATE_LIMIT_BURST", "0"))
+RATE_LIMIT_ADAPTIVE = os.getenv("LARK_MCP_RATE_LIMIT_ADAPTIVE", "true").lower() == "true"
+RATE_LIMIT_MIN_QPS = float(os.getenv("LARK_MCP_RATE_LIMIT_MIN_QPS", "1"))
+# 多个工作进程各自限流，配置的速率按进程数平分，所有进程合计不超过配置的速率
+RATE_LIMIT_SHARES = max(int(os.getenv("LARK_MCP_WORKERS", "1")), 1)
+
+# 飞书频控错误码：99991400 应用频率限制，230020 消息发送频率限制
+RATE_LIMITED_CODES = {99991400, 230020}
+# 飞书频控时返回的距离限流窗口重置的秒数
+RATE_LIMIT_RESET_HEADER = "x-ogw-ratelimit-reset"
+# 触发频控后速率乘以该系数（乘性减），成功后速率约每秒加1（加性增）
+AIMD_DECREASE_FACTOR = 0.5
+AIMD_INCREASE = 1.0
+
+# 不参与限流的接口族（鉴权接口由token管理器自行合并请求）
+UNLIMITED_FAMILIES = {"auth"}
+
+
+def api_family(uri: str) -> Optional[str]:
+    """从接口路径中取出接口族，如 /open-apis/calendar/v4/... -> calendar"""
+    parts = uri.split("/")
+    if len(parts) < 3 or parts[1] != "open-apis" or parts[2] in UNLIMITED_FAMILIES:
+        return None
+    return parts[2]
+
+
+def is_rate_limited(resp: RawResponse) -> bool:
+    if resp.status_code == 429:
+        return True
+    if resp.status_code < 400 or not resp.content:
+        return False
+    try:
+        return json.loads(resp.content).get("code") in RATE_LIMITED_CODES
+    except (ValueError, AttributeError):
+        return False
+
+
+class TokenBucket(object):
+    """
+    令牌桶：令牌不足时调用方排队等待而不是直接失败
+
+    每次调用预约一个令牌，令牌可以透支，透支量即排在前面的请求数，
+    等待时间为透支的令牌按当前速率补齐所需的时间。
+    on_demand 为True时只在被频控后限流：速率低于 max_rate 或处于飞书告知的限流窗口内时才消耗令牌。
+    """
+
+    def __init__(self, rate: float, burst: float, min_rate: float = RATE_LIMIT_MIN_QPS,
+                 adaptive: bool = RATE_LIMIT_ADAPTIVE, on_demand: bool = False):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min(min_rate, rate)
+        self.adaptive = adaptive
+        self.on_demand = on_demand
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+        self._waiting = 0
+        self._max_waiting = 0
+        self._acquired = 0
+        self._delayed = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._throttled = 0
+
+    def reserve(self) -> float:
+        """预约一个令牌，返回需要等待的秒数"""
+        with self._lock:
+            self._refill()
+            self._acquired += 1
+            if self.on_demand and self.rate >= self.max_rate and self._tokens >= 0:
+                # 未被频控或速率已经恢复，不限流
+                return 0.0
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            wait = -self._tokens / self.rate
+            self._delayed += 1
+            self._wait_total += wait
+            self._wait_max = max(self._wait_max, wait)
+            return wait
+
+    def acquire(self) -> None:
+        wait = self.reserve()
+        if wait > 0:
+            self._enter_queue()
+            try:
+                time.sleep(wait)
+            finally:
+                self._leave_queue()
+
+    async def aacquire(self) -> None:
+        wait = self.reserve()
+        if wait > 0:
+            self._enter_queue()
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                self._leave_queue()
+
+    def on_success(self) -> None:
+        if not self.adaptive or self.rate >= self.max_rate:
+            return
+        with self._lock:
+            self._refill()
+            self.rate = min(self.max_rate, self.rate + AIMD_INCREASE / self.rate)
+
+    def on_throttled(self, reset_after: float = 0.0) -> None:
+        with self._lock:
+            self._refill()
+            self._throttled += 1
+            if self.adaptive:
+                self.rate = max(self.min_rate, self.rate * AIMD_DECREASE_FACTOR)
+            if self.on_demand:
+                # 此前没有限流，桶中积累的令牌不能用于被频控后的突发请求
+                self._tokens = min(self._tokens, 0.0)
+            # 飞书告知了限流窗口的重置时间时，在此之前不再放行新的请求
+            if reset_after > 0:
+                self._tokens = min(self._tokens, 0.0) - reset_after * self.rate
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "rate": round(self.rate, 3),
+                "max_rate": self.max_rate,
+                "queue_depth": self._waiting,
+                "max_queue_depth": self._max_waiting,
+                "acquired": self._acquired,
+                "delayed": self._delayed,
+                "wait_time_avg": self._wait_total / self._delayed if self._delayed else 0.0,
+                "wait_time_max": self._wait_max,
+                "throttled": self._throttled,
+            }
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _enter_queue(self) -> None:
+        with self._lock:
+            self._waiting += 1
+            self._max_waiting = max(self._max_waiting, self._waiting)
+
+    def _leave_queue(self) -> None:
+        with self._lock:
+            self._waiting -= 1
+
+
+class RateLimiter(object):
+    """
+    按 (app_id, 接口族) 对发往飞书的请求限流，并根据飞书的频控响应自适应调整速率（AIMD）
+
+    enabled为False时不按固定速率限流；adaptive为True时仍在收到频控响应后为该租户、接口族创建按需限流的令牌桶。
+    """
+
+    def __init__(self, enabled: bool = RATE_LIMIT_ENABLED, qps: float = RATE_LIMIT_QPS,
+                 burst: float = RATE_LIMIT_BURST, shares: int = RATE_LIMIT_SHARES,
+                 adaptive: bool = RATE_LIMIT_ADAPTIVE):
+        self.enabled = enabled
+        self.adaptive = adaptive
+        self._qps = qps
+        self._burst = burst
+        self._shares = shares
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, app_id: Optional[str], family: str) -> TokenBucket:
+        key = (app_id or "", family)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            with self._lock:
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    qps = float(os.getenv(f"LARK_MCP_RATE_LIMIT_QPS_{family.upper()}", self._qps)) / self._shares
+                    bucket = TokenBucket(qps, (self._burst / self._shares) or qps, adaptive=self.adaptive,
+                                         on_demand=not self.enabled)
+                    self._buckets[key] = bucket
+        return bucket
+
+    def acquire(self, app_id: Optional[str], family: str) -> None:
+        bucket = self._active_bucket(app_id, family)
+        if bucket is not None:
+            bucket.acquire()
+
+    async def aacquire(self, app_id: Optional[str], family: str) -> None:
+        bucket = self._active_bucket(app_id, family)
+        if bucket is not None:
+            await bucket.aacquire()
+
+    def record(self, app_id: Optional[str], family: str, resp: RawResponse) -> None:
+        """根据飞书的响应调整速率"""
+        if not self.enabled and not self.adaptive:
+            return
+        if not is_rate_limited(resp):
+            bucket = self._active_bucket(app_id, family)
+            if bucket is not None:
+                bucket.on_success()
+            return
+        bucket = self.bucket(app_id, family)
+        try:
+            reset_after = float(next((value for name, value in (resp.headers or {}).items()
+                                      if name.lower() == RATE_LIMIT_RESET_HEADER), 0))
+        except (TypeError, ValueError):
+            reset_after = 0.0
+        bucket.on_throttled(reset_after)
+        logger.warning("lark rate limited", app_id=app_id, family=family, rate=round(bucket.rate, 2),
+                       reset_after=reset_after)
+
+    def _active_bucket(self, app_id: Optional[str], family: str) -> Optional[TokenBucket]:
+        # 未开启固定速率限流时，只有收到过频控响应的租户、接口族才有令牌桶
+        if self.enabled:
+            return self.bucket(app_id, family)
+        return self._buckets.get((app_id or "", family))
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            buckets = dict(self._buckets)
+        return {f"{app_id}:{family}": bucket.stats() for (app_id, family), bucket in buckets.items()}
+
+
+# 进程级共享的限流器
+_rate_limiter = RateLimiter()
+
+
+def get_rate_limiter() -> RateLimiter:
+    return _rate_limiter
+
+
+def get_rate_limiter_stats() -> Dict[str, Dict[str, float]]:
+    """每个租户、接口族的当前速率、排队深度、等待时间和被频控次数"""
+    return _rate_limiter.stats()
@@ -0,0 +1,115 @@
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+from lark_mcp.common.lazy_import import lazy_import
+from lark_mcp.common.log import logger
+
+lark = lazy_import("lark_oapi")
+
+# 工具返回结果的格式，可通过环境变量覆盖：compact 为无缩进、去掉空字段的紧凑JSON，pretty 为缩进4格的JSON
+RESPONSE_FORMAT = os.getenv("LARK_MCP_RESPONSE_FORMAT", "compact")
+
+_COMPACT = RESPONSE_FORMAT != "pretty"
+
+
+def field_tree(fields: Optional[List[str]]) -> Optional[Dict[str, dict]]:
+    """
+    解析字段选择器为字段树，如 ["summary", "attendees[*].display_name"] -> {"summary": {}, "attendees": {"display_name": {}}}
+
+    选择器为点分隔的字段路径，可以带 $. 前缀；列表用 [*] 或 [] 标记，也可以省略，列表中的每个元素分别选择。
+    fields为空时返回None，表示不做选择。
+    """
+    if not fields:
+        return None
+    tree: Dict[str, dict] = {}
+    for selector in fields:
+        path = selector.strip().replace("[*]", "").replace("[]", "")
+        if path.startswith("$"):
+            path = path[1:]
+        node = tree
+        for part in path.strip(".").split("."):
+            if part.strip():
+                node = node.setdefault(part.strip(), {})
+    return tree or None
+
+
+def to_plain(obj: Any, tree: Optional[Dict[str, dict]] = None) -> Any:
+    """
+    把SDK返回的对象转换为dict/list，去掉值为None的字段；compact格式下同时去掉空字符串、空列表和空对象
+
+    直接遍历对象属性，不像 lark.JSON.marshal 那样深拷贝后再序列化、反序列化；
+    指定字段树时只转换选中的字段，未选中的部分不会被遍历
+    """
+    if obj is None or isinstance(obj, (str, bool, int, float)):
+        return obj
+    if isinstance(obj, (list, tuple, set)):
+        return [to_plain(item, tree) for item in obj]
+    if isinstance(obj, bytes):
+        return obj.decode("utf-8", errors="replace")
+    if isinstance(obj, dict):
+        items = obj.items() if not tree else ((key, obj.get(key)) for key in tree)
+    elif hasattr(obj, "__dict__"):
+        items = vars(obj).items() if not tree else ((key, getattr(obj, key, None)) for key in tree)
+    else:
+        return obj
+
+    plain = {}
+    for key, value in items:
+        value = to_plain(value, tree.get(key) if tree else None)
+        if value is None or (_COMPACT and isinstance(value, (str, list, dict)) and not value):
+            continue
+        plain[key] = value
+    return plain
+
+
+def project(data: Any, fields: Optional[List[str]]) -> Any:
+    """只保留fields选中的字段（选择器格式见 field_tree）；fields为空时返回原数据，数据中不存在的字段忽略"""
+    tree = field_tree(fields)
+    return to_plain(data, tree) if tree else data
+
+
+def nested_fields(prefix: str, fields: Optional[List[str]]) -> Optional[List[str]]:
+    """把相对于某个子对象的字段选择器转换为相对于返回数据的选择器，如 summary -> event.summary"""
+    return [f"{prefix}.{field.strip().lstrip('$').lstrip('.')}" for field in fields] if fields else None
+
+
+def next_page_token(data: Any, token_field: str = "next_page_token") -> Optional[str]:
+    """
+    分页接口下一页的page_token，没有下一页时返回None
+
+    has_more为true但没有返回page_token时同样视为最后一页：不带page_token的请求会从第一页重新开始，重复取回已有的数据
+    """
+    if data is None or not getattr(data, "has_more", False):
+        return None
+    return getattr(data, token_field, None) or None
+
+
+def dumps(data: Any) -> str:
+    """按配置的格式序列化工具返回结果"""
+    if _COMPACT:
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    return json.dumps(data, indent=4, ensure_ascii=False)
+
+
+def format_data(data: Any, fields: Optional[List[str]] = None) -> str:
+    """SDK对象或dict -> 工具返回的JSON字符串；先按fields选择字段再转换，只序列化一次"""
+    return dumps(to_plain(data, field_tree(fields)))
+
+
+def failure_message(api_name: str, response: "lark.BaseResponse") -> str:
+    """飞书接口调用失败时的错误信息"""
+    content = response.raw.content.decode("utf-8", errors="replace") if response.raw is not None else ""
+    return f"{api_name} failed, code: {response.code}, msg: {response.msg}, log_id: {response.get_log_id()}, resp: {content}"
+
+
+def handle_response(api_name: str, response: "lark.BaseResponse", fields: Optional[List[str]] = None) -> str:
+    """处理飞书接口返回：失败返回错误信息，成功返回序列化后的data（可只保留fields中的字段）"""
+    if not response.success():
+        fail_message = failure_message(api_name, response)
+        logger.error(fail_message)
+        return fail_message
+
+    data = format_data(response.data, fields)
+    logger.payload(api_name, data)
+    return data
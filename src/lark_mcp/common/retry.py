@@ -0,0 +1,207 @@
+import asyncio
+import json
+import os
+import random
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+import httpx
+import requests
+from urllib3.exceptions import NewConnectionError
+from lark_oapi.core.enum import HttpMethod
+from lark_oapi.core.model import BaseRequest, RawResponse
+
+from lark_mcp.common.rate_limiter import RATE_LIMITED_CODES, RATE_LIMIT_RESET_HEADER
+from lark_mcp.common.log import logger
+
+# 重试配置，可通过环境变量覆盖
+RETRY_MAX_ATTEMPTS = int(os.getenv("LARK_MCP_RETRY_MAX_ATTEMPTS", "3"))
+RETRY_DEADLINE = float(os.getenv("LARK_MCP_RETRY_DEADLINE", "10"))
+RETRY_BASE_DELAY = float(os.getenv("LARK_MCP_RETRY_BASE_DELAY", "0.2"))
+RETRY_MAX_DELAY = float(os.getenv("LARK_MCP_RETRY_MAX_DELAY", "2"))
+# 额外需要重试的飞书错误码，逗号分隔
+RETRY_EXTRA_CODES = {int(code) for code in os.getenv("LARK_MCP_RETRY_CODES", "").split(",") if code.strip()}
+
+# 可重试的飞书错误码：频控类错误请求未被处理，重试一定安全
+RETRYABLE_CODES = RATE_LIMITED_CODES | RETRY_EXTRA_CODES
+
+# 网络错误：请求可能已到达飞书，只有幂等请求才能重试
+NETWORK_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout, httpx.TransportError)
+# 连接阶段的错误：请求一定没有发出，任何请求都可以重试
+CONNECT_ERRORS = (requests.exceptions.ConnectTimeout, httpx.ConnectError, httpx.ConnectTimeout)
+
+# 使用POST方法但只读的接口
+READ_ONLY_POST_SUFFIXES = ("/batch_get_id",)
+
+# 服务端按这些查询参数去重的创建接口，重复发送不会重复创建
+IDEMPOTENCY_QUERIES = ("idempotency_key", "client_token")
+
+
+def is_idempotent(req: BaseRequest) -> bool:
+    """请求重复发送是否安全：非POST请求、带幂等键的创建请求、只读的POST接口"""
+    if req.http_method != HttpMethod.POST:
+        return True
+    if req.uri.endswith(READ_ONLY_POST_SUFFIXES):
+        return True
+    if any(name in IDEMPOTENCY_QUERIES for name, _ in req.queries):
+        return True
+    # 发送消息等接口通过请求体中的uuid去重
+    return getattr(req.body, "uuid", None) is not None
+
+
+def is_connect_error(err: Exception) -> bool:
+    if isinstance(err, CONNECT_ERRORS):
+        return True
+    # requests 把建立连接失败（如连接被拒绝）包装为 ConnectionError(MaxRetryError(reason=NewConnectionError))
+    if isinstance(err, requests.exceptions.ConnectionError) and err.args:
+        return isinstance(getattr(err.args[0], "reason", None), NewConnectionError)
+    return False
+
+
+def _response_code(resp: RawResponse) -> Optional[int]:
+    if not resp.content:
+        return None
+    try:
+        return json.loads(resp.content).get("code")
+    except (ValueError, AttributeError):
+        return None
+
+
+def _reset_after(resp: RawResponse) -> float:
+    for name, value in (resp.headers or {}).items():
+        if name.lower() == RATE_LIMIT_RESET_HEADER:
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                return 0.0
+    return 0.0
+
+
+class RetryPolicy(object):
+    """
+    飞书请求的重试策略
+
+    区分可重试与不可重试的失败，按带随机抖动的指数退避重试，
+    所有重试都在截止时间内完成。重试时原样重发同一个请求对象，
+    请求中的 idempotency_key / uuid 在各次尝试间保持不变，不会产生重复的日程或消息。
+    """
+
+    def __init__(self, max_attempts: int = RETRY_MAX_ATTEMPTS, deadline: float = RETRY_DEADLINE,
+                 base_delay: float = RETRY_BASE_DELAY, max_delay: float = RETRY_MAX_DELAY):
+        self.max_attempts = max_attempts
+        self.deadline = deadline
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._retries = 0
+        self._recovered = 0
+        self._exhausted = 0
+
+    def retryable_response(self, req: BaseRequest, resp: RawResponse) -> bool:
+        if resp.status_code == 429:
+            return True
+        if resp.status_code < 400:
+            return False
+        if _response_code(resp) in RETRYABLE_CODES:
+            return True
+        # 服务端错误时请求可能已经执行，只重试幂等请求
+        return resp.status_code >= 500 and is_idempotent(req)
+
+    def retryable_error(self, req: BaseRequest, err: Exception) -> bool:
+        if is_connect_error(err):
+            return True
+        return isinstance(err, NETWORK_ERRORS) and is_idempotent(req)
+
+    def next_delay(self, attempt: int, started: float, resp: Optional[RawResponse] = None) -> Optional[float]:
+        """第attempt次尝试失败后的等待秒数；次数用尽或超过截止时间时返回None"""
+        if attempt >= self.max_attempts:
+            return None
+        # full jitter：在 [0, min(max_delay, base_delay * 2^attempt)] 内随机等待，避免多个请求同时重试
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if resp is not None:
+            delay = max(delay, _reset_after(resp))
+        if time.monotonic() - started + delay > self.deadline:
+            return None
+        return delay
+
+    def execute(self, req: BaseRequest, send: Callable[[], RawResponse]) -> RawResponse:
+        started = time.monotonic()
+        attempt = 1
+        while True:
+            try:
+                resp = send()
+            except Exception as err:
+                if not self.retryable_error(req, err):
+                    raise
+                delay = self._on_failure(req, attempt, started, error=err)
+                if delay is None:
+                    raise
+            else:
+                if not self.retryable_response(req, resp):
+                    self._on_done(attempt, resp)
+                    return resp
+                delay = self._on_failure(req, attempt, started, resp=resp)
+                if delay is None:
+                    return resp
+            time.sleep(delay)
+            attempt += 1
+
+    async def aexecute(self, req: BaseRequest, send: Callable[[], Awaitable[RawResponse]]) -> RawResponse:
+        started = time.monotonic()
+        attempt = 1
+        while True:
+            try:
+                resp = await send()
+            except Exception as err:
+                if not self.retryable_error(req, err):
+                    raise
+                delay = self._on_failure(req, attempt, started, error=err)
+                if delay is None:
+                    raise
+            else:
+                if not self.retryable_response(req, resp):
+                    self._on_done(attempt, resp)
+                    return resp
+                delay = self._on_failure(req, attempt, started, resp=resp)
+                if delay is None:
+                    return resp
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "retries": self._retries,
+            "recovered": self._recovered,
+            "exhausted": self._exhausted,
+        }
+
+    def _on_failure(self, req: BaseRequest, attempt: int, started: float,
+                    resp: Optional[RawResponse] = None, error: Optional[Exception] = None) -> Optional[float]:
+        delay = self.next_delay(attempt, started, resp)
+        reason = error if error is not None else f"status: {resp.status_code}, code: {_response_code(resp)}"
+        if delay is None:
+            self._exhausted += 1
+            logger.error("lark request failed", method=req.http_method.name, uri=req.uri, attempts=attempt,
+                         reason=reason)
+            return None
+        self._retries += 1
+        logger.warning("lark request retrying", method=req.http_method.name, uri=req.uri, attempt=attempt,
+                       reason=reason, delay=round(delay, 2))
+        return delay
+
+    def _on_done(self, attempt: int, resp: RawResponse) -> None:
+        if attempt > 1 and resp.status_code < 400:
+            self._recovered += 1
+
+
+# 进程级共享的重试策略
+_retry_policy = RetryPolicy()
+
+
+def get_retry_policy() -> RetryPolicy:
+    return _retry_policy
+
+
+def get_retry_stats() -> Dict[str, int]:
+    """重试次数、重试后成功和重试用尽的请求数"""
+    return _retry_policy.stats()
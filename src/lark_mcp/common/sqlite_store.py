@@ -0,0 +1,60 @@
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# 单条 SQL 中 IN 子句的参数个数上限
+_QUERY_CHUNK_SIZE = 500
+
+
+class SQLiteStore(object):
+    """带过期时间的 SQLite 键值存储，供内存缓存在进程重启后复用；过期时间为Unix时间戳"""
+
+    def __init__(self, path: str, table: str):
+        self._table = table
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(f"CREATE TABLE IF NOT EXISTS {table} "
+                               f"(key TEXT PRIMARY KEY, value BLOB NOT NULL, expire_at REAL NOT NULL)")
+
+    def get(self, key: str) -> Optional[Tuple[bytes, float]]:
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Tuple[bytes, float]]:
+        """批量读取未过期的条目，返回 key -> (value, 过期时间)"""
+        keys = list(keys)
+        now = time.time()
+        rows: Dict[str, Tuple[bytes, float]] = {}
+        with self._lock:
+            for start in range(0, len(keys), _QUERY_CHUNK_SIZE):
+                chunk = keys[start:start + _QUERY_CHUNK_SIZE]
+                placeholders = ",".join("?" * len(chunk))
+                for key, value, expire_at in self._conn.execute(
+                        f"SELECT key, value, expire_at FROM {self._table} WHERE key IN ({placeholders})", chunk):
+                    if expire_at >= now:
+                        rows[key] = (value, expire_at)
+        return rows
+
+    def set(self, key: str, value: bytes, expire_at: float) -> None:
+        self.set_many([(key, value, expire_at)])
+
+    def set_many(self, items: List[Tuple[str, bytes, float]]) -> None:
+        if not items:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(f"INSERT OR REPLACE INTO {self._table} (key, value, expire_at) VALUES (?, ?, ?)",
+                                   items)
+
+    def delete(self, key: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {self._table} WHERE key = ?", (key,))
+
+    def purge_expired(self) -> int:
+        with self._lock, self._conn:
+            return self._conn.execute(f"DELETE FROM {self._table} WHERE expire_at < ?", (time.time(),)).rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
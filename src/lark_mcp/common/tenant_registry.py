@@ -0,0 +1,233 @@
+import contextvars
+import functools
+import inspect
+import json
+import os
+import sqlite3
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+from mcp.server.fastmcp import Context
+from lark_mcp.common.ttl_cache import TTLCache, MISSING
+from lark_mcp.common.tracing import current_span
+from lark_mcp.common.log import bind_log_context, reset_log_context
+
+# 租户配置，可通过环境变量覆盖；LARK_MCP_TENANT_STORE 为空时不启用租户注册表，工具仍通过参数传入 app_id/app_secret
+TENANT_STORE = os.getenv("LARK_MCP_TENANT_STORE", "")
+TENANT_HEADER = os.getenv("LARK_MCP_TENANT_HEADER", "X-Tenant-Id")
+TENANT_ID = os.getenv("LARK_MCP_TENANT_ID", "")
+TENANT_RELOAD_INTERVAL = float(os.getenv("LARK_MCP_TENANT_RELOAD_INTERVAL", "5"))
+TENANT_CACHE_SIZE = int(os.getenv("LARK_MCP_TENANT_CACHE_SIZE", "10000"))
+TENANT_CACHE_TTL = int(os.getenv("LARK_MCP_TENANT_CACHE_TTL", "3600"))
+
+# 由注册表注入、不再出现在工具参数中的凭证参数
+CREDENTIAL_PARAMS = ("app_id", "app_secret")
+
+# 当前请求（或后台任务）所属的租户
+_current_tenant: contextvars.ContextVar[Optional["Tenant"]] = contextvars.ContextVar("lark_mcp_tenant", default=None)
+
+
+class TenantNotResolved(Exception):
+    pass
+
+
+class Tenant(NamedTuple):
+    tenant_id: str
+    app_id: str
+    app_secret: str
+
+
+class SQLiteTenantSource(object):
+    """SQLite中的租户表 tenants(tenant_id, app_id, app_secret)，由外部写入，服务只读"""
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS tenants "
+                               "(tenant_id TEXT PRIMARY KEY, app_id TEXT NOT NULL, app_secret TEXT NOT NULL)")
+
+    def get(self, tenant_id: str) -> Optional[Tenant]:
+        with self._lock:
+            row = self._conn.execute("SELECT tenant_id, app_id, app_secret FROM tenants WHERE tenant_id = ?",
+                                     (tenant_id,)).fetchone()
+        return Tenant(*row) if row is not None else None
+
+    def version(self) -> int:
+        # 其他连接提交修改后 data_version 会变化
+        with self._lock:
+            return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+
+class FileTenantSource(object):
+    """JSON文件中的租户配置：{"tenant_id": {"app_id": "...", "app_secret": "..."}}，文件修改后重新加载"""
+
+    def __init__(self, path: str):
+        self._path = path
+        self._tenants: Dict[str, Tenant] = {}
+        self._loaded_version: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def get(self, tenant_id: str) -> Optional[Tenant]:
+        with self._lock:
+            version = self.version()
+            if version != self._loaded_version:
+                with open(self._path, encoding="utf-8") as file:
+                    config = json.load(file)
+                self._tenants = {key: Tenant(key, value["app_id"], value["app_secret"])
+                                 for key, value in config.items()}
+                self._loaded_version = version
+            return self._tenants.get(tenant_id)
+
+    def version(self) -> int:
+        return os.stat(self._path).st_mtime_ns
+
+
+class TenantRegistry(object):
+    """
+    按租户ID查询飞书应用凭证
+
+    查询结果缓存在内存中（不存在的租户同样缓存），每隔 reload_interval 秒检查一次存储是否有修改，
+    有修改时清空缓存，之后的查询重新读取存储，新增租户、更换密钥无需重启服务。
+    """
+
+    def __init__(self, path: str = TENANT_STORE, reload_interval: float = TENANT_RELOAD_INTERVAL,
+                 cache_size: int = TENANT_CACHE_SIZE, cache_ttl: int = TENANT_CACHE_TTL):
+        self._source = FileTenantSource(path) if path.endswith(".json") else SQLiteTenantSource(path)
+        self._reload_interval = reload_interval
+        self._cache = TTLCache(cache_size, cache_ttl)
+        self._version = self._source.version()
+        self._checked_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._reloads = 0
+
+    def get(self, tenant_id: str) -> Optional[Tenant]:
+        self._check_reload()
+        tenant = self._cache.get(tenant_id)
+        if tenant is MISSING:
+            tenant = self._source.get(tenant_id)
+            self._cache.set(tenant_id, tenant, None if tenant is not None else self._reload_interval)
+        return tenant
+
+    def reload(self) -> None:
+        self._cache.clear()
+        self._reloads += 1
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self._cache.stats()
+        stats["reloads"] = self._reloads
+        return stats
+
+    def _check_reload(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if now - self._checked_at < self._reload_interval:
+                return
+            self._checked_at = now
+            version = self._source.version()
+            if version == self._version:
+                return
+            self._version = version
+        self.reload()
+
+
+# 进程级共享的租户注册表，未配置 LARK_MCP_TENANT_STORE 时为None
+_tenant_registry = TenantRegistry() if TENANT_STORE else None
+
+# MCP会话 -> 租户ID，每个会话只解析一次租户
+_session_tenants: "weakref.WeakKeyDictionary[Any, str]" = weakref.WeakKeyDictionary()
+
+
+def get_tenant_registry() -> Optional[TenantRegistry]:
+    return _tenant_registry
+
+
+def get_tenant_registry_stats() -> Dict[str, Any]:
+    """租户注册表的缓存命中、淘汰和重新加载计数；未启用时为空"""
+    return _tenant_registry.stats() if _tenant_registry is not None else {}
+
+
+def current_tenant() -> Optional[Tenant]:
+    return _current_tenant.get()
+
+
+def current_tenant_id() -> Optional[str]:
+    tenant = _current_tenant.get()
+    return tenant.tenant_id if tenant is not None else None
+
+
+def _request_tenant_id(ctx: Context) -> Optional[str]:
+    """从请求头中读取租户ID；stdio等没有请求头的传输方式使用 LARK_MCP_TENANT_ID"""
+    request = ctx.request_context.request
+    headers = getattr(request, "headers", None)
+    return (headers.get(TENANT_HEADER) if headers is not None else None) or TENANT_ID or None
+
+
+def resolve_tenant(ctx: Optional[Context]) -> Tenant:
+    """解析调用方所属的租户：MCP请求按会话解析一次，后台任务沿用提交任务时的租户"""
+    if ctx is None:
+        tenant = _current_tenant.get()
+        if tenant is None:
+            raise TenantNotResolved("tenant is not resolved")
+        return tenant
+
+    session = ctx.request_context.session
+    bound_tenant_id = _session_tenants.get(session)
+    tenant_id = _request_tenant_id(ctx) or bound_tenant_id
+    if tenant_id is None:
+        raise TenantNotResolved(f"missing tenant, set the {TENANT_HEADER} header")
+    if bound_tenant_id is not None and tenant_id != bound_tenant_id:
+        raise TenantNotResolved(f"session is bound to another tenant: {tenant_id}")
+
+    tenant = _tenant_registry.get(tenant_id)
+    if tenant is None:
+        raise TenantNotResolved(f"unknown tenant: {tenant_id}")
+    # 会话在第一次成功解析后绑定租户，之后的请求不能切换到其他租户
+    _session_tenants.setdefault(session, tenant_id)
+    return tenant
+
+
+def with_tenant(tool: Callable[..., Any]):
+    """
+    包装工具，调用时按租户注入凭证
+
+    工具参数中去掉 app_id/app_secret，由解析出的租户凭证填入；工具执行期间 current_tenant() 返回该租户。
+    FastMCP 注入的 Context 用于读取请求头和会话，工具本身声明了 Context 参数时照常传入。
+    """
+    signature = inspect.signature(tool)
+    ctx_param = next((name for name, param in signature.parameters.items()
+                      if inspect.isclass(param.annotation) and issubclass(param.annotation, Context)), None)
+    credentials = all(name in signature.parameters for name in CREDENTIAL_PARAMS)
+    parameters = [param for name, param in signature.parameters.items() if name not in CREDENTIAL_PARAMS]
+    if ctx_param is None:
+        parameters.append(inspect.Parameter("tenant_ctx", inspect.Parameter.KEYWORD_ONLY, default=None,
+                                            annotation=Context))
+
+    @functools.wraps(tool)
+    async def wrapper(**kwargs):
+        ctx = kwargs.get(ctx_param) if ctx_param is not None else kwargs.pop("tenant_ctx", None)
+        tenant = resolve_tenant(ctx)
+        # 链路追踪包装在最外层，根span创建时还没有解析出租户，在这里补上租户和 app_id
+        span = current_span()
+        span.set_attribute("lark.tenant_id", tenant.tenant_id)
+        span.set_attribute("lark.app_id", tenant.app_id)
+        if credentials:
+            kwargs.update(app_id=tenant.app_id, app_secret=tenant.app_secret)
+        token, log_token = _current_tenant.set(tenant), bind_log_context(tenant_id=tenant.tenant_id)
+        try:
+            result = tool(**kwargs)
+            return await result if inspect.isawaitable(result) else result
+        finally:
+            reset_log_context(log_token)
+            _current_tenant.reset(token)
+
+    # FastMCP 按签名生成参数schema，按类型注解查找 Context 参数，两者都需要与新的参数列表一致
+    wrapper.__signature__ = signature.replace(parameters=parameters)
+    wrapper.__annotations__ = {name: annotation for name, annotation in tool.__annotations__.items()
+                               if name not in CREDENTIAL_PARAMS}
+    if ctx_param is None:
+        wrapper.__annotations__["tenant_ctx"] = Context
+    return wrapper
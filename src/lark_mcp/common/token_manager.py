@@ -0,0 +1,236 @@
+import asyncio
+import hmac
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import lark_oapi as lark
+from lark_oapi.core.cache import ICache
+from lark_oapi.core.const import UTF_8
+from lark_oapi.core.exception import ObtainAccessTokenException
+from lark_oapi.core.http import Transport
+from lark_oapi.core.model import Config
+from lark_oapi.core.token import AccessTokenResponse, CreateSelfTenantTokenRequest, CreateTokenRequestBody
+
+from lark_mcp.common.tracing import start_span
+from lark_mcp.common.log import logger
+
+# token刷新配置，可通过环境变量覆盖
+TOKEN_REFRESH_AHEAD = int(os.getenv("LARK_MCP_TOKEN_REFRESH_AHEAD", "600"))
+TOKEN_REFRESH_INTERVAL = int(os.getenv("LARK_MCP_TOKEN_REFRESH_INTERVAL", "30"))
+TOKEN_IDLE_TIMEOUT = int(os.getenv("LARK_MCP_TOKEN_IDLE_TIMEOUT", "3600"))
+# 距离真正过期不足该秒数的token不再使用
+TOKEN_EXPIRE_BUFFER = 60
+
+TENANT_TOKEN_KEY_PREFIX = "self_tenant_token:"
+
+# 飞书拒绝 tenant_access_token 的错误码：token无效、token已过期
+INVALID_TOKEN_CODES = {99991661, 99991663}
+
+
+class TenantTokenManager(ICache):
+    """
+    共享的 tenant_access_token 缓存
+
+    作为 lark.Client 的缓存插入SDK：SDK读取 self_tenant_token:{app_id} 未命中时，
+    由这里按app_id合并并发请求（single-flight）只发起一次鉴权请求；
+    后台线程在token过期前主动刷新，避免请求路径上等待鉴权。
+
+    SDK读取token时只带app_id，因此每个app_id只登记一份用它成功获取过token的凭证，
+    密钥错误的登记既拿不到已缓存的token，也不会替换已登记的凭证。
+    """
+
+    def __init__(self, refresh_ahead: int = TOKEN_REFRESH_AHEAD, refresh_interval: int = TOKEN_REFRESH_INTERVAL,
+                 idle_timeout: int = TOKEN_IDLE_TIMEOUT):
+        self._refresh_ahead = refresh_ahead
+        self._refresh_interval = refresh_interval
+        self._idle_timeout = idle_timeout
+        # key -> (value, 过期时间Unix时间戳)
+        self._entries: Dict[str, Tuple[str, float]] = {}
+        # app_id -> 获取token所需的配置，只保存成功获取过token的凭证
+        self._configs: Dict[str, Config] = {}
+        # app_id -> 最近一次使用时间
+        self._last_used: Dict[str, float] = {}
+        self._flight_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._refresher: Optional[threading.Thread] = None
+
+        self._hits = 0
+        self._misses = 0
+        self._refreshes = 0
+        self._refresh_failures = 0
+        self._refresh_latency_total = 0.0
+        self._refresh_latency_max = 0.0
+
+    def register(self, app_id: Optional[str], app_secret: Optional[str], domain: str) -> None:
+        """
+        登记租户凭证，之后该租户的token由本管理器获取和刷新
+
+        凭证与已登记的不同（第一次登记、更换了密钥或密钥错误）时，先用它获取一次token，成功才替换已登记的凭证；
+        获取失败或缺少凭证时抛出 ObtainAccessTokenException，已登记的凭证和token不受影响。
+        """
+        if not app_id or not app_secret:
+            # 没有密钥的client从SDK的缓存中按app_id读到的会是其他调用方登记的token
+            raise ObtainAccessTokenException("obtain self tenant access token failed", -1,
+                                             "app_id and app_secret are required")
+        if self.registered(app_id, app_secret):
+            return
+        conf = Config()
+        conf.app_id = app_id
+        conf.app_secret = app_secret
+        conf.domain = domain
+        with self._lock:
+            flight_lock = self._flight_locks.setdefault(app_id, threading.Lock())
+        with flight_lock:
+            if self.registered(app_id, app_secret):
+                return
+            token, expire_at = self._fetch(conf)
+            with self._lock:
+                self._configs[app_id] = conf
+                self._entries[TENANT_TOKEN_KEY_PREFIX + app_id] = (token, expire_at)
+        self._ensure_refresher()
+
+    def registered(self, app_id: Optional[str], app_secret: Optional[str]) -> bool:
+        """app_id 是否已用这个密钥登记"""
+        conf = self._configs.get(app_id)
+        return conf is not None and app_secret is not None and \
+            hmac.compare_digest(conf.app_secret.encode(), app_secret.encode())
+
+    def get(self, key: str) -> Optional[str]:
+        if key.startswith(TENANT_TOKEN_KEY_PREFIX):
+            app_id = key[len(TENANT_TOKEN_KEY_PREFIX):]
+            if app_id in self._configs:
+                return self.get_tenant_token(app_id)
+
+        entry = self._entries.get(key)
+        if entry is None or entry[1] < time.time():
+            return None
+        return entry[0]
+
+    def set(self, key: str, value: str, expire: int) -> None:
+        self._entries[key] = (value, expire)
+
+    def get_tenant_token(self, app_id: str) -> str:
+        self._last_used[app_id] = time.time()
+        token = self._valid_token(app_id)
+        if token is not None:
+            self._hits += 1
+            return token
+
+        # single-flight：同一租户同时只有一个请求去获取token，其余等待后直接读缓存
+        with self._flight_locks[app_id]:
+            token = self._valid_token(app_id)
+            if token is not None:
+                self._hits += 1
+                return token
+            self._misses += 1
+            return self._refresh(app_id)
+
+    async def aensure_tenant_token(self, app_id: str) -> None:
+        """异步场景下提前在工作线程中获取token，避免SDK在事件循环里同步请求鉴权接口"""
+        if app_id in self._configs and self._valid_token(app_id) is None:
+            await asyncio.to_thread(self.get_tenant_token, app_id)
+
+    def invalidate(self, app_id: str, token: Optional[str] = None) -> None:
+        """丢弃飞书不再接受的token；指定token时只在缓存的仍是它时丢弃，并发请求不会把刚换到的新token也丢弃"""
+        key = TENANT_TOKEN_KEY_PREFIX + app_id
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (token is None or entry[0] == token):
+                del self._entries[key]
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "tenants": len(self._configs),
+            "hits": self._hits,
+            "misses": self._misses,
+            "refreshes": self._refreshes,
+            "refresh_failures": self._refresh_failures,
+            "refresh_latency_avg": self._refresh_latency_total / self._refreshes if self._refreshes else 0.0,
+            "refresh_latency_max": self._refresh_latency_max,
+        }
+
+    def _valid_token(self, app_id: str) -> Optional[str]:
+        entry = self._entries.get(TENANT_TOKEN_KEY_PREFIX + app_id)
+        if entry is None or entry[1] - TOKEN_EXPIRE_BUFFER < time.time():
+            return None
+        return entry[0]
+
+    def _refresh(self, app_id: str) -> str:
+        token, expire_at = self._fetch(self._configs[app_id])
+        self._entries[TENANT_TOKEN_KEY_PREFIX + app_id] = (token, expire_at)
+        return token
+
+    def _fetch(self, conf: Config) -> Tuple[str, float]:
+        """用凭证请求一次鉴权接口，返回 (token, 过期时间Unix时间戳)"""
+        app_id = conf.app_id
+        req: CreateSelfTenantTokenRequest = CreateSelfTenantTokenRequest.builder() \
+            .request_body(CreateTokenRequestBody.builder()
+                          .app_id(conf.app_id)
+                          .app_secret(conf.app_secret)
+                          .build()) \
+            .build()
+
+        start = time.perf_counter()
+        try:
+            with start_span("lark.token.fetch", attributes={"lark.app_id": app_id}):
+                raw = Transport.execute(conf, req)
+                resp = lark.JSON.unmarshal(str(raw.content, UTF_8), AccessTokenResponse)
+        except Exception:
+            self._refresh_failures += 1
+            raise
+        finally:
+            latency = time.perf_counter() - start
+            self._refreshes += 1
+            self._refresh_latency_total += latency
+            self._refresh_latency_max = max(self._refresh_latency_max, latency)
+
+        if not resp.success():
+            self._refresh_failures += 1
+            logger.error("refresh tenant_access_token failed", app_id=app_id, code=resp.code, msg=resp.msg)
+            raise ObtainAccessTokenException("obtain self tenant access token failed", resp.code, resp.msg)
+
+        return resp.tenant_access_token, time.time() + resp.expire
+
+    def _ensure_refresher(self) -> None:
+        if self._refresher is not None:
+            return
+        with self._lock:
+            if self._refresher is None:
+                self._refresher = threading.Thread(target=self._refresh_loop, name="lark-token-refresher",
+                                                   daemon=True)
+                self._refresher.start()
+
+    def _refresh_loop(self) -> None:
+        while True:
+            time.sleep(self._refresh_interval)
+            now = time.time()
+            for app_id in list(self._configs):
+                # 长时间未使用的租户不再主动刷新，下次使用时再按需获取
+                if now - self._last_used.get(app_id, 0) > self._idle_timeout:
+                    continue
+                entry = self._entries.get(TENANT_TOKEN_KEY_PREFIX + app_id)
+                if entry is not None and entry[1] - now > self._refresh_ahead:
+                    continue
+                with self._flight_locks[app_id]:
+                    entry = self._entries.get(TENANT_TOKEN_KEY_PREFIX + app_id)
+                    if entry is not None and entry[1] - time.time() > self._refresh_ahead:
+                        continue
+                    try:
+                        self._refresh(app_id)
+                    except Exception as err:
+                        logger.error("background refresh tenant_access_token failed", app_id=app_id, err=err)
+
+
+# 进程级共享的token管理器
+_token_manager = TenantTokenManager()
+
+
+def get_token_manager() -> TenantTokenManager:
+    return _token_manager
+
+
+def get_token_manager_stats() -> Dict[str, float]:
+    """token缓存命中、刷新次数、刷新耗时和失败次数"""
+    return _token_manager.stats()
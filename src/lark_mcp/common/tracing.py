@@ -0,0 +1,349 @@
+import atexit
+import collections
+import contextvars
+import functools
+import importlib
+import inspect
+import json
+import os
+import queue
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+from lark_mcp.common.log import logger
+
+# 链路追踪配置，可通过环境变量覆盖；LARK_MCP_TRACE_EXPORTER 为空时不记录span
+# 可选值：memory（保存在内存中，通过 /traces 查看）、file:<路径>（OTLP JSON，每批一行）、
+# otlp 或 otlp:<地址>（OTLP/HTTP JSON，默认 http://localhost:4318/v1/traces）、<模块>:<属性>（自定义导出器）
+TRACE_EXPORTER = os.getenv("LARK_MCP_TRACE_EXPORTER", "")
+TRACE_SAMPLE_RATIO = float(os.getenv("LARK_MCP_TRACE_SAMPLE_RATIO", "1"))
+TRACE_SERVICE_NAME = os.getenv("LARK_MCP_TRACE_SERVICE_NAME", "lark-mcp")
+TRACE_MEMORY_SPANS = int(os.getenv("LARK_MCP_TRACE_MEMORY_SPANS", "10000"))
+TRACE_EXPORT_INTERVAL = float(os.getenv("LARK_MCP_TRACE_EXPORT_INTERVAL", "5"))
+TRACE_QUEUE_SIZE = int(os.getenv("LARK_MCP_TRACE_QUEUE_SIZE", "8192"))
+
+DEFAULT_OTLP_ENDPOINT = "http://localhost:4318/v1/traces"
+
+# OTLP 中的 span 类型和状态码
+SPAN_KIND_INTERNAL, SPAN_KIND_SERVER, SPAN_KIND_CLIENT = 1, 2, 3
+STATUS_UNSET, STATUS_OK, STATUS_ERROR = 0, 1, 2
+
+# 当前的span，后台任务、asyncio.to_thread 中沿用创建时的span
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("lark_mcp_span", default=None)
+
+
+class Span(object):
+    """一次操作的耗时和属性，字段与 OpenTelemetry 的 span 对应；作为上下文管理器使用，退出时结束并导出"""
+    __slots__ = ("trace_id", "span_id", "parent_span_id", "name", "kind", "attributes", "start_time", "end_time",
+                 "status", "status_message", "_tracer", "_token")
+
+    def __init__(self, tracer: "Tracer", name: str, kind: int, parent: Optional["Span"],
+                 attributes: Optional[Dict[str, Any]]):
+        self.trace_id = parent.trace_id if parent is not None else random.getrandbits(128)
+        self.span_id = random.getrandbits(64)
+        self.parent_span_id = parent.span_id if parent is not None else None
+        self.name = name
+        self.kind = kind
+        self.attributes = dict(attributes) if attributes else {}
+        self.start_time = time.time_ns()
+        self.end_time = None
+        self.status = STATUS_UNSET
+        self.status_message = ""
+        self._tracer = tracer
+        self._token = None
+
+    @property
+    def recording(self) -> bool:
+        return True
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if value is not None:
+            self.attributes[key] = value
+
+    def set_error(self, message: str) -> None:
+        self.status, self.status_message = STATUS_ERROR, message
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        _current_span.reset(self._token)
+        if exc is not None:
+            self.set_attribute("exception.type", exc_type.__name__)
+            self.set_error(str(exc))
+        self.end_time = time.time_ns()
+        self._tracer.on_end(self)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": f"{self.trace_id:032x}",
+            "spanId": f"{self.span_id:016x}",
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_time),
+            "endTimeUnixNano": str(self.end_time),
+            "attributes": [_otlp_attribute(key, value) for key, value in self.attributes.items()],
+            "status": {"code": self.status, "message": self.status_message} if self.status else {},
+        }
+        if self.parent_span_id is not None:
+            span["parentSpanId"] = f"{self.parent_span_id:016x}"
+        return span
+
+
+class _NonRecordingSpan(object):
+    """未启用追踪或未被采样时使用的span，不记录任何内容；未采样的span仍作为当前span，其子span同样不记录"""
+
+    recording = False
+
+    def __init__(self):
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_error(self, message: str) -> None:
+        pass
+
+    def __enter__(self) -> "_NonRecordingSpan":
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        _current_span.reset(self._token)
+
+
+class _DisabledSpan(_NonRecordingSpan):
+    """未启用追踪时共用的span，不改变当前span"""
+
+    def __enter__(self) -> "_DisabledSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+_DISABLED_SPAN = _DisabledSpan()
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def to_otlp_json(spans: List[Span], service_name: str = TRACE_SERVICE_NAME) -> Dict[str, Any]:
+    """按 OTLP/JSON（ExportTraceServiceRequest）格式组织span，可直接发给 OpenTelemetry Collector"""
+    return {"resourceSpans": [{
+        "resource": {"attributes": [_otlp_attribute("service.name", service_name)]},
+        "scopeSpans": [{"scope": {"name": "lark_mcp"}, "spans": [span.to_otlp() for span in spans]}],
+    }]}
+
+
+class SpanExporter(object):
+    """导出器接口；synchronous 为True时span结束后立即导出，否则由后台线程成批导出"""
+    synchronous = False
+
+    def export(self, spans: List[Span]) -> None:
+        raise NotImplementedError
+
+    def shutdown(self) -> None:
+        pass
+
+
+class InMemorySpanExporter(SpanExporter):
+    """在内存中保存最近的span，超出数量时丢弃最早的"""
+    synchronous = True
+
+    def __init__(self, max_spans: int = TRACE_MEMORY_SPANS):
+        self._spans = collections.deque(maxlen=max_spans)
+
+    def export(self, spans: List[Span]) -> None:
+        self._spans.extend(spans)
+
+    def get_finished_spans(self) -> List[Span]:
+        return list(self._spans)
+
+    def clear(self) -> None:
+        self._spans.clear()
+
+
+class FileSpanExporter(SpanExporter):
+    """追加写入本地文件，每批span一行 OTLP JSON，可由 Collector 的 otlpjsonfile receiver 读取"""
+
+    def __init__(self, path: str):
+        self._path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]) -> None:
+        line = json.dumps(to_otlp_json(spans), ensure_ascii=False, separators=(",", ":"))
+        with self._lock, open(self._path, "a", encoding="utf-8") as file:
+            file.write(line + "\n")
+
+
+class OTLPHttpSpanExporter(SpanExporter):
+    """以 OTLP/HTTP JSON 发送到 OpenTelemetry Collector 或兼容的后端"""
+
+    def __init__(self, endpoint: str = DEFAULT_OTLP_ENDPOINT, timeout: float = 10):
+        self._endpoint = endpoint
+        self._client = httpx.Client(timeout=timeout)
+
+    def export(self, spans: List[Span]) -> None:
+        self._client.post(self._endpoint, json=to_otlp_json(spans)).raise_for_status()
+
+    def shutdown(self) -> None:
+        self._client.close()
+
+
+def build_exporter(config: str) -> Optional[SpanExporter]:
+    """按 LARK_MCP_TRACE_EXPORTER 的格式创建导出器"""
+    if not config:
+        return None
+    if config == "memory":
+        return InMemorySpanExporter()
+    if config.startswith("file:"):
+        return FileSpanExporter(config[len("file:"):])
+    if config == "otlp":
+        return OTLPHttpSpanExporter()
+    if config.startswith("otlp:"):
+        return OTLPHttpSpanExporter(config[len("otlp:"):])
+    # 自定义导出器：模块中的 SpanExporter 子类或返回导出器的函数
+    module, _, attr = config.partition(":")
+    return getattr(importlib.import_module(module), attr)()
+
+
+class Tracer(object):
+    """
+    创建span并交给导出器
+
+    是否采样在根span上决定，子span沿用父span的结果。异步导出器由后台线程成批导出，
+    队列满时丢弃新的span，不阻塞工具调用。
+    """
+
+    def __init__(self, exporter: Optional[SpanExporter], sample_ratio: float = TRACE_SAMPLE_RATIO,
+                 export_interval: float = TRACE_EXPORT_INTERVAL, queue_size: int = TRACE_QUEUE_SIZE):
+        self.exporter = exporter
+        self._sample_ratio = sample_ratio
+        self._export_interval = export_interval
+        self._queue: "queue.Queue[Span]" = queue.Queue(queue_size)
+        self._export_lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self._finished = 0
+        self._dropped = 0
+        self._export_failures = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def start_span(self, name: str, kind: int = SPAN_KIND_INTERNAL, attributes: Optional[Dict[str, Any]] = None):
+        if self.exporter is None:
+            return _DISABLED_SPAN
+        parent = _current_span.get()
+        if parent is not None and not parent.recording:
+            return _NonRecordingSpan()
+        if parent is None and self._sample_ratio < 1 and random.random() >= self._sample_ratio:
+            return _NonRecordingSpan()
+        return Span(self, name, kind, parent, attributes)
+
+    def on_end(self, span: Span) -> None:
+        self._finished += 1
+        if self.exporter.synchronous:
+            self._export([span])
+            return
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self._dropped += 1
+
+    def force_flush(self) -> None:
+        """导出队列中全部的span"""
+        spans = []
+        while True:
+            try:
+                spans.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if spans:
+            self._export(spans)
+
+    def shutdown(self) -> None:
+        if self.exporter is not None:
+            self.force_flush()
+            self.exporter.shutdown()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "finished": self._finished,
+            "queued": self._queue.qsize(),
+            "dropped": self._dropped,
+            "export_failures": self._export_failures,
+        }
+
+    def _export(self, spans: List[Span]) -> None:
+        with self._export_lock:
+            try:
+                self.exporter.export(spans)
+            except Exception as err:
+                self._export_failures += 1
+                # 导出失败不影响工具调用，这批span直接丢弃
+                logger.error("export spans failed", spans=len(spans), err=err)
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None:
+            return
+        with self._export_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._export_loop, name="lark-trace-exporter", daemon=True)
+                self._worker.start()
+
+    def _export_loop(self) -> None:
+        while True:
+            time.sleep(self._export_interval)
+            self.force_flush()
+
+
+# 进程级共享的tracer，未配置 LARK_MCP_TRACE_EXPORTER 时不记录span
+_tracer = Tracer(build_exporter(TRACE_EXPORTER))
+atexit.register(_tracer.shutdown)
+
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+
+def get_tracer_stats() -> Dict[str, int]:
+    """结束、排队、丢弃的span数和导出失败次数"""
+    return _tracer.stats()
+
+
+def start_span(name: str, kind: int = SPAN_KIND_INTERNAL, attributes: Optional[Dict[str, Any]] = None):
+    """创建span，用法：with start_span("name", attributes={...}) as span: ..."""
+    return _tracer.start_span(name, kind, attributes)
+
+
+def current_span():
+    return _current_span.get() or _DISABLED_SPAN
+
+
+def trace_tool(name: str, tool: Callable[..., Any]):
+    """包装工具，每次调用创建一个根span，工具内的获取client、获取token和飞书请求都是它的子span；签名与原工具相同"""
+    attributes = {"mcp.tool.name": name}
+
+    @functools.wraps(tool)
+    async def wrapper(*args, **kwargs):
+        with start_span(f"tools/call {name}", SPAN_KIND_SERVER, attributes) as span:
+            # 启用租户注册表时参数中没有 app_id，由 with_tenant 解析出租户后设置
+            span.set_attribute("lark.app_id", kwargs.get("app_id"))
+            result = tool(*args, **kwargs)
+            return await result if inspect.isawaitable(result) else result
+
+    return wrapper
@@ -0,0 +1,233 @@
+import asyncio
+import json
+import os
+import time
+import weakref
+from typing import Optional
+
+import httpx
+from lark_oapi.core.enum import AccessTokenType
+from lark_oapi.core.http import Transport
+from lark_oapi.core.http.transport import _build_header, _build_url
+from lark_oapi.core.json import JSON
+from lark_oapi.core.model import BaseRequest, Config, RawResponse, RequestOption
+
+from lark_mcp.common.rate_limiter import api_family, get_rate_limiter
+from lark_mcp.common.retry import get_retry_policy
+from lark_mcp.common.metrics import METRICS_ENABLED, LARK_IN_FLIGHT, LARK_REQUEST_BYTES, observe_lark_request, \
+    lark_error_code
+from lark_mcp.common.tracing import SPAN_KIND_CLIENT, start_span
+from lark_mcp.common.token_manager import INVALID_TOKEN_CODES, get_token_manager
+
+# 共享HTTP连接池配置，可通过环境变量覆盖
+HTTP_MAX_CONNECTIONS = int(os.getenv("LARK_MCP_HTTP_MAX_CONNECTIONS", "200"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LARK_MCP_HTTP_MAX_KEEPALIVE_CONNECTIONS", "100"))
+
+# 每个事件循环一个 httpx.AsyncClient，随事件循环销毁
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+# SDK原始的同步请求实现
+_sdk_execute = Transport.execute
+
+# 飞书返回的请求ID，排查问题时提供给飞书
+LOG_ID_HEADER = "x-tt-logid"
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """获取当前事件循环共享的 httpx.AsyncClient"""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS,
+                                                       max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS))
+        _async_clients[loop] = client
+    return client
+
+
+async def aclose_async_http_client() -> None:
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+async def _shared_aexecute(conf: Config, req: BaseRequest, option: Optional[RequestOption] = None) -> RawResponse:
+    # 与SDK的 Transport.aexecute 保持一致，只是复用共享连接池而不是每次新建 AsyncClient
+    if option is None:
+        option = RequestOption()
+
+    url: str = _build_url(conf.domain, req.uri, req.paths)
+    _build_header(req, option)
+
+    json_, files, data = None, None, None
+    req_files = getattr(req, "files", None)
+    if req_files:
+        files = req_files
+        if req.body is not None:
+            data = json.loads(JSON.marshal(req.body))
+    elif req.body is not None:
+        json_ = json.loads(JSON.marshal(req.body))
+
+    response = await get_async_http_client().request(
+        str(req.http_method.name),
+        url,
+        headers=req.headers,
+        params=req.queries,
+        json=json_,
+        data=data,
+        files=files,
+        timeout=getattr(conf, "timeout", None),
+    )
+
+    if METRICS_ENABLED:
+        # 上传文件时请求体是流式的，按请求头中的长度记录
+        LARK_REQUEST_BYTES.observe((req.http_method.name, req.uri),
+                                   int(response.request.headers.get("content-length") or 0))
+
+    resp = RawResponse()
+    resp.status_code = response.status_code
+    resp.headers = dict(response.headers)
+    resp.content = response.content
+    return resp
+
+
+def _start_http_span(conf: Config, req: BaseRequest):
+    return start_span(f"{req.http_method.name} {req.uri}", SPAN_KIND_CLIENT, {
+        "http.request.method": req.http_method.name, "url.template": req.uri, "lark.app_id": conf.app_id})
+
+
+def _end_http_span(span, resp: RawResponse) -> None:
+    if not span.recording:
+        return
+    span.set_attribute("http.response.status_code", resp.status_code)
+    span.set_attribute("lark.log_id", next((value for name, value in (resp.headers or {}).items()
+                                            if name.lower() == LOG_ID_HEADER), None))
+    code = lark_error_code(resp.status_code, resp.content)
+    if code is not None:
+        span.set_attribute("lark.code", code)
+        span.set_error(f"lark code: {code}")
+
+
+def _send(conf: Config, req: BaseRequest, option: Optional[RequestOption]) -> RawResponse:
+    # 每次发送（包括重试）一个span
+    with _start_http_span(conf, req) as span:
+        resp = _sdk_execute(conf, req, option)
+        _end_http_span(span, resp)
+        return resp
+
+
+async def _asend(conf: Config, req: BaseRequest, option: Optional[RequestOption]) -> RawResponse:
+    with _start_http_span(conf, req) as span:
+        resp = await _shared_aexecute(conf, req, option)
+        _end_http_span(span, resp)
+        return resp
+
+
+def _limited_execute(conf: Config, req: BaseRequest, option: Optional[RequestOption], family: str) -> RawResponse:
+    rate_limiter = get_rate_limiter()
+    rate_limiter.acquire(conf.app_id, family)
+    resp = _send(conf, req, option)
+    rate_limiter.record(conf.app_id, family, resp)
+    return resp
+
+
+async def _limited_aexecute(conf: Config, req: BaseRequest, option: Optional[RequestOption],
+                            family: str) -> RawResponse:
+    rate_limiter = get_rate_limiter()
+    await rate_limiter.aacquire(conf.app_id, family)
+    resp = await _asend(conf, req, option)
+    rate_limiter.record(conf.app_id, family, resp)
+    return resp
+
+
+def _rejected_token(conf: Config, req: BaseRequest, option: Optional[RequestOption],
+                    resp: RawResponse) -> Optional[str]:
+    """飞书以token无效或过期拒绝了请求时，返回这次请求使用的、由token管理器缓存的 tenant_access_token"""
+    if option is None or not option.tenant_access_token or AccessTokenType.TENANT not in req.token_types:
+        return None
+    code = lark_error_code(resp.status_code, resp.content)
+    if code is None or not code.isdigit() or int(code) not in INVALID_TOKEN_CODES:
+        return None
+    return option.tenant_access_token if get_token_manager().registered(conf.app_id, conf.app_secret) else None
+
+
+def _execute_once(conf: Config, req: BaseRequest, option: Optional[RequestOption]) -> RawResponse:
+    family = api_family(req.uri)
+    if family is None:
+        return _send(conf, req, option)
+    # 每次重试都重新经过限流
+    return get_retry_policy().execute(req, lambda: _limited_execute(conf, req, option, family))
+
+
+async def _aexecute_once(conf: Config, req: BaseRequest, option: Optional[RequestOption]) -> RawResponse:
+    family = api_family(req.uri)
+    if family is None:
+        return await _asend(conf, req, option)
+    return await get_retry_policy().aexecute(req, lambda: _limited_aexecute(conf, req, option, family))
+
+
+def _governed_execute(conf: Config, req: BaseRequest, option: Optional[RequestOption] = None) -> RawResponse:
+    resp = _execute_once(conf, req, option)
+    token = _rejected_token(conf, req, option, resp)
+    if token is None:
+        return resp
+    # token在过期前失效（如应用密钥被重置）时丢弃缓存的token，换新token重发一次
+    tokens = get_token_manager()
+    tokens.invalidate(conf.app_id, token)
+    option.tenant_access_token = tokens.get_tenant_token(conf.app_id)
+    return _execute_once(conf, req, option)
+
+
+async def _governed_aexecute(conf: Config, req: BaseRequest,
+                             option: Optional[RequestOption] = None) -> RawResponse:
+    resp = await _aexecute_once(conf, req, option)
+    token = _rejected_token(conf, req, option, resp)
+    if token is None:
+        return resp
+    tokens = get_token_manager()
+    tokens.invalidate(conf.app_id, token)
+    option.tenant_access_token = await asyncio.to_thread(tokens.get_tenant_token, conf.app_id)
+    return await _aexecute_once(conf, req, option)
+
+
+def _observed_execute(conf: Config, req: BaseRequest, option: Optional[RequestOption] = None) -> RawResponse:
+    # 按接口记录耗时（包含限流等待和重试）、返回大小和错误码
+    resp, error, started = None, None, time.perf_counter()
+    LARK_IN_FLIGHT.inc((req.uri,))
+    try:
+        resp = _governed_execute(conf, req, option)
+        return resp
+    except Exception as err:
+        error = err
+        raise
+    finally:
+        LARK_IN_FLIGHT.dec((req.uri,))
+        observe_lark_request(req.http_method.name, req.uri, time.perf_counter() - started, resp, error)
+
+
+async def _observed_aexecute(conf: Config, req: BaseRequest,
+                             option: Optional[RequestOption] = None) -> RawResponse:
+    resp, error, started = None, None, time.perf_counter()
+    LARK_IN_FLIGHT.inc((req.uri,))
+    try:
+        resp = await _governed_aexecute(conf, req, option)
+        return resp
+    except Exception as err:
+        error = err
+        raise
+    finally:
+        LARK_IN_FLIGHT.dec((req.uri,))
+        observe_lark_request(req.http_method.name, req.uri, time.perf_counter() - started, resp, error)
+
+
+def install_transport() -> None:
+    """
+    接管SDK发出的所有飞书请求：
+    异步接口（acreate、aget等）走共享连接池，启用限流时同步和异步接口都按租户、接口族限流，
+    并对可重试的失败自动重试；启用指标时按接口记录耗时、大小和错误码
+    """
+    execute, aexecute = (_observed_execute, _observed_aexecute) if METRICS_ENABLED else \
+        (_governed_execute, _governed_aexecute)
+    if Transport.execute is not execute:
+        Transport.execute = staticmethod(execute)
+    if Transport.aexecute is not aexecute:
+        Transport.aexecute = staticmethod(aexecute)
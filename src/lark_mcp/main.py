@@ -1,30 +1,124 @@
 import argparse
+import contextlib
+import os
+import threading
+import uvicorn
 from starlette.applications import Starlette
-from starlette.responses import JSONResponse
+from starlette.responses import JSONResponse, PlainTextResponse
 from starlette.routing import Mount, Route
 from mcp.server.fastmcp import FastMCP
 
 from lark_mcp.mcp_server import register_mcp_server
+from lark_mcp.mcp_tool.calendar.primary_calendar import warm_up_primary_calendars
+from lark_mcp.common.lazy_import import lazy_import, load, aload
+from lark_mcp.common.metrics import render_metrics
+from lark_mcp.common.tracing import InMemorySpanExporter, get_tracer, to_otlp_json
+
+# 启动时预热的租户，格式：app_id:app_secret,app_id:app_secret
+WARMUP_TENANTS = os.getenv("LARK_MCP_WARMUP_TENANTS", "")
+# 启动后在后台导入飞书SDK，第一次调用工具时不再等待导入；默认第一次调用工具时才导入
+PRELOAD_SDK = os.getenv("LARK_MCP_PRELOAD_SDK", "false").lower() == "true"
+# streamable-http 方式的工作进程数，大于1时各进程共享监听端口，会话为无状态模式
+WORKERS = int(os.getenv("LARK_MCP_WORKERS", "1"))
+# streamable-http 无状态模式：每个请求独立处理，不依赖进程内的会话；多进程时默认开启
+STATELESS_HTTP = os.getenv("LARK_MCP_STATELESS_HTTP", str(WORKERS > 1)).lower() == "true"
 
 mcp = FastMCP("Lark MCP Server")
+# 多进程时同一客户端的请求会落到不同进程上，不能依赖进程内的会话状态
+mcp.settings.stateless_http = mcp.settings.stateless_http or STATELESS_HTTP
+
+# 后台任务保存在进程内，多进程时查询任务的请求不一定落到运行任务的进程上，不提供任务工具
+register_mcp_server(mcp, jobs=WORKERS == 1)
+
+
+def warm_up():
+    """在后台线程中预热配置的租户（client、token、主日历ID），不阻塞服务启动"""
+    tenants = [tuple(item.strip().split(":", 1)) for item in WARMUP_TENANTS.split(",") if ":" in item]
+    if tenants:
+        threading.Thread(target=warm_up_primary_calendars, args=(tenants,), name="lark-warm-up", daemon=True).start()
+    elif PRELOAD_SDK:
+        threading.Thread(target=load, args=(lazy_import("lark_oapi"),), name="lark-preload",
+                         daemon=True).start()
 
-register_mcp_server(mcp)
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    warm_up()
+    yield
+
+
+@contextlib.asynccontextmanager
+async def http_lifespan(app):
+    if WORKERS > 1:
+        # 导入SDK后才开始接受请求，共享端口上的连接只会分给已经预热好的进程
+        await aload(lazy_import("lark_oapi"))
+    warm_up()
+    async with mcp.session_manager.run():
+        yield
 
 
 def health_check(request):
     return JSONResponse({"status": "ok"})
 
 
+def metrics(request):
+    # 指标按进程统计，多进程时每次抓取到的是其中一个工作进程的指标
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+def traces(request):
+    # 只在使用内存导出器时可用，返回最近的span（OTLP JSON），可按 trace_id 过滤
+    exporter = get_tracer().exporter
+    if not isinstance(exporter, InMemorySpanExporter):
+        return JSONResponse({"error": "traces are not kept in memory, set LARK_MCP_TRACE_EXPORTER=memory"},
+                            status_code=404)
+    spans = exporter.get_finished_spans()
+    trace_id = request.query_params.get("trace_id")
+    if trace_id:
+        spans = [span for span in spans if f"{span.trace_id:032x}" == trace_id]
+    return JSONResponse(to_otlp_json(spans))
+
+
 app = Starlette(
     routes=[
         Route('/health', health_check, methods=["GET"]),
+        Route('/metrics', metrics, methods=["GET"]),
+        Route('/traces', traces, methods=["GET"]),
         Mount('/', app=mcp.sse_app()),
-    ]
+    ],
+    lifespan=lifespan,
+)
+
+# streamable-http 方式的应用，每个工作进程导入本模块后各自创建
+http_app = Starlette(
+    routes=[
+        Route('/health', health_check, methods=["GET"]),
+        Route('/metrics', metrics, methods=["GET"]),
+        Route('/traces', traces, methods=["GET"]),
+        Mount('/', app=mcp.streamable_http_app()),
+    ],
+    lifespan=http_lifespan,
 )
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Lark MCP Server")
     parser.add_argument("--transport", type=str, default="sse", choices=["sse", "stdio", "streamable-http"],
                         help="Transport type")
+    parser.add_argument("--workers", type=int, default=WORKERS,
+                        help="Number of worker processes, only for streamable-http")
+    parser.add_argument("--host", type=str, default=mcp.settings.host, help="Bind host for streamable-http")
+    parser.add_argument("--port", type=int, default=mcp.settings.port, help="Bind port for streamable-http")
     args = parser.parse_args()
-    mcp.run(transport=args.transport)
+    if args.transport != "streamable-http":
+        if args.workers > 1:
+            parser.error("--workers > 1 requires --transport streamable-http")
+        warm_up()
+        mcp.run(transport=args.transport)
+    elif args.workers > 1:
+        # 工作进程重新导入本模块，通过环境变量得知工作进程数
+        os.environ["LARK_MCP_WORKERS"] = str(args.workers)
+        uvicorn.run("lark_mcp.main:http_app", host=args.host, port=args.port,
+                    workers=args.workers, log_level=mcp.settings.log_level.lower())
+    else:
+        uvicorn.run(http_app, host=args.host, port=args.port,
+                    log_level=mcp.settings.log_level.lower())
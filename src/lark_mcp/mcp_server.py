@@ -1,46 +1,94 @@
-from lark_mcp.mcp_tool.user_info.batch_get_id_user import get_id_user_request
-from lark_mcp.mcp_tool.user_info.get_user_info import batch_get_user_info
-from lark_mcp.mcp_tool.document.create_document import create_document
-from lark_mcp.mcp_tool.document.get_document_data import get_document
-from lark_mcp.mcp_tool.folder.create_folder import create_folder
-from lark_mcp.mcp_tool.folder.list_folder_files import list_folder_files
-from lark_mcp.mcp_tool.message.create_message import create_message
-from lark_mcp.mcp_tool.calendar.create_calendar_event import create_calendar_event
-from lark_mcp.mcp_tool.calendar.append_event_attendees import append_calendar_event_attendee
-from lark_mcp.mcp_tool.calendar.get_calendar_info import get_calendar_event
-from lark_mcp.mcp_tool.calendar.update_calendar_event import update_calendar_event
-from lark_mcp.mcp_tool.calendar.delete_calendar_event import delete_calendar_event
-from lark_mcp.mcp_tool.chat_member.create_chat_member import create_chat_member
-from lark_mcp.mcp_tool.chat_member.delete_chat_member import delete_chat_member
-from lark_mcp.mcp_tool.chat_member.get_chat_member_info import get_chat_member_info
+from lark_mcp.mcp_tool.user_info.batch_get_id_user import get_id_user_request, aget_id_user_request
+from lark_mcp.mcp_tool.user_info.get_user_info import batch_get_user_info, abatch_get_user_info
+from lark_mcp.mcp_tool.document.create_document import create_document, acreate_document
+from lark_mcp.mcp_tool.document.create_markdown_document import create_markdown_document, \
+    acreate_markdown_document
+from lark_mcp.mcp_tool.document.get_document_data import get_document, aget_document
+from lark_mcp.mcp_tool.document.read_document import read_document, aread_document
+from lark_mcp.mcp_tool.folder.create_folder import create_folder, acreate_folder
+from lark_mcp.mcp_tool.folder.list_folder_files import list_folder_files, alist_folder_files
+from lark_mcp.mcp_tool.folder.walk_folder_tree import walk_folder_tree, awalk_folder_tree
+from lark_mcp.mcp_tool.message.create_message import create_message, acreate_message
+from lark_mcp.mcp_tool.message.broadcast_message import broadcast_message, abroadcast_message
+from lark_mcp.mcp_tool.calendar.create_calendar_event import create_calendar_event, acreate_calendar_event
+from lark_mcp.mcp_tool.calendar.append_event_attendees import append_calendar_event_attendee, \
+    aappend_calendar_event_attendee
+from lark_mcp.mcp_tool.calendar.get_calendar_info import get_calendar_event, aget_calendar_event
+from lark_mcp.mcp_tool.calendar.update_calendar_event import update_calendar_event, aupdate_calendar_event
+from lark_mcp.mcp_tool.calendar.delete_calendar_event import delete_calendar_event, adelete_calendar_event
+from lark_mcp.mcp_tool.calendar.batch_calendar_events import batch_create_calendar_events, \
+    abatch_create_calendar_events, batch_update_calendar_events, abatch_update_calendar_events, \
+    batch_delete_calendar_events, abatch_delete_calendar_events
+from lark_mcp.mcp_tool.chat_member.create_chat_member import create_chat_member, acreate_chat_member
+from lark_mcp.mcp_tool.chat_member.delete_chat_member import delete_chat_member, adelete_chat_member
+from lark_mcp.mcp_tool.chat_member.get_chat_member_info import get_chat_member_info, aget_chat_member_info
+from lark_mcp.mcp_tool.job.job_tools import submit_job, job_status, job_result, job_cancel
+from lark_mcp.common.jobs import get_job_manager
+from lark_mcp.common.tenant_registry import get_tenant_registry, with_tenant
+from lark_mcp.common.metrics import METRICS_ENABLED, instrument_tool
+from lark_mcp.common.tracing import get_tracer, trace_tool
 from mcp.server.fastmcp import FastMCP
 
 
-def register_mcp_server(mcp: FastMCP):
+def register_tool(mcp: FastMCP, tool, async_tool=None, job: bool = True):
+    """
+    注册MCP工具；提供异步版本时注册异步版本，工具名称和描述沿用同步工具。job为True时同时可以通过submit_job在后台运行
+
+    启用租户注册表时，工具的 app_id/app_secret 参数由调用方所属租户的凭证注入，不再出现在工具参数中；
+    启用指标时记录每个工具的调用耗时、返回大小和异常；启用链路追踪时每次调用创建一个span
+    """
+    fn = async_tool or tool
+    if get_tenant_registry() is not None:
+        fn = with_tenant(fn)
+    if METRICS_ENABLED:
+        fn = instrument_tool(tool.__name__, fn)
+    if get_tracer().enabled:
+        fn = trace_tool(tool.__name__, fn)
+    mcp.tool(name=tool.__name__, description=tool.__doc__)(fn)
+    if job:
+        get_job_manager().add_tool(fn, name=tool.__name__, description=tool.__doc__)
+
+
+def register_mcp_server(mcp: FastMCP, jobs: bool = True):
+    """注册全部工具；jobs为False时不注册后台任务工具，其他工具也不能通过submit_job运行"""
     # 日程管理
-    mcp.tool(description=create_calendar_event.__doc__)(create_calendar_event)
-    mcp.tool(description=append_calendar_event_attendee.__doc__)(append_calendar_event_attendee)
-    mcp.tool(description=get_calendar_event.__doc__)(get_calendar_event)
-    mcp.tool(description=update_calendar_event.__doc__)(update_calendar_event)
-    mcp.tool(description=delete_calendar_event.__doc__)(delete_calendar_event)
+    register_tool(mcp, create_calendar_event, acreate_calendar_event)
+    register_tool(mcp, append_calendar_event_attendee, aappend_calendar_event_attendee)
+    register_tool(mcp, get_calendar_event, aget_calendar_event)
+    register_tool(mcp, update_calendar_event, aupdate_calendar_event)
+    register_tool(mcp, delete_calendar_event, adelete_calendar_event)
+    register_tool(mcp, batch_create_calendar_events, abatch_create_calendar_events)
+    register_tool(mcp, batch_update_calendar_events, abatch_update_calendar_events)
+    register_tool(mcp, batch_delete_calendar_events, abatch_delete_calendar_events)
 
 
     # 用户管理
-    mcp.tool(description=get_id_user_request.__doc__)(get_id_user_request)
-    mcp.tool(description=batch_get_user_info.__doc__)(batch_get_user_info)
+    register_tool(mcp, get_id_user_request, aget_id_user_request)
+    register_tool(mcp, batch_get_user_info, abatch_get_user_info)
 
     # 文档管理
-    mcp.tool(description=create_document.__doc__)(create_document)
-    mcp.tool(description=get_document.__doc__)(get_document)
+    register_tool(mcp, create_document, acreate_document)
+    register_tool(mcp, create_markdown_document, acreate_markdown_document)
+    register_tool(mcp, get_document, aget_document)
+    register_tool(mcp, read_document, aread_document)
 
     # 文件夹管理
-    mcp.tool(description=create_folder.__doc__)(create_folder)
-    mcp.tool(description=list_folder_files.__doc__)(list_folder_files)
+    register_tool(mcp, create_folder, acreate_folder)
+    register_tool(mcp, list_folder_files, alist_folder_files)
+    register_tool(mcp, walk_folder_tree, awalk_folder_tree)
 
     # 消息管理
-    mcp.tool(description=create_message.__doc__)(create_message)
+    register_tool(mcp, create_message, acreate_message)
+    register_tool(mcp, broadcast_message, abroadcast_message)
+
+    # 后台任务
+    if jobs:
+        register_tool(mcp, submit_job, job=False)
+        register_tool(mcp, job_status, job=False)
+        register_tool(mcp, job_result, job=False)
+        register_tool(mcp, job_cancel, job=False)
 
     # 群聊管理 (Lark-MCP V1.0不上线)
-    # mcp.tool(description=create_chat_member.__doc__)(create_chat_member)
-    # mcp.tool(description=delete_chat_member.__doc__)(delete_chat_member)
-    # mcp.tool(description=get_chat_member_info.__doc__)(get_chat_member_info)
\ No newline at end of file
+    # register_tool(mcp, create_chat_member, acreate_chat_member)
+    # register_tool(mcp, delete_chat_member, adelete_chat_member)
+    # register_tool(mcp, get_chat_member_info, aget_chat_member_info)
@@ -1,8 +1,18 @@
-import json
-import lark_oapi as lark
-from lark_oapi.api.calendar.v4 import *
-from pydantic import Field
-from typing import Optional, List, Literal
+import os
+
+from typing import List, Tuple
+from lark_mcp.common.client_pool import get_lark_client, aget_lark_client
+from lark_mcp.common.response import failure_message, to_plain, dumps
+from lark_mcp.common.batch import gather_with_limit, map_with_limit
+from lark_mcp.common.async_tool import async_variant
+from lark_mcp.common.lazy_import import lazy_import
+from lark_mcp.common.log import logger
+
+lark = lazy_import("lark_oapi")
+calendar_v4 = lazy_import("lark_oapi.api.calendar.v4")
+
+# 单次添加参会人请求的人数上限，超出时拆分为多个请求
+ATTENDEE_CHUNK_SIZE = int(os.getenv("LARK_MCP_ATTENDEE_CHUNK_SIZE", "100"))
 
 
 # 针对MCP的工具
@@ -17,19 +27,11 @@ from typing import Optional, List, Literal
 # ):
 
 
-# 只针对MCP 的工具调用该函数，不给用户使用该函数
-def append_calendar_event_attendee(calendar_id: str, event_id: str, user_id_type: str,
-                                   attendees: List[str], app_id: str, app_secret: str, need_notification: bool):
-    """为日历事件添加参会者"""
-    client = lark.Client.builder() \
-        .app_id(app_id) \
-        .app_secret(app_secret) \
-        .log_level(lark.LogLevel.DEBUG) \
-        .build()
-
+def build_append_calendar_event_attendee_request(calendar_id: str, event_id: str, user_id_type: str,
+                                                 attendees: List[str], need_notification: bool):
     # 构造参会者列表请求体
     attendee_list = [
-        CalendarEventAttendee.builder()
+        calendar_v4.CalendarEventAttendee.builder()
         .type("user")
         .is_optional(True)  # 默认设为可选参会者
         .user_id(attendee)
@@ -38,25 +40,89 @@ def append_calendar_event_attendee(calendar_id: str, event_id: str, user_id_type
     ]
 
     # 构造请求对象
-    request: CreateCalendarEventAttendeeRequest = CreateCalendarEventAttendeeRequest.builder() \
+    request: calendar_v4.CreateCalendarEventAttendeeRequest = calendar_v4.CreateCalendarEventAttendeeRequest.builder() \
         .calendar_id(calendar_id) \
         .event_id(event_id) \
         .user_id_type(user_id_type) \
-        .request_body(CreateCalendarEventAttendeeRequestBody.builder()
+        .request_body(calendar_v4.CreateCalendarEventAttendeeRequestBody.builder()
                       .attendees(attendee_list)
                       .need_notification(need_notification)
                       .build()) \
         .build()
+    return request
+
+
+def split_attendees(attendees: List[str]) -> List[List[str]]:
+    return [attendees[i:i + ATTENDEE_CHUNK_SIZE] for i in range(0, len(attendees), ATTENDEE_CHUNK_SIZE)]
+
+
+def merge_attendee_results(chunks: List[List[str]], results: list) -> Tuple[list, list]:
+    """合并各分片的添加结果，返回(已添加的参会人, 失败分片的错误信息)"""
+    merged, errors = [], []
+    for index, (chunk, result) in enumerate(zip(chunks, results)):
+        if isinstance(result, BaseException):
+            error = str(result)
+        elif not result.success():
+            error = failure_message("client.calendar.v4.calendar_event_attendee.create", result)
+        else:
+            merged.extend(to_plain(result.data).get("attendees", []))
+            continue
+        logger.error(error)
+        errors.append({"chunk": index, "attendees": chunk, "error": error})
+    return merged, errors
 
-    # 发起请求
-    response: CreateCalendarEventAttendeeResponse = client.calendar.v4.calendar_event_attendee.create(request)
 
-    # 处理失败返回
-    if not response.success():
-        fail_message = f"client.calendar.v4.calendar_event_attendee.create failed, code: {response.code}, msg: {response.msg}, log_id: {response.get_log_id()}, resp: \n{json.dumps(json.loads(response.raw.content), indent=4, ensure_ascii=False)}"
-        lark.logger.error(fail_message)
-        raise ValueError(fail_message)
+def append_attendees_in_chunks(client: "lark.Client", calendar_id: str, event_id: str, user_id_type: str,
+                               attendees: List[str], need_notification: bool) -> Tuple[list, list]:
+    # 各分片互不依赖，在线程池中并发发起请求，同时进行的请求数不超过 LARK_MCP_BATCH_CONCURRENCY
+    chunks = split_attendees(attendees)
+    results = map_with_limit(lambda chunk: client.calendar.v4.calendar_event_attendee.create(
+        build_append_calendar_event_attendee_request(calendar_id, event_id, user_id_type, chunk,
+                                                     need_notification)), chunks)
+    return merge_attendee_results(chunks, results)
+
+
+async def aappend_attendees_in_chunks(client: "lark.Client", calendar_id: str, event_id: str, user_id_type: str,
+                                      attendees: List[str], need_notification: bool) -> Tuple[list, list]:
+    # 各分片互不依赖，并发发起请求，同时进行的请求数不超过 LARK_MCP_BATCH_CONCURRENCY；
+    # 也会在批量创建日程中调用，不单独上报后台任务进度
+    chunks = split_attendees(attendees)
+    results = await gather_with_limit((
+        client.calendar.v4.calendar_event_attendee.acreate(
+            build_append_calendar_event_attendee_request(calendar_id, event_id, user_id_type, chunk,
+                                                         need_notification))
+        for chunk in chunks
+    ), progress=False)
+    return merge_attendee_results(chunks, results)
+
+
+def format_attendee_result(attendees: list, errors: list) -> str:
+    # 所有分片都失败时返回错误信息，部分失败时在结果中附带失败分片
+    if errors and not attendees:
+        return "\n".join(error["error"] for error in errors)
+
+    result = {"attendees": attendees}
+    if errors:
+        result["errors"] = errors
+    data = dumps(result)
+    logger.payload("client.calendar.v4.calendar_event_attendee.create", data)
+    return data
+
+
+# 只针对MCP 的工具调用该函数，不给用户使用该函数
+def append_calendar_event_attendee(calendar_id: str, event_id: str, user_id_type: str,
+                                   attendees: List[str], app_id: str, app_secret: str, need_notification: bool):
+    """为日历事件添加参会者"""
+    client = get_lark_client(app_id, app_secret)
+    merged, errors = append_attendees_in_chunks(client, calendar_id, event_id, user_id_type, attendees,
+                                                need_notification)
+    return format_attendee_result(merged, errors)
+
 
-    # 处理业务结果
-    lark.logger.info(lark.JSON.marshal(response.data, indent=4))
-    return lark.JSON.marshal(response.data, indent=4)
+@async_variant(append_calendar_event_attendee)
+async def aappend_calendar_event_attendee(calendar_id, event_id, user_id_type, attendees, app_id, app_secret,
+                                          need_notification):
+    client = await aget_lark_client(app_id, app_secret)
+    merged, errors = await aappend_attendees_in_chunks(client, calendar_id, event_id, user_id_type, attendees,
+                                                       need_notification)
+    return format_attendee_result(merged, errors)
@@ -0,0 +1,197 @@
+from pydantic import Field, BaseModel
+from typing import Optional, List, Literal
+from lark_mcp.mcp_tool.calendar.primary_calendar import get_primary_calendar, aget_primary_calendar, \
+    is_calendar_unavailable, invalidate_primary_calendar
+from lark_mcp.mcp_tool.calendar.create_calendar_event import build_create_calendar_event_request
+from lark_mcp.mcp_tool.calendar.update_calendar_event import build_update_calendar_event_request
+from lark_mcp.mcp_tool.calendar.delete_calendar_event import build_delete_calendar_event_request
+from lark_mcp.mcp_tool.calendar.append_event_attendees import append_attendees_in_chunks, \
+    aappend_attendees_in_chunks
+from lark_mcp.common.client_pool import get_lark_client, aget_lark_client
+from lark_mcp.common.batch import gather_with_limit, item_status, batch_summary
+from lark_mcp.common.async_tool import async_variant
+from lark_mcp.common.lazy_import import lazy_import
+
+calendar_v4 = lazy_import("lark_oapi.api.calendar.v4")
+
+
+class CalendarEventSpec(BaseModel):
+    summary: str = Field(..., description="日程标题")
+    description: str = Field("", description="日程描述")
+    start_date: str = Field(..., description="开始日期，格式YYYY-MM-DD")
+    start_timestamp: str = Field(..., description="开始时间戳，例如1602504000")
+    end_date: str = Field(..., description="结束日期，格式YYYY-MM-DD")
+    end_timestamp: str = Field(..., description="结束时间戳，例如1602504000")
+    location_name: Optional[str] = Field(None, description="日程的会议位置")
+    location_address: Optional[str] = Field(None, description="日程的会议具体地点，如301会议室")
+    attendees: Optional[List[str]] = Field(None, description="参会者列表，每个元素为用户ID")
+    timezone: str = Field("Asia/Shanghai", description="时区")
+    visibility: str = Field("default", description="日程公开范围")
+    attendee_ability: str = Field("can_see_others", description="参与者权限")
+    free_busy_status: str = Field("busy", description="日程占用的忙闲状态")
+    recurrence: str = Field("", description="重复规则，如FREQ=DAILY;INTERVAL=1")
+
+
+class CalendarEventUpdateSpec(BaseModel):
+    calendar_id: str = Field(..., description="日历ID")
+    event_id: str = Field(..., description="日程事件ID")
+    summary: Optional[str] = Field(None, description="需要更新的日程标题")
+    description: Optional[str] = Field(None, description="需要更新的日程描述")
+    start_date: Optional[str] = Field(None, description="需要更新的开始日期，格式YYYY-MM-DD")
+    start_timestamp: Optional[str] = Field(None, description="需要更新的开始时间戳")
+    end_date: Optional[str] = Field(None, description="需要更新的结束日期，格式YYYY-MM-DD")
+    end_timestamp: Optional[str] = Field(None, description="需要更新的结束时间戳")
+    location_name: Optional[str] = Field(None, description="需要更新的日程的会议位置")
+    location_address: Optional[str] = Field(None, description="需要更新的日程的会议具体地点")
+    timezone: str = Field("Asia/Shanghai", description="时区")
+    visibility: Optional[str] = Field(None, description="需要更新的日程公开范围")
+    attendee_ability: Optional[str] = Field(None, description="需要更新的参与者权限")
+    free_busy_status: Optional[str] = Field(None, description="需要更新的日程占用的忙闲状态")
+    recurrence: Optional[str] = Field(None, description="需要更新的重复规则")
+
+
+class CalendarEventDeleteSpec(BaseModel):
+    calendar_id: str = Field(..., description="日历ID")
+    event_id: str = Field(..., description="日程事件ID")
+
+
+def _create_request(calendar_id: str, user_id_type: str, need_notification: bool,
+                    event: CalendarEventSpec) -> "calendar_v4.CreateCalendarEventRequest":
+    return build_create_calendar_event_request(
+        calendar_id, user_id_type, event.summary, event.description, need_notification, event.start_date,
+        event.start_timestamp, event.end_date, event.end_timestamp, event.location_name, event.location_address,
+        event.timezone, event.visibility, event.attendee_ability, event.free_busy_status, event.recurrence)
+
+
+def _update_request(user_id_type: str, event: CalendarEventUpdateSpec) -> "calendar_v4.PatchCalendarEventRequest":
+    return build_update_calendar_event_request(
+        event.calendar_id, event.event_id, user_id_type, event.summary, event.description, event.start_date,
+        event.start_timestamp, event.end_date, event.end_timestamp, event.location_name, event.location_address,
+        event.timezone, event.visibility, event.attendee_ability, event.free_busy_status, event.recurrence)
+
+
+def _created_status(index: int, app_id: str, response, attendee_errors: list):
+    if isinstance(response, BaseException):
+        return item_status(index, response)
+    if not response.success():
+        # 缓存的主日历已不存在或无权限时清除缓存，下次重新获取
+        if is_calendar_unavailable(response):
+            invalidate_primary_calendar(app_id)
+        return item_status(index, response)
+    status = item_status(index, response, event_id=response.data.event.event_id)
+    if attendee_errors:
+        status["attendee_errors"] = attendee_errors
+    return status
+
+
+def batch_create_calendar_events(
+        events: List[CalendarEventSpec] = Field(..., description="需要创建的日程列表"),
+        user_id_type: Optional[str] = Field(default="open_id",
+                                            description="用户ID类型，可选值：open_id、union_id、user_id。"),
+        need_notification: bool = Field(True, description="是否给日程参与人发送通知"),
+        app_id: Optional[str] = Field(None, description="应用唯一标识"),
+        app_secret: Optional[str] = Field(None, description="应用密钥"),
+):
+    """批量创建飞书日历日程，返回每个日程的创建结果"""
+    client = get_lark_client(app_id, app_secret)
+    calendar_id, error = get_primary_calendar(app_id, app_secret, client)
+    if error is not None:
+        return error
+
+    items = []
+    for index, event in enumerate(events):
+        attendee_errors = []
+        try:
+            response = client.calendar.v4.calendar_event.create(
+                _create_request(calendar_id, user_id_type, need_notification, event))
+            if response.success() and event.attendees:
+                _, attendee_errors = append_attendees_in_chunks(client, calendar_id, response.data.event.event_id,
+                                                                user_id_type, event.attendees, need_notification)
+        except Exception as err:
+            response = err
+        items.append(_created_status(index, app_id, response, attendee_errors))
+    return batch_summary(items)
+
+
+@async_variant(batch_create_calendar_events)
+async def abatch_create_calendar_events(events, user_id_type, need_notification, app_id, app_secret):
+    client = await aget_lark_client(app_id, app_secret)
+    calendar_id, error = await aget_primary_calendar(app_id, app_secret, client)
+    if error is not None:
+        return error
+
+    async def create_one(index: int, event: CalendarEventSpec):
+        attendee_errors = []
+        try:
+            response = await client.calendar.v4.calendar_event.acreate(
+                _create_request(calendar_id, user_id_type, need_notification, event))
+            if response.success() and event.attendees:
+                _, attendee_errors = await aappend_attendees_in_chunks(
+                    client, calendar_id, response.data.event.event_id, user_id_type, event.attendees,
+                    need_notification)
+        except Exception as err:
+            response = err
+        return _created_status(index, app_id, response, attendee_errors)
+
+    items = await gather_with_limit(create_one(index, event) for index, event in enumerate(events))
+    return batch_summary(items)
+
+
+def batch_update_calendar_events(
+        events: List[CalendarEventUpdateSpec] = Field(..., description="需要更新的日程列表，未填写的字段不更新"),
+        user_id_type: Optional[str] = Field(default="open_id",
+                                            description="用户ID类型，可选值：open_id、union_id、user_id。"),
+        app_id: Optional[str] = Field(None, description="应用唯一标识"),
+        app_secret: Optional[str] = Field(None, description="应用密钥"),
+):
+    """批量更新飞书日历日程，返回每个日程的更新结果"""
+    client = get_lark_client(app_id, app_secret)
+
+    items = []
+    for index, event in enumerate(events):
+        try:
+            response = client.calendar.v4.calendar_event.patch(_update_request(user_id_type, event))
+        except Exception as err:
+            response = err
+        items.append(item_status(index, response, event_id=event.event_id))
+    return batch_summary(items)
+
+
+@async_variant(batch_update_calendar_events)
+async def abatch_update_calendar_events(events, user_id_type, app_id, app_secret):
+    client = await aget_lark_client(app_id, app_secret)
+    results = await gather_with_limit(
+        client.calendar.v4.calendar_event.apatch(_update_request(user_id_type, event)) for event in events)
+    return batch_summary([item_status(index, result, event_id=event.event_id)
+                          for index, (event, result) in enumerate(zip(events, results))])
+
+
+def batch_delete_calendar_events(
+        events: List[CalendarEventDeleteSpec] = Field(..., description="需要删除的日程列表"),
+        need_notification: Literal["true", "false"] = Field("true", description="是否通知参与者：true-通知，false-不通知"),
+        app_id: Optional[str] = Field(None, description="应用唯一标识"),
+        app_secret: Optional[str] = Field(None, description="应用密钥"),
+):
+    """批量删除日程事件，返回每个日程的删除结果"""
+    client = get_lark_client(app_id, app_secret)
+
+    items = []
+    for index, event in enumerate(events):
+        try:
+            response = client.calendar.v4.calendar_event.delete(
+                build_delete_calendar_event_request(event.calendar_id, event.event_id, need_notification))
+        except Exception as err:
+            response = err
+        items.append(item_status(index, response, event_id=event.event_id))
+    return batch_summary(items)
+
+
+@async_variant(batch_delete_calendar_events)
+async def abatch_delete_calendar_events(events, need_notification, app_id, app_secret):
+    client = await aget_lark_client(app_id, app_secret)
+    results = await gather_with_limit(
+        client.calendar.v4.calendar_event.adelete(
+            build_delete_calendar_event_request(event.calendar_id, event.event_id, need_notification))
+        for event in events)
+    return batch_summary([item_status(index, result, event_id=event.event_id)
+                          for index, (event, result) in enumerate(zip(events, results))])
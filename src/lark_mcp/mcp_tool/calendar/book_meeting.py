@@ -1,32 +1,19 @@
-import json
-import lark_oapi as lark
-from lark_oapi.api.vc.v1 import *
 from pydantic import Field
 from typing import Optional, List, Literal
+from lark_mcp.common.client_pool import get_lark_client, aget_lark_client
+from lark_mcp.common.response import handle_response
+from lark_mcp.common.async_tool import async_variant
+from lark_mcp.common.lazy_import import lazy_import
 
+vc_v1 = lazy_import("lark_oapi.api.vc.v1")
 
-def book_meeting(
-        end_time: int = Field(..., description="会议结束时间，Unix时间戳（秒）"),
-        owner_id: str = Field(..., description="会议组织者ID（通常为用户open_id）"),
-        topic: str = Field(..., description="会议主题"),
-        meeting_initial_type: Literal[1, 2] = Field(1, description="会议初始类型：1：多人会议)"),
-        meeting_connect: bool = Field(True, description="该会议是否支持互通，不支持更新"),
-        auto_record: bool = Field(True, description="是否自动录制会议"),
-        assign_host_list: List[str] = Field(..., description="会议主持人列表，每个元素需包含用户的id"),
-        password: Optional[str] = Field(None, description="会议密码（可选）"),
-        app_id: Optional[str] = Field(None, description="应用唯一标识"),
-        app_secret: Optional[str] = Field(None, description="应用密钥")
-):
-    """预约会议（创建会议预约）"""
-    client = lark.Client.builder() \
-        .app_id(app_id) \
-        .app_secret(app_secret) \
-        .log_level(lark.LogLevel.DEBUG) \
-        .build()
 
+def build_book_meeting_request(end_time: int, owner_id: str, topic: str, meeting_initial_type: int,
+                               meeting_connect: bool, auto_record: bool, assign_host_list: List[str],
+                               password: Optional[str]) -> "vc_v1.ApplyReserveRequest":
     # 构造主持人列表请求体
     host_list = [
-        ReserveAssignHost.builder()
+        vc_v1.ReserveAssignHost.builder()
         .user_type(1)
         .id(host_info)
         .build()
@@ -34,11 +21,11 @@ def book_meeting(
     ]
 
     # 构造请求对象
-    request: ApplyReserveRequest = ApplyReserveRequest.builder() \
-        .request_body(ApplyReserveRequestBody.builder()
+    request: vc_v1.ApplyReserveRequest = vc_v1.ApplyReserveRequest.builder() \
+        .request_body(vc_v1.ApplyReserveRequestBody.builder()
                       .end_time(end_time)
                       .owner_id(owner_id)
-                      .meeting_settings(ReserveMeetingSetting.builder()
+                      .meeting_settings(vc_v1.ReserveMeetingSetting.builder()
                                         .topic(topic)
                                         .meeting_initial_type(meeting_initial_type)
                                         .meeting_connect(meeting_connect)
@@ -48,16 +35,38 @@ def book_meeting(
                                         .build())
                       .build()) \
         .build()
+    return request
+
+
+def book_meeting(
+        end_time: int = Field(..., description="会议结束时间，Unix时间戳（秒）"),
+        owner_id: str = Field(..., description="会议组织者ID（通常为用户open_id）"),
+        topic: str = Field(..., description="会议主题"),
+        meeting_initial_type: Literal[1, 2] = Field(1, description="会议初始类型：1：多人会议)"),
+        meeting_connect: bool = Field(True, description="该会议是否支持互通，不支持更新"),
+        auto_record: bool = Field(True, description="是否自动录制会议"),
+        assign_host_list: List[str] = Field(..., description="会议主持人列表，每个元素需包含用户的id"),
+        password: Optional[str] = Field(None, description="会议密码（可选）"),
+        app_id: Optional[str] = Field(None, description="应用唯一标识"),
+        app_secret: Optional[str] = Field(None, description="应用密钥")
+):
+    """预约会议（创建会议预约）"""
+    client = get_lark_client(app_id, app_secret)
+    request = build_book_meeting_request(end_time, owner_id, topic, meeting_initial_type, meeting_connect,
+                                         auto_record, assign_host_list, password)
 
     # 发起请求
-    response: ApplyReserveResponse = client.vc.v1.reserve.apply(request)
+    response: vc_v1.ApplyReserveResponse = client.vc.v1.reserve.apply(request)
+    return handle_response("client.vc.v1.reserve.apply", response)
+
 
-    # 处理失败返回
-    if not response.success():
-        fail_message = f"client.vc.v1.reserve.apply failed, code: {response.code}, msg: {response.msg}, log_id: {response.get_log_id()}, resp: \n{json.dumps(json.loads(response.raw.content), indent=4, ensure_ascii=False)}"
-        lark.logger.error(fail_message)
-        return fail_message
+@async_variant(book_meeting)
+async def abook_meeting(end_time, owner_id, topic, meeting_initial_type, meeting_connect, auto_record,
+                        assign_host_list, password, app_id, app_secret):
+    client = await aget_lark_client(app_id, app_secret)
+    request = build_book_meeting_request(end_time, owner_id, topic, meeting_initial_type, meeting_connect,
+                                         auto_record, assign_host_list, password)
 
-    # 处理业务结果
-    lark.logger.info(lark.JSON.marshal(response.data, indent=4))
-    return lark.JSON.marshal(response.data, indent=4)
+    # 发起请求
+    response: vc_v1.ApplyReserveResponse = await client.vc.v1.reserve.aapply(request)
+    return handle_response("client.vc.v1.reserve.apply", response)
@@ -1,12 +1,76 @@
-import json
 import uuid
 
-import lark_oapi as lark
-from lark_oapi.api.calendar.v4 import *
-from typing import Optional
+from typing import Optional, List
 from pydantic import Field
-from lark_mcp.mcp_tool.calendar.primary_calendar import get_primary_calendar
-from lark_mcp.mcp_tool.calendar.append_event_attendees import append_calendar_event_attendee
+from lark_mcp.mcp_tool.calendar.primary_calendar import get_primary_calendar, aget_primary_calendar, \
+    is_calendar_unavailable, invalidate_primary_calendar
+from lark_mcp.mcp_tool.calendar.append_event_attendees import append_attendees_in_chunks, \
+    aappend_attendees_in_chunks
+from lark_mcp.common.client_pool import get_lark_client, aget_lark_client
+from lark_mcp.common.response import failure_message, format_data, to_plain, dumps
+from lark_mcp.common.async_tool import async_variant
+from lark_mcp.common.lazy_import import lazy_import
+from lark_mcp.common.log import logger
+
+calendar_v4 = lazy_import("lark_oapi.api.calendar.v4")
+
+
+def build_create_calendar_event_request(calendar_id: str, user_id_type: str, summary: str, description: str,
+                                        need_notification: bool, start_date: str, start_timestamp: str,
+                                        end_date: str, end_timestamp: str, location_name: Optional[str],
+                                        location_address: Optional[str], timezone: str, visibility: str,
+                                        attendee_ability: str, free_busy_status: str, recurrence: str,
+                                        idempotency_key: Optional[str] = None
+                                        ) -> "calendar_v4.CreateCalendarEventRequest":
+    # 构造请求对象
+    request: calendar_v4.CreateCalendarEventRequest = calendar_v4.CreateCalendarEventRequest.builder() \
+        .calendar_id(calendar_id) \
+        .idempotency_key(idempotency_key or uuid.uuid4().hex) \
+        .user_id_type(user_id_type) \
+        .request_body(calendar_v4.CalendarEvent.builder()
+                      .summary(summary)
+                      .description(description)
+                      .need_notification(need_notification)
+                      .start_time(calendar_v4.TimeInfo.builder()
+                                  .date(start_date)
+                                  .timestamp(start_timestamp)
+                                  .timezone(timezone)
+                                  .build())
+                      .end_time(calendar_v4.TimeInfo.builder()
+                                .date(end_date)
+                                .timestamp(end_timestamp)
+                                .timezone(timezone)
+                                .build())
+                      .visibility(visibility)
+                      .location(calendar_v4.EventLocation.builder()
+                                .name(location_name)
+                                .address(location_address)
+                                .build())
+                      .attendee_ability(attendee_ability)
+                      .free_busy_status(free_busy_status)
+                      .recurrence(recurrence)
+                      .build()) \
+        .build()
+    return request
+
+
+def _create_event_failure(app_id: str, response: "calendar_v4.CreateCalendarEventResponse") -> str:
+    # 缓存的主日历已不存在或无权限时清除缓存，下次重新获取
+    if is_calendar_unavailable(response):
+        invalidate_primary_calendar(app_id)
+
+    error_msg = failure_message("client.calendar.v4.calendar_event.create", response)
+    logger.error(error_msg)
+    return error_msg
+
+
+def _event_with_attendees(response: "calendar_v4.CreateCalendarEventResponse", attendees: list, errors: list) -> str:
+    # 日程信息与参会人添加结果合并为一个结果返回，失败的参会人分片单独列出
+    result = to_plain(response.data)
+    result["attendees"] = attendees
+    if errors:
+        result["attendee_errors"] = errors
+    return dumps(result)
 
 
 def create_calendar_event(
@@ -56,83 +120,66 @@ def create_calendar_event(
     Returns:
         日程创建成功返回日程信息，失败返回错误信息
     """
-    # 创建client
-    client = lark.Client.builder() \
-        .app_id(app_id) \
-        .app_secret(app_secret) \
-        .build()
+    # 创建client，获取主日历、创建日程、添加参会人都复用同一个client
+    client = get_lark_client(app_id, app_secret)
 
     # 获取一个公共日历
-    calendar_id = get_primary_calendar(app_id, app_secret)
+    calendar_id, error = get_primary_calendar(app_id, app_secret, client)
+    if error is not None:
+        return error
+    request = build_create_calendar_event_request(
+        calendar_id, user_id_type, summary, description, need_notification, start_date, start_timestamp,
+        end_date, end_timestamp, location_name, location_address, timezone, visibility, attendee_ability,
+        free_busy_status, recurrence)
 
-    # 构造请求对象
-    request: CreateCalendarEventRequest = CreateCalendarEventRequest.builder() \
-        .calendar_id(calendar_id) \
-        .idempotency_key(uuid.uuid4().hex) \
-        .user_id_type(user_id_type) \
-        .request_body(CalendarEvent.builder()
-                      .summary(summary)
-                      .description(description)
-                      .need_notification(need_notification)
-                      .start_time(TimeInfo.builder()
-                                  .date(start_date)
-                                  .timestamp(start_timestamp)
-                                  .timezone(timezone)
-                                  .build())
-                      .end_time(TimeInfo.builder()
-                                .date(end_date)
-                                .timestamp(end_timestamp)
-                                .timezone(timezone)
-                                .build())
-                      .visibility(visibility)
-                      .location(EventLocation.builder().name(location_name).address(location_address).build())
-                      .attendee_ability(attendee_ability)
-                      .free_busy_status(free_busy_status)
-                      .recurrence(recurrence)
-                      .build()) \
-        .build()
+    # 发起请求
+    response: calendar_v4.CreateCalendarEventResponse = client.calendar.v4.calendar_event.create(request)
+
+    # 处理失败返回
+    if not response.success():
+        return _create_event_failure(app_id, response)
+
+    # 基础事件信息处理
+    if not attendees:
+        calendar_event_message = format_data(response.data)
+        logger.payload("client.calendar.v4.calendar_event.create", calendar_event_message)
+        return calendar_event_message
+
+    # 参会人处理：按单次请求的人数上限分片添加，部分分片失败时仍返回日程信息
+    merged, errors = append_attendees_in_chunks(client, calendar_id, response.data.event.event_id, user_id_type,
+                                                attendees, need_notification)
+    return _event_with_attendees(response, merged, errors)
+
+
+@async_variant(create_calendar_event)
+async def acreate_calendar_event(user_id_type, summary, description, need_notification, start_date,
+                                 start_timestamp, end_date, end_timestamp, location_name, location_address,
+                                 attendees, timezone, visibility, attendee_ability, free_busy_status, recurrence,
+                                 app_id, app_secret):
+    # 获取主日历复用同一个client，client池未命中时不会为同一租户重复构建client、校验凭证
+    client = await aget_lark_client(app_id, app_secret)
+    calendar_id, error = await aget_primary_calendar(app_id, app_secret, client)
+    if error is not None:
+        return error
+    request = build_create_calendar_event_request(
+        calendar_id, user_id_type, summary, description, need_notification, start_date, start_timestamp,
+        end_date, end_timestamp, location_name, location_address, timezone, visibility, attendee_ability,
+        free_busy_status, recurrence)
 
     # 发起请求
-    response: CreateCalendarEventResponse = client.calendar.v4.calendar_event.create(request)
+    response: calendar_v4.CreateCalendarEventResponse = await client.calendar.v4.calendar_event.acreate(request)
 
     # 处理失败返回
     if not response.success():
-        error_msg = (
-            f"client.calendar.v4.calendar_event.create failed, "
-            f"code: {response.code}, "
-            f"msg: {response.msg}, "
-            f"log_id: {response.get_log_id()}, "
-            f"resp: \n{json.dumps(json.loads(response.raw.content), indent=4, ensure_ascii=False)}"
-        )
-        lark.logger.error(error_msg)
-        return error_msg
+        return _create_event_failure(app_id, response)
 
     # 基础事件信息处理
-    calendar_event_message = lark.JSON.marshal(response.data, indent=4)
-    lark.logger.info(calendar_event_message)
-
-    # 参会人处理（如果有参会人）
-    event_attendee_message = ""
-    if attendees:
-        try:
-            event_id = response.data.event.event_id
-            attendee_response = append_calendar_event_attendee(
-                app_id=app_id,
-                app_secret=app_secret,
-                event_id=event_id,
-                calendar_id=calendar_id,
-                user_id_type=user_id_type,
-                attendees=attendees,
-                need_notification=need_notification
-            )
-            event_attendee_message = lark.JSON.marshal(attendee_response, indent=4)
-            lark.logger.info(event_attendee_message)
-        except Exception as err:
-            error_msg = f"添加参会人失败: {str(err)}"
-            lark.logger.error(error_msg)
-            # 这里根据业务需求决定：是忽略错误继续返回基础事件信息，还是直接返回错误
-            # 当前选择忽略错误继续返回，可根据实际情况调整
-            # return error_msg
-
-    # 返回组合结果
-    return calendar_event_message + event_attendee_message if event_attendee_message else calendar_event_message
+    if not attendees:
+        calendar_event_message = format_data(response.data)
+        logger.payload("client.calendar.v4.calendar_event.create", calendar_event_message)
+        return calendar_event_message
+
+    # 参会人处理：按单次请求的人数上限分片，各分片并发添加
+    merged, errors = await aappend_attendees_in_chunks(client, calendar_id, response.data.event.event_id,
+                                                       user_id_type, attendees, need_notification)
+    return _event_with_attendees(response, merged, errors)
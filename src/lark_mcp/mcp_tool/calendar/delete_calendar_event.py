@@ -1,40 +1,62 @@
 import json
-import lark_oapi as lark
-from lark_oapi.api.calendar.v4 import *
+
 from pydantic import Field
 from typing import Optional, Literal
+from lark_mcp.common.client_pool import get_lark_client, aget_lark_client
+from lark_mcp.common.response import failure_message, format_data
+from lark_mcp.common.async_tool import async_variant
+from lark_mcp.common.lazy_import import lazy_import
+from lark_mcp.common.log import logger
+
+calendar_v4 = lazy_import("lark_oapi.api.calendar.v4")
 
-def delete_calendar_event(
-    calendar_id: str = Field(..., description="日历ID（必填）"),
-    event_id: str = Field(..., description="日程事件ID（必填）"),
-    need_notification: Literal["true", "false"] = Field("true", description="是否通知参与者（可选）：true-通知，false-不通知"),
-    app_id: Optional[str] = Field(None, description="应用唯一标识"),
-    app_secret: Optional[str] = Field(None, description="应用密钥")
-):
-    """删除日程事件"""
-    # 初始化客户端
-    client = lark.Client.builder() \
-        .app_id(app_id) \
-        .app_secret(app_secret) \
-        .log_level(lark.LogLevel.DEBUG) \
-        .build()
 
+def build_delete_calendar_event_request(calendar_id: str, event_id: str,
+                                        need_notification: str) -> "calendar_v4.DeleteCalendarEventRequest":
     # 构造请求对象
-    request: DeleteCalendarEventRequest = DeleteCalendarEventRequest.builder() \
+    request: calendar_v4.DeleteCalendarEventRequest = calendar_v4.DeleteCalendarEventRequest.builder() \
         .calendar_id(calendar_id) \
         .event_id(event_id) \
         .need_notification(need_notification) \
         .build()
+    return request
 
-    # 发起请求
-    response: DeleteCalendarEventResponse = client.calendar.v4.calendar_event.delete(request)
 
+def handle_delete_calendar_event_response(response: "calendar_v4.DeleteCalendarEventResponse") -> str:
     # 处理失败返回
     if not response.success():
-        fail_message = f"client.calendar.v4.calendar_event.delete failed, code: {response.code}, msg: {response.msg}, log_id: {response.get_log_id()}, resp: \n{json.dumps(json.loads(response.raw.content), indent=4, ensure_ascii=False)}"
-        lark.logger.error(fail_message)
+        fail_message = failure_message("client.calendar.v4.calendar_event.delete", response)
+        logger.error(fail_message)
         return fail_message
 
     # 处理业务结果
-    lark.logger.info(lark.JSON.marshal(response.raw.content, indent=4))
-    return lark.JSON.marshal(response.raw.content, indent=4)
\ No newline at end of file
+    data = format_data(json.loads(response.raw.content))
+    logger.payload("client.calendar.v4.calendar_event.delete", data)
+    return data
+
+
+def delete_calendar_event(
+    calendar_id: str = Field(..., description="日历ID（必填）"),
+    event_id: str = Field(..., description="日程事件ID（必填）"),
+    need_notification: Literal["true", "false"] = Field("true", description="是否通知参与者（可选）：true-通知，false-不通知"),
+    app_id: Optional[str] = Field(None, description="应用唯一标识"),
+    app_secret: Optional[str] = Field(None, description="应用密钥")
+):
+    """删除日程事件"""
+    # 初始化客户端
+    client = get_lark_client(app_id, app_secret)
+    request = build_delete_calendar_event_request(calendar_id, event_id, need_notification)
+
+    # 发起请求
+    response: calendar_v4.DeleteCalendarEventResponse = client.calendar.v4.calendar_event.delete(request)
+    return handle_delete_calendar_event_response(response)
+
+
+@async_variant(delete_calendar_event)
+async def adelete_calendar_event(calendar_id, event_id, need_notification, app_id, app_secret):
+    client = await aget_lark_client(app_id, app_secret)
+    request = build_delete_calendar_event_request(calendar_id, event_id, need_notification)
+
+    # 发起请求
+    response: calendar_v4.DeleteCalendarEventResponse = await client.calendar.v4.calendar_event.adelete(request)
+    return handle_delete_calendar_event_response(response)
@@ -1,8 +1,36 @@
-import json
-import lark_oapi as lark
-from lark_oapi.api.calendar.v4 import *
 from pydantic import Field
-from typing import Optional, Literal
+from typing import List, Optional, Literal
+from lark_mcp.common.client_pool import get_lark_client, aget_lark_client
+from lark_mcp.common.response import handle_response, field_tree, nested_fields
+from lark_mcp.common.async_tool import async_variant
+from lark_mcp.common.lazy_import import lazy_import
+
+calendar_v4 = lazy_import("lark_oapi.api.calendar.v4")
+
+
+def build_get_calendar_event_request(calendar_id: str, event_id: str, need_meeting_settings: bool,
+                                     need_attendee: bool, max_attendee_num: int,
+                                     user_id_type: str) -> "calendar_v4.GetCalendarEventRequest":
+    # 构造请求对象
+    request: calendar_v4.GetCalendarEventRequest = calendar_v4.GetCalendarEventRequest.builder() \
+        .calendar_id(calendar_id) \
+        .event_id(event_id) \
+        .need_meeting_settings(need_meeting_settings) \
+        .need_attendee(need_attendee) \
+        .max_attendee_num(max_attendee_num) \
+        .user_id_type(user_id_type) \
+        .build()
+    return request
+
+
+def _select_fields(fields: Optional[List[str]], need_meeting_settings: bool, need_attendee: bool):
+    # 没有选择参会者或会议设置时不让飞书返回这部分数据
+    tree = field_tree(fields)
+    if tree is not None:
+        need_attendee = need_attendee and "attendees" in tree
+        need_meeting_settings = need_meeting_settings and "vchat" in tree
+    return nested_fields("event", fields), need_meeting_settings, need_attendee
+
 
 def get_calendar_event(
     calendar_id: str = Field(..., description="日历ID（必填）"),
@@ -11,36 +39,30 @@ def get_calendar_event(
     need_attendee: bool = Field(True, description="是否需要返回参会者信息"),
     max_attendee_num: int = Field(10, description="最大返回参会者数量"),
     user_id_type: Literal["open_id", "user_id", "union_id"] = Field("open_id", description="用户ID类型"),
+    fields: Optional[List[str]] = Field(None, description="只返回日程的这些字段，如 summary、start_time.timestamp、attendees[*].display_name；不填返回全部字段"),
     app_id: Optional[str] = Field(None, description="应用唯一标识"),
     app_secret: Optional[str] = Field(None, description="应用密钥")
 ):
     """获取日历事件详情"""
     # 初始化客户端
-    client = lark.Client.builder() \
-        .app_id(app_id) \
-        .app_secret(app_secret) \
-        .log_level(lark.LogLevel.DEBUG) \
-        .build()
-
-    # 构造请求对象
-    request: GetCalendarEventRequest = GetCalendarEventRequest.builder() \
-        .calendar_id(calendar_id) \
-        .event_id(event_id) \
-        .need_meeting_settings(need_meeting_settings) \
-        .need_attendee(need_attendee) \
-        .max_attendee_num(max_attendee_num) \
-        .user_id_type(user_id_type) \
-        .build()
+    client = get_lark_client(app_id, app_secret)
+    fields, need_meeting_settings, need_attendee = _select_fields(fields, need_meeting_settings, need_attendee)
+    request = build_get_calendar_event_request(calendar_id, event_id, need_meeting_settings, need_attendee,
+                                               max_attendee_num, user_id_type)
 
     # 发起请求
-    response: GetCalendarEventResponse = client.calendar.v4.calendar_event.get(request)
+    response: calendar_v4.GetCalendarEventResponse = client.calendar.v4.calendar_event.get(request)
+    return handle_response("client.calendar.v4.calendar_event.get", response, fields)
+
 
-    # 处理失败返回
-    if not response.success():
-        fail_message = f"client.calendar.v4.calendar_event.get failed, code: {response.code}, msg: {response.msg}, log_id: {response.get_log_id()}, resp: \n{json.dumps(json.loads(response.raw.content), indent=4, ensure_ascii=False)}"
-        lark.logger.error(fail_message)
-        return fail_message
+@async_variant(get_calendar_event)
+async def aget_calendar_event(calendar_id, event_id, need_meeting_settings, need_attendee, max_attendee_num,
+                              user_id_type, fields, app_id, app_secret):
+    client = await aget_lark_client(app_id, app_secret)
+    fields, need_meeting_settings, need_attendee = _select_fields(fields, need_meeting_settings, need_attendee)
+    request = build_get_calendar_event_request(calendar_id, event_id, need_meeting_settings, need_attendee,
+                                               max_attendee_num, user_id_type)
 
-    # 处理业务结果
-    lark.logger.info(lark.JSON.marshal(response.data, indent=4))
-    return lark.JSON.marshal(response.data, indent=4)
\ No newline at end of file
+    # 发起请求
+    response: calendar_v4.GetCalendarEventResponse = await client.calendar.v4.calendar_event.aget(request)
+    return handle_response("client.calendar.v4.calendar_event.get", response, fields)
@@ -1,38 +1,124 @@
-import json
+import os
+from typing import Iterable, Optional, Tuple
 
-import lark_oapi as lark
-from lark_oapi.api.calendar.v4 import PrimaryCalendarRequest, PrimaryCalendarResponse
+from lark_mcp.common.client_pool import get_lark_client, aget_lark_client
+from lark_mcp.common.response import failure_message
+from lark_mcp.common.ttl_cache import TTLCache, MISSING
+from lark_mcp.common.lazy_import import lazy_import
+from lark_mcp.common.tracing import start_span
+from lark_mcp.common.log import logger
 
+lark = lazy_import("lark_oapi")
+calendar_v4 = lazy_import("lark_oapi.api.calendar.v4")
 
-# 该函数不接入MCP，是其他MCP工具调用该函数所使用
-def get_primary_calendar(app_id: str, app_secret: str):
-    # 创建client
-    client = lark.Client.builder() \
-        .app_id(app_id) \
-        .app_secret(app_secret) \
-        .build()
+# 主日历ID缓存配置，可通过环境变量覆盖
+PRIMARY_CALENDAR_TTL = int(os.getenv("LARK_MCP_PRIMARY_CALENDAR_TTL", "86400"))
+PRIMARY_CALENDAR_NEGATIVE_TTL = int(os.getenv("LARK_MCP_PRIMARY_CALENDAR_NEGATIVE_TTL", "300"))
+PRIMARY_CALENDAR_CACHE_SIZE = int(os.getenv("LARK_MCP_PRIMARY_CALENDAR_CACHE_SIZE", "4096"))
+
+# 日历不存在或无权限时的错误码，出现时说明缓存的主日历已失效
+CALENDAR_UNAVAILABLE_CODES = {191001, 191002}
+
+# app_id -> 主日历ID；没有主日历的租户缓存None（负缓存，存活时间更短）
+_primary_calendar_cache = TTLCache(PRIMARY_CALENDAR_CACHE_SIZE, PRIMARY_CALENDAR_TTL)
 
-    # 构造请求对象
-    request: PrimaryCalendarRequest = PrimaryCalendarRequest.builder() \
+
+def build_primary_calendar_request() -> "calendar_v4.PrimaryCalendarRequest":
+    return calendar_v4.PrimaryCalendarRequest.builder() \
         .user_id_type("open_id") \
         .build()
 
-    # 发起请求
-    response: PrimaryCalendarResponse = client.calendar.v4.calendar.primary(request)
 
+def parse_primary_calendar_response(response: "calendar_v4.PrimaryCalendarResponse"
+                                    ) -> Tuple[Optional[str], Optional[str]]:
+    """返回(主日历ID, 错误信息)；接口失败时主日历ID为None，成功但没有主日历时两者都为None"""
     # 处理失败返回
     if not response.success():
-        error_message = f"client.calendar.v4.calendar.primary failed, code: {response.code}, msg: {response.msg}, log_id: {response.get_log_id()}, resp: \n{json.dumps(json.loads(response.raw.content), indent=4, ensure_ascii=False)}"
-        lark.logger.error(error_message)
-        return error_message
+        error_message = failure_message("client.calendar.v4.calendar.primary", response)
+        logger.error(error_message)
+        return None, error_message
 
     # 处理业务结果
-    lark.logger.info(lark.JSON.marshal(response.data, indent=4))
-    marshal_resp = json.loads(lark.JSON.marshal(response.data.calendars, indent=4))
-
     # 获取一个公共的日历
-    for res in marshal_resp:
-        if res["calendar"]["type"] == "primary":
-            return res["calendar"]["calendar_id"]
+    for res in response.data.calendars or []:
+        if res.calendar is not None and res.calendar.type == "primary":
+            return res.calendar.calendar_id, None
+
+    return None, None
+
+
+def _primary_calendar_result(app_id: str, calendar_id: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    if calendar_id:
+        return calendar_id, None
+    return None, f"primary calendar not found: {app_id}"
+
+
+def _cache_primary_calendar(app_id: str, response: "calendar_v4.PrimaryCalendarResponse"
+                            ) -> Tuple[Optional[str], Optional[str]]:
+    calendar_id, error = parse_primary_calendar_response(response)
+    # 只缓存成功的结果，接口失败时下次重新获取
+    if error is not None:
+        return None, error
+    ttl = PRIMARY_CALENDAR_TTL if calendar_id else PRIMARY_CALENDAR_NEGATIVE_TTL
+    _primary_calendar_cache.set(app_id, calendar_id, ttl)
+    return _primary_calendar_result(app_id, calendar_id)
+
+
+# 该函数不接入MCP，是其他MCP工具调用该函数所使用
+def get_primary_calendar(app_id: str, app_secret: str,
+                         client: "Optional[lark.Client]" = None) -> Tuple[Optional[str], Optional[str]]:
+    """
+    返回(主日历ID, 错误信息)，接口失败或租户没有主日历时主日历ID为None，调用方应直接返回错误信息
+
+    client为调用方已经通过 get_lark_client 获取（校验过凭证）的client，不传时在这里获取
+    """
+    with start_span("lark.primary_calendar", attributes={"lark.app_id": app_id}) as span:
+        # 缓存只按app_id区分，先获取client校验凭证，密钥错误的调用方读不到缓存
+        client = client or get_lark_client(app_id, app_secret)
+        calendar_id = _primary_calendar_cache.get(app_id)
+        span.set_attribute("cache.hit", calendar_id is not MISSING)
+        if calendar_id is not MISSING:
+            return _primary_calendar_result(app_id, calendar_id)
+
+        # 发起请求
+        response: calendar_v4.PrimaryCalendarResponse = client.calendar.v4.calendar.primary(
+            build_primary_calendar_request())
+        return _cache_primary_calendar(app_id, response)
+
+
+async def aget_primary_calendar(app_id: str, app_secret: str,
+                                client: "Optional[lark.Client]" = None) -> Tuple[Optional[str], Optional[str]]:
+    with start_span("lark.primary_calendar", attributes={"lark.app_id": app_id}) as span:
+        client = client or await aget_lark_client(app_id, app_secret)
+        calendar_id = _primary_calendar_cache.get(app_id)
+        span.set_attribute("cache.hit", calendar_id is not MISSING)
+        if calendar_id is not MISSING:
+            return _primary_calendar_result(app_id, calendar_id)
+
+        # 发起请求
+        response: calendar_v4.PrimaryCalendarResponse = await client.calendar.v4.calendar.aprimary(
+            build_primary_calendar_request())
+        return _cache_primary_calendar(app_id, response)
+
+
+def is_calendar_unavailable(response: "lark.BaseResponse") -> bool:
+    """日历接口的失败是否由日历不存在或无权限导致"""
+    status_code = response.raw.status_code if response.raw is not None else None
+    return response.code in CALENDAR_UNAVAILABLE_CODES or status_code in (403, 404)
+
+
+def invalidate_primary_calendar(app_id: str) -> None:
+    _primary_calendar_cache.delete(app_id)
+
+
+def warm_up_primary_calendars(tenants: Iterable[Tuple[str, str]]) -> None:
+    """预先获取租户的主日历ID（同时预热client和token），通常在服务启动时调用"""
+    for app_id, app_secret in tenants:
+        try:
+            get_primary_calendar(app_id, app_secret)
+        except Exception as err:
+            logger.error("warm up primary calendar failed", app_id=app_id, err=err)
+
 
-    return None
\ No newline at end of file
+def get_primary_calendar_cache_stats():
+    return _primary_calendar_cache.stats()
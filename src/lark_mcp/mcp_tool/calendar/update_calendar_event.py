@@ -1,10 +1,51 @@
-import json
-import uuid
-
-import lark_oapi as lark
-from lark_oapi.api.calendar.v4 import *
 from typing import Optional
 from pydantic import Field
+from lark_mcp.common.client_pool import get_lark_client, aget_lark_client
+from lark_mcp.common.response import handle_response
+from lark_mcp.common.async_tool import async_variant
+from lark_mcp.common.lazy_import import lazy_import
+
+calendar_v4 = lazy_import("lark_oapi.api.calendar.v4")
+
+
+def build_update_calendar_event_request(calendar_id: str, event_id: str, user_id_type: str,
+                                        summary: Optional[str], description: Optional[str],
+                                        start_date: Optional[str], start_timestamp: Optional[str],
+                                        end_date: Optional[str], end_timestamp: Optional[str],
+                                        location_name: Optional[str], location_address: Optional[str],
+                                        timezone: str, visibility: Optional[str], attendee_ability: Optional[str],
+                                        free_busy_status: Optional[str],
+                                        recurrence: Optional[str]) -> "calendar_v4.PatchCalendarEventRequest":
+    # 构造请求对象
+    request: calendar_v4.PatchCalendarEventRequest = calendar_v4.PatchCalendarEventRequest.builder() \
+        .event_id(event_id) \
+        .calendar_id(calendar_id) \
+        .user_id_type(user_id_type) \
+        .request_body(calendar_v4.CalendarEvent.builder()
+                      .summary(summary)
+                      .description(description)
+                      .start_time(calendar_v4.TimeInfo.builder()
+                                  .date(start_date)
+                                  .timestamp(start_timestamp)
+                                  .timezone(timezone)
+                                  .build())
+                      .end_time(calendar_v4.TimeInfo.builder()
+                                .date(end_date)
+                                .timestamp(end_timestamp)
+                                .timezone(timezone)
+                                .build())
+                      .visibility(visibility)
+                      .location(calendar_v4.EventLocation.builder()
+                                .name(location_name)
+                                .address(location_address)
+                                .build())
+                      .attendee_ability(attendee_ability)
+                      .free_busy_status(free_busy_status)
+                      .recurrence(recurrence)
+                      .build()) \
+        .build()
+    return request
+
 
 def update_calendar_event(
         calendar_id: str = Field(..., description="日历ID（必填）"),
@@ -53,55 +94,28 @@ def update_calendar_event(
         日程创建成功返回日程信息，失败返回错误信息
     """
     # 创建client
-    client = lark.Client.builder() \
-        .app_id(app_id) \
-        .app_secret(app_secret) \
-        .build()
-
-    # 构造请求对象
-    request: PatchCalendarEventRequest = PatchCalendarEventRequest.builder() \
-        .event_id(event_id) \
-        .calendar_id(calendar_id) \
-        .user_id_type(user_id_type) \
-        .request_body(CalendarEvent.builder()
-                      .summary(summary)
-                      .description(description)
-                      .start_time(TimeInfo.builder()
-                                  .date(start_date)
-                                  .timestamp(start_timestamp)
-                                  .timezone(timezone)
-                                  .build())
-                      .end_time(TimeInfo.builder()
-                                .date(end_date)
-                                .timestamp(end_timestamp)
-                                .timezone(timezone)
-                                .build())
-                      .visibility(visibility)
-                      .location(EventLocation.builder().name(location_name).address(location_address).build())
-                      .attendee_ability(attendee_ability)
-                      .free_busy_status(free_busy_status)
-                      .recurrence(recurrence)
-                      .build()) \
-        .build()
+    client = get_lark_client(app_id, app_secret)
+    request = build_update_calendar_event_request(
+        calendar_id, event_id, user_id_type, summary, description, start_date, start_timestamp, end_date,
+        end_timestamp, location_name, location_address, timezone, visibility, attendee_ability, free_busy_status,
+        recurrence)
 
     # 发起请求
-    response: PatchCalendarEventResponse = client.calendar.v4.calendar_event.patch(request)
+    response: calendar_v4.PatchCalendarEventResponse = client.calendar.v4.calendar_event.patch(request)
+    return handle_response("client.calendar.v4.calendar_event.patch", response)
 
-    # 处理失败返回
-    if not response.success():
-        error_msg = (
-            f"client.calendar.v4.calendar_event.create failed, "
-            f"code: {response.code}, "
-            f"msg: {response.msg}, "
-            f"log_id: {response.get_log_id()}, "
-            f"resp: \n{json.dumps(json.loads(response.raw.content), indent=4, ensure_ascii=False)}"
-        )
-        lark.logger.error(error_msg)
-        return error_msg
 
-    # 基础事件信息处理
-    update_calendar_event_message = lark.JSON.marshal(response.data, indent=4)
-    lark.logger.info(update_calendar_event_message)
+@async_variant(update_calendar_event)
+async def aupdate_calendar_event(calendar_id, event_id, user_id_type, summary, description, start_date,
+                                 start_timestamp, end_date, end_timestamp, location_name, location_address,
+                                 timezone, visibility, attendee_ability, free_busy_status, recurrence,
+                                 app_id, app_secret):
+    client = await aget_lark_client(app_id, app_secret)
+    request = build_update_calendar_event_request(
+        calendar_id, event_id, user_id_type, summary, description, start_date, start_timestamp, end_date,
+        end_timestamp, location_name, location_address, timezone, visibility, attendee_ability, free_busy_status,
+        recurrence)
 
-    # 返回组合结果
-    return update_calendar_event_message
\ No newline at end of file
+    # 发起请求
+    response: calendar_v4.PatchCalendarEventResponse = await client.calendar.v4.calendar_event.apatch(request)
+    return handle_response("client.calendar.v4.calendar_event.patch", response)
@@ -1,35 +1,21 @@
-import json
-import uuid
-
-import lark_oapi as lark
-from lark_oapi.api.im.v1 import *
 from pydantic import Field
-from typing import List
+from typing import List, Optional
+from lark_mcp.common.client_pool import get_lark_client, aget_lark_client
+from lark_mcp.common.response import handle_response
+from lark_mcp.common.async_tool import async_variant
+from lark_mcp.common.lazy_import import lazy_import
 
+im_v1 = lazy_import("lark_oapi.api.im.v1")
 
-def create_chat_member(user_id_type: Optional[str] = Field(default="open_id",
-                                                           description="用户ID类型，可选值：open_id、union_id、user_id。"),
-                       chat_name: str = Field(..., description="群聊名称，不能为空"),
-                       chat_description: str = Field(..., description="群聊的简要描述"),
-                       owner_id: str = Field(..., description="群主的用户ID（open_id格式）"),
-                       user_id_list: List[str] = Field(..., description="创建群聊时拉入的用户ID列表（open_id格式）"),
-                       bot_id_list: List[str] = Field(..., description="群聊中添加的机器人ID列表， 如果没有可设置为[]"),
-                       chat_avatar: str = Field(default="default-avatar_44ae0ca3-e140-494b-956f-78091e348435",
-                                                description="群聊的图标链接"),
-                       app_id: Optional[str] = Field(None, description="应用唯一标识"),
-                       app_secret: Optional[str] = Field(None, description="应用密钥")):
-    # 创建client
-    client = lark.Client.builder() \
-        .app_id(app_id) \
-        .app_secret(app_secret) \
-        .log_level(lark.LogLevel.DEBUG) \
-        .build()
 
+def build_create_chat_request(user_id_type: str, chat_name: str, chat_description: str, owner_id: str,
+                              user_id_list: List[str], bot_id_list: List[str],
+                              chat_avatar: str) -> "im_v1.CreateChatRequest":
     # 构造请求对象
-    request: CreateChatRequest = CreateChatRequest.builder() \
+    request: im_v1.CreateChatRequest = im_v1.CreateChatRequest.builder() \
         .user_id_type(user_id_type) \
         .set_bot_manager(False) \
-        .request_body(CreateChatRequestBody.builder()
+        .request_body(im_v1.CreateChatRequestBody.builder()
                       .avatar(chat_avatar)
                       .name(chat_name)
                       .description(chat_description)
@@ -42,7 +28,7 @@ def create_chat_member(user_id_type: Optional[str] = Field(default="open_id",
                       .join_message_visibility("all_members")
                       .leave_message_visibility("all_members")
                       .membership_approval("no_approval_required")
-                      .restricted_mode_setting(RestrictedModeSetting.builder()
+                      .restricted_mode_setting(im_v1.RestrictedModeSetting.builder()
                                                .status(False)
                                                .screenshot_has_permission_setting("all_members")
                                                .download_has_permission_setting("all_members")
@@ -54,17 +40,37 @@ def create_chat_member(user_id_type: Optional[str] = Field(default="open_id",
                       .hide_member_count_setting("all_members")
                       .build()) \
         .build()
+    return request
+
+
+def create_chat_member(user_id_type: Optional[str] = Field(default="open_id",
+                                                           description="用户ID类型，可选值：open_id、union_id、user_id。"),
+                       chat_name: str = Field(..., description="群聊名称，不能为空"),
+                       chat_description: str = Field(..., description="群聊的简要描述"),
+                       owner_id: str = Field(..., description="群主的用户ID（open_id格式）"),
+                       user_id_list: List[str] = Field(..., description="创建群聊时拉入的用户ID列表（open_id格式）"),
+                       bot_id_list: List[str] = Field(..., description="群聊中添加的机器人ID列表， 如果没有可设置为[]"),
+                       chat_avatar: str = Field(default="default-avatar_44ae0ca3-e140-494b-956f-78091e348435",
+                                                description="群聊的图标链接"),
+                       app_id: Optional[str] = Field(None, description="应用唯一标识"),
+                       app_secret: Optional[str] = Field(None, description="应用密钥")):
+    # 创建client
+    client = get_lark_client(app_id, app_secret)
+    request = build_create_chat_request(user_id_type, chat_name, chat_description, owner_id, user_id_list,
+                                        bot_id_list, chat_avatar)
 
     # 发起请求
-    response: CreateChatResponse = client.im.v1.chat.create(request)
+    response: im_v1.CreateChatResponse = client.im.v1.chat.create(request)
+    return handle_response("client.im.v1.chat.create", response)
 
-    # 处理失败返回
-    if not response.success():
-        lark.logger.error(
-            f"client.im.v1.chat.create failed, code: {response.code}, msg: {response.msg}, log_id: {response.get_log_id()}, resp: \n{json.dumps(json.loads(response.raw.content), indent=4, ensure_ascii=False)}")
-        return f"client.im.v1.chat.create failed, code: {response.code}, msg: {response.msg}, log_id: {response.get_log_id()}, resp: \n{json.dumps(json.loads(response.raw.content), indent=4, ensure_ascii=False)}"
 
-    # 处理业务结果
-    lark.logger.info(lark.JSON.marshal(response.data, indent=4))
+@async_variant(create_chat_member)
+async def acreate_chat_member(user_id_type, chat_name, chat_description, owner_id, user_id_list, bot_id_list,
+                              chat_avatar, app_id, app_secret):
+    client = await aget_lark_client(app_id, app_secret)
+    request = build_create_chat_request(user_id_type, chat_name, chat_description, owner_id, user_id_list,
+                                        bot_id_list, chat_avatar)
 
-    return lark.JSON.marshal(response.data, indent=4)
+    # 发起请求
+    response: im_v1.CreateChatResponse = await client.im.v1.chat.acreate(request)
+    return handle_response("client.im.v1.chat.create", response)
@@ -1,35 +1,49 @@
-import json
-import lark_oapi as lark
-from lark_oapi.api.im.v1 import *
 from pydantic import Field
 from typing import Optional
+from lark_mcp.common.client_pool import get_lark_client, aget_lark_client
+from lark_mcp.common.response import failure_message
+from lark_mcp.common.async_tool import async_variant
+from lark_mcp.common.lazy_import import lazy_import
+from lark_mcp.common.log import logger
 
+im_v1 = lazy_import("lark_oapi.api.im.v1")
 
-def delete_chat_member(
-        chat_id: str = Field(..., description="群聊ID"),
-        app_id: Optional[str] = Field(None, description="应用唯一标识"),
-        app_secret: Optional[str] = Field(None, description="应用密钥")
-):
-    """删除群聊"""
-    client = lark.Client.builder() \
-        .app_id(app_id) \
-        .app_secret(app_secret) \
-        .log_level(lark.LogLevel.DEBUG) \
-        .build()
 
+def build_delete_chat_request(chat_id: str) -> "im_v1.DeleteChatRequest":
     # 构造请求对象
-    request: DeleteChatRequest = DeleteChatRequest.builder() \
+    return im_v1.DeleteChatRequest.builder() \
         .chat_id(chat_id) \
         .build()
 
-    # 发起请求
-    response: DeleteChatResponse = client.im.v1.chat.delete(request)
 
+def handle_delete_chat_response(chat_id: str, response: "im_v1.DeleteChatResponse") -> str:
     # 处理失败返回
     if not response.success():
-        fail_message = f"client.im.v1.chat.delete failed, code: {response.code}, msg: {response.msg}, log_id: {response.get_log_id()}, resp: \n{json.dumps(json.loads(response.raw.content), indent=4, ensure_ascii=False)}"
-        lark.logger.error(fail_message)
+        fail_message = failure_message("client.im.v1.chat.delete", response)
+        logger.error(fail_message)
         return fail_message
 
     # 处理业务结果
     return f"chat id: {chat_id}已经被删除！"
+
+
+def delete_chat_member(
+        chat_id: str = Field(..., description="群聊ID"),
+        app_id: Optional[str] = Field(None, description="应用唯一标识"),
+        app_secret: Optional[str] = Field(None, description="应用密钥")
+):
+    """删除群聊"""
+    client = get_lark_client(app_id, app_secret)
+
+    # 发起请求
+    response: im_v1.DeleteChatResponse = client.im.v1.chat.delete(build_delete_chat_request(chat_id))
+    return handle_delete_chat_response(chat_id, response)
+
+
+@async_variant(delete_chat_member)
+async def adelete_chat_member(chat_id, app_id, app_secret):
+    client = await aget_lark_client(app_id, app_secret)
+
+    # 发起请求
+    response: im_v1.DeleteChatResponse = await client.im.v1.chat.adelete(build_delete_chat_request(chat_id))
+    return handle_delete_chat_response(chat_id, response)
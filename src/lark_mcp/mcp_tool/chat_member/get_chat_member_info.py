@@ -1,9 +1,19 @@
-import json
-
-import lark_oapi as lark
-from lark_oapi.api.im.v1 import *
 from pydantic import Field
-from typing import List
+from typing import Optional
+from lark_mcp.common.client_pool import get_lark_client, aget_lark_client
+from lark_mcp.common.response import handle_response
+from lark_mcp.common.async_tool import async_variant
+from lark_mcp.common.lazy_import import lazy_import
+
+im_v1 = lazy_import("lark_oapi.api.im.v1")
+
+
+def build_get_chat_request(chat_id: str, user_id_type: str) -> "im_v1.GetChatRequest":
+    # 构造请求对象
+    return im_v1.GetChatRequest.builder() \
+        .chat_id(chat_id) \
+        .user_id_type(user_id_type) \
+        .build()
 
 
 def get_chat_member_info(user_id_type: Optional[str] = Field(default="open_id",
@@ -12,27 +22,17 @@ def get_chat_member_info(user_id_type: Optional[str] = Field(default="open_id",
                          app_id: Optional[str] = Field(None, description="应用唯一标识"),
                          app_secret: Optional[str] = Field(None, description="应用密钥")):
     """获取群聊的群信息"""
-    client = lark.Client.builder() \
-        .app_id(app_id) \
-        .app_secret(app_secret) \
-        .log_level(lark.LogLevel.DEBUG) \
-        .build()
-
-    # 构造请求对象
-    request: GetChatRequest = GetChatRequest.builder() \
-        .chat_id(chat_id) \
-        .user_id_type(user_id_type) \
-        .build()
+    client = get_lark_client(app_id, app_secret)
 
     # 发起请求
-    response: GetChatResponse = client.im.v1.chat.get(request)
+    response: im_v1.GetChatResponse = client.im.v1.chat.get(build_get_chat_request(chat_id, user_id_type))
+    return handle_response("client.im.v1.chat.get", response)
 
-    # 处理失败返回
-    if not response.success():
-        fail_message = f"client.im.v1.chat.get failed, code: {response.code}, msg: {response.msg}, log_id: {response.get_log_id()}, resp: \n{json.dumps(json.loads(response.raw.content), indent=4, ensure_ascii=False)}"
-        lark.logger.error(fail_message)
-        return fail_message
 
-    # 处理业务结果
-    lark.logger.info(lark.JSON.marshal(response.data, indent=4))
-    return lark.JSON.marshal(response.data, indent=4)
+@async_variant(get_chat_member_info)
+async def aget_chat_member_info(user_id_type, chat_id, app_id, app_secret):
+    client = await aget_lark_client(app_id, app_secret)
+
+    # 发起请求
+    response: im_v1.GetChatResponse = await client.im.v1.chat.aget(build_get_chat_request(chat_id, user_id_type))
+    return handle_response("client.im.v1.chat.get", response)
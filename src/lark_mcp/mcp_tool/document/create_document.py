@@ -1,8 +1,22 @@
-import json
-import lark_oapi as lark
-from lark_oapi.api.docx.v1 import *
 from pydantic import Field
 from typing import Optional
+from lark_mcp.common.client_pool import get_lark_client, aget_lark_client
+from lark_mcp.common.response import handle_response
+from lark_mcp.common.async_tool import async_variant
+from lark_mcp.common.lazy_import import lazy_import
+
+docx_v1 = lazy_import("lark_oapi.api.docx.v1")
+
+
+def build_create_document_request(folder_token: Optional[str], title: str) -> "docx_v1.CreateDocumentRequest":
+    # 构造请求对象
+    request: docx_v1.CreateDocumentRequest = docx_v1.CreateDocumentRequest.builder() \
+        .request_body(docx_v1.CreateDocumentRequestBody.builder()
+                      .folder_token(folder_token)
+                      .title(title)
+                      .build()) \
+        .build()
+    return request
 
 
 def create_document(
@@ -12,29 +26,19 @@ def create_document(
         app_secret: Optional[str] = Field(None, description="应用密钥")
 ):
     """创建文档"""
-    client = lark.Client.builder() \
-        .app_id(app_id) \
-        .app_secret(app_secret) \
-        .log_level(lark.LogLevel.DEBUG) \
-        .build()
-
-    # 构造请求对象
-    request: CreateDocumentRequest = CreateDocumentRequest.builder() \
-        .request_body(CreateDocumentRequestBody.builder()
-                      .folder_token(folder_token)
-                      .title(title)
-                      .build()) \
-        .build()
+    client = get_lark_client(app_id, app_secret)
 
     # 发起请求
-    response: CreateDocumentResponse = client.docx.v1.document.create(request)
+    response: docx_v1.CreateDocumentResponse = client.docx.v1.document.create(
+        build_create_document_request(folder_token, title))
+    return handle_response("client.docx.v1.document.create", response)
 
-    # 处理失败返回
-    if not response.success():
-        fail_message = f"client.docx.v1.document.create failed, code: {response.code}, msg: {response.msg}, log_id: {response.get_log_id()}, resp: \n{json.dumps(json.loads(response.raw.content), indent=4, ensure_ascii=False)}"
-        lark.logger.error(fail_message)
-        return fail_message
 
-    # 处理业务结果
-    lark.logger.info(lark.JSON.marshal(response.data, indent=4))
-    return lark.JSON.marshal(response.data, indent=4)
\ No newline at end of file
+@async_variant(create_document)
+async def acreate_document(folder_token, title, app_id, app_secret):
+    client = await aget_lark_client(app_id, app_secret)
+
+    # 发起请求
+    response: docx_v1.CreateDocumentResponse = await client.docx.v1.document.acreate(
+        build_create_document_request(folder_token, title))
+    return handle_response("client.docx.v1.document.create", response)
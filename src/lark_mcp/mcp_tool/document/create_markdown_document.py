@@ -0,0 +1,165 @@
+import os
+import uuid
+from typing import Any, List, Optional, Tuple
+
+from pydantic import Field
+from lark_mcp.mcp_tool.document.create_document import build_create_document_request
+from lark_mcp.mcp_tool.document.markdown import MarkdownNode, parse_markdown
+from lark_mcp.common.client_pool import get_lark_client, aget_lark_client
+from lark_mcp.common.response import handle_response, dumps
+from lark_mcp.common.batch import chunked, chunk_error, gather_with_limit
+from lark_mcp.common.jobs import job_progress
+from lark_mcp.common.async_tool import async_variant
+from lark_mcp.common.lazy_import import lazy_import
+from lark_mcp.common.log import logger
+
+docx_v1 = lazy_import("lark_oapi.api.docx.v1")
+rate_limiter = lazy_import("lark_mcp.common.rate_limiter")
+
+# 写入配置，可通过环境变量覆盖
+# 同时写入不同父块的请求数上限，只限制同时进行的请求数，不限制速率
+DOCUMENT_WRITE_CONCURRENCY = int(os.getenv("LARK_MCP_DOCUMENT_WRITE_CONCURRENCY", "3"))
+# 单个文档每秒的编辑请求数，飞书限制单文档每秒最多3次编辑
+DOCUMENT_EDIT_QPS = float(os.getenv("LARK_MCP_DOCUMENT_EDIT_QPS", "3"))
+
+# 创建子块接口单次请求的子块数量上限
+DOCUMENT_CHILDREN_LIMIT = 50
+
+
+def build_create_block_children_request(document_id: str, block_id: str,
+                                        children: "List[docx_v1.Block]"
+                                        ) -> "docx_v1.CreateDocumentBlockChildrenRequest":
+    # 构造请求对象，不指定index时追加到父块末尾；client_token保证重试时不会重复插入
+    request: docx_v1.CreateDocumentBlockChildrenRequest = docx_v1.CreateDocumentBlockChildrenRequest.builder() \
+        .document_id(document_id) \
+        .block_id(block_id) \
+        .document_revision_id(-1) \
+        .client_token(str(uuid.uuid4())) \
+        .request_body(docx_v1.CreateDocumentBlockChildrenRequestBody.builder()
+                      .children(children)
+                      .build()) \
+        .build()
+    return request
+
+
+class DocumentWriter(object):
+    """
+    把Markdown块树分批写入文档
+
+    同一父块下的子块必须按顺序追加，每批最多50个；一批创建成功后才知道子块的block_id，
+    其下嵌套的子块作为下一层的写入任务，不同父块的写入互不影响，可以并发进行。
+    某一批失败时该父块剩余的批次不再写入，避免顺序错乱。
+    所有写入请求共用一个令牌桶，按 DOCUMENT_EDIT_QPS 控制该文档的编辑速率。
+    """
+
+    def __init__(self, document_id: str, nodes: List[MarkdownNode]):
+        self.document_id = document_id
+        # 不预留突发的令牌，请求之间均匀间隔
+        self.edits = rate_limiter.TokenBucket(DOCUMENT_EDIT_QPS, 1, adaptive=False)
+        self.total = _count(nodes)
+        self.created = 0
+        self.requests = 0
+        self.errors: List[dict] = []
+        job_progress(0, total=self.total)
+
+    def request(self, parent_id: str, batch: List[MarkdownNode]) -> "docx_v1.CreateDocumentBlockChildrenRequest":
+        self.requests += 1
+        return build_create_block_children_request(self.document_id, parent_id, [node.block for node in batch])
+
+    def add_batch(self, parent_id: str, index: int, batch: List[MarkdownNode],
+                  result: Any) -> Optional[List[Tuple[str, List[MarkdownNode]]]]:
+        """记录一批的写入结果，返回下一层的写入任务 (父块ID, 子块)；失败时返回None"""
+        error = chunk_error("client.docx.v1.document_block_children.create", index, result,
+                            parent_block_id=parent_id, blocks=_count(batch))
+        if error is not None:
+            self.errors.append(error)
+            return None
+        self.created += len(batch)
+        job_progress(len(batch))
+        return [(block.block_id, node.children)
+                for node, block in zip(batch, result.data.children or []) if node.children]
+
+    def result(self, title: str) -> str:
+        result = {"document_id": self.document_id, "title": title, "blocks": self.created, "total": self.total,
+                  "requests": self.requests}
+        if self.errors:
+            result["errors"] = self.errors
+        logger.info("create document", document_id=self.document_id, blocks=self.created, total=self.total,
+                    requests=self.requests)
+        return dumps(result)
+
+
+def _count(nodes: List[MarkdownNode]) -> int:
+    return sum(1 + _count(node.children) for node in nodes)
+
+
+def create_markdown_document(
+        folder_token: str = Field(None, description="文件夹token, 没有传入的话在根目录中创建"),
+        title: str = Field(..., description="文档标题"),
+        markdown: str = Field(..., description="Markdown格式的文档正文，支持标题、列表、待办、引用、代码块、分割线和常用行内样式"),
+        app_id: Optional[str] = Field(None, description="应用唯一标识"),
+        app_secret: Optional[str] = Field(None, description="应用密钥")
+):
+    """创建文档并写入Markdown格式的正文"""
+    client = get_lark_client(app_id, app_secret)
+
+    # 发起请求
+    response: docx_v1.CreateDocumentResponse = client.docx.v1.document.create(
+        build_create_document_request(folder_token, title))
+    if not response.success():
+        return handle_response("client.docx.v1.document.create", response)
+    nodes = parse_markdown(markdown)
+    writer = DocumentWriter(response.data.document.document_id, nodes)
+
+    # 文档ID即根块ID
+    tasks = [(writer.document_id, nodes)]
+    while tasks:
+        parent_id, children = tasks.pop(0)
+        for index, batch in enumerate(chunked(children, DOCUMENT_CHILDREN_LIMIT)):
+            writer.edits.acquire()
+            try:
+                result = client.docx.v1.document_block_children.create(writer.request(parent_id, batch))
+            except Exception as err:
+                result = err
+            nested = writer.add_batch(parent_id, index, batch, result)
+            if nested is None:
+                break
+            tasks.extend(nested)
+    return writer.result(title)
+
+
+@async_variant(create_markdown_document)
+async def acreate_markdown_document(folder_token, title, markdown, app_id, app_secret):
+    client = await aget_lark_client(app_id, app_secret)
+
+    # 发起请求
+    response: docx_v1.CreateDocumentResponse = await client.docx.v1.document.acreate(
+        build_create_document_request(folder_token, title))
+    if not response.success():
+        return handle_response("client.docx.v1.document.create", response)
+    nodes = parse_markdown(markdown)
+    writer = DocumentWriter(response.data.document.document_id, nodes)
+
+    async def write(parent_id: str, children: List[MarkdownNode]) -> List[Tuple[str, List[MarkdownNode]]]:
+        # 同一父块下的批次按顺序写入
+        nested = []
+        for index, batch in enumerate(chunked(children, DOCUMENT_CHILDREN_LIMIT)):
+            await writer.edits.aacquire()
+            try:
+                result = await client.docx.v1.document_block_children.acreate(writer.request(parent_id, batch))
+            except Exception as err:
+                result = err
+            tasks = writer.add_batch(parent_id, index, batch, result)
+            if tasks is None:
+                break
+            nested.extend(tasks)
+        return nested
+
+    # 逐层写入，同一层不同父块的子块并发写入
+    level = [(writer.document_id, nodes)]
+    while level:
+        # 进度按写入的块数上报，不按父块数
+        results = await gather_with_limit((write(parent_id, children) for parent_id, children in level),
+                                          DOCUMENT_WRITE_CONCURRENCY, progress=False)
+        level = [task for tasks in results if not isinstance(tasks, BaseException) for task in tasks]
+    return writer.result(title)
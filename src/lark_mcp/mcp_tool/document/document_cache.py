@@ -0,0 +1,157 @@
+import json
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Set, Tuple
+
+from lark_mcp.common.sqlite_store import SQLiteStore
+
+# 文档内容缓存配置，可通过环境变量覆盖；配置 LARK_MCP_DOCUMENT_CACHE_DB 后缓存同时压缩写入本地SQLite文件
+DOCUMENT_CACHE_MAX_BYTES = int(os.getenv("LARK_MCP_DOCUMENT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+DOCUMENT_CACHE_TTL = int(os.getenv("LARK_MCP_DOCUMENT_CACHE_TTL", "86400"))
+DOCUMENT_CACHE_DB = os.getenv("LARK_MCP_DOCUMENT_CACHE_DB", "")
+
+
+def document_key(app_id: Optional[str], document_id: str, revision_id: int, *params: Hashable) -> Tuple:
+    """(租户, 文档ID, 版本号, 读取参数) 的缓存key"""
+    return app_id or "", document_id, revision_id, params
+
+
+class DocumentCache(object):
+    """
+    按租户和文档版本缓存文档内容的读取结果
+
+    文档的 revision_id 不变时内容不变，因此条目只需按版本失效：同一文档出现新版本时删除旧版本的条目。
+    内存中按总字节数做 LRU 淘汰；配置了SQLite文件时内容用zlib压缩后写入文件，进程重启后仍可复用。
+    """
+
+    def __init__(self, max_bytes: int = DOCUMENT_CACHE_MAX_BYTES, ttl: int = DOCUMENT_CACHE_TTL,
+                 db_path: str = DOCUMENT_CACHE_DB):
+        self._max_bytes = max_bytes
+        self._ttl = ttl
+        self._entries: "OrderedDict[Tuple, Tuple[str, int, float]]" = OrderedDict()
+        # (租户, 文档ID) -> (最新版本号, 该版本的缓存key)
+        self._revisions: Dict[Tuple[str, str], Tuple[int, Set[Tuple]]] = {}
+        self._store = SQLiteStore(db_path, "document_cache") if db_path else None
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._store_hits = 0
+        self._bytes_saved = 0
+
+    def get(self, key: Tuple) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] < time.monotonic():
+                self._remove(key)
+                self._evictions += 1
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                self._bytes_saved += entry[1]
+                return entry[0]
+
+        value = self._load(key)
+        with self._lock:
+            if value is None:
+                self._misses += 1
+                return None
+            self._store_hits += 1
+            self._hits += 1
+            self._bytes_saved += len(value.encode("utf-8"))
+        return value
+
+    def set(self, key: Tuple, value: str) -> None:
+        self._put(key, value, time.monotonic() + self._ttl)
+        if self._store is not None:
+            self._store.set(_store_key(key), zlib.compress(value.encode("utf-8")), time.time() + self._ttl)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._revisions.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self._max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / lookups, 4) if lookups else 0.0,
+                "bytes_saved": self._bytes_saved,
+                "evictions": self._evictions,
+                "persistent": self._store is not None,
+                "store_hits": self._store_hits,
+            }
+
+    def _load(self, key: Tuple) -> Optional[str]:
+        if self._store is None:
+            return None
+        row = self._store.get(_store_key(key))
+        if row is None:
+            return None
+        value = zlib.decompress(row[0]).decode("utf-8")
+        self._put(key, value, time.monotonic() + row[1] - time.time())
+        return value
+
+    def _put(self, key: Tuple, value: str, expire_at: float) -> None:
+        size = len(value.encode("utf-8"))
+        if size > self._max_bytes:
+            return
+        document, revision_id = key[:2], key[2]
+        with self._lock:
+            # 先移除同一key的旧条目，它可能是该版本唯一的条目，移除时会一并删除版本记录
+            self._remove(key)
+            revision = self._revisions.get(document)
+            if revision is not None and revision[0] > revision_id:
+                # 已缓存更新的版本，旧版本的内容不再写入
+                return
+            if revision is None or revision[0] < revision_id:
+                # 文档出现新版本，旧版本的条目全部失效
+                for stale in revision[1] if revision is not None else ():
+                    self._remove(stale, forget=False)
+                revision = self._revisions[document] = (revision_id, set())
+            self._entries[key] = (value, size, expire_at)
+            revision[1].add(key)
+            self._bytes += size
+            while self._bytes > self._max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._evictions += 1
+
+    def _remove(self, key: Tuple, forget: bool = True) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= entry[1]
+        revision = self._revisions.get(key[:2])
+        if forget and revision is not None and revision[0] == key[2]:
+            revision[1].discard(key)
+            if not revision[1]:
+                # 文档的条目都已淘汰或过期，不再保留它的版本记录
+                del self._revisions[key[:2]]
+
+
+def _store_key(key: Hashable) -> str:
+    return json.dumps(key, ensure_ascii=False, separators=(",", ":"))
+
+
+# 进程级共享的文档内容缓存
+_document_cache = DocumentCache()
+
+
+def get_document_cache() -> DocumentCache:
+    return _document_cache
+
+
+def get_document_cache_stats() -> Dict[str, int]:
+    """文档内容缓存的命中率、节省的字节数和淘汰计数"""
+    return _document_cache.stats()
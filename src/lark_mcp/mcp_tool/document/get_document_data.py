@@ -1,8 +1,18 @@
-import json
-import lark_oapi as lark
-from lark_oapi.api.docx.v1 import *
 from pydantic import Field
 from typing import Optional
+from lark_mcp.common.client_pool import get_lark_client, aget_lark_client
+from lark_mcp.common.response import handle_response
+from lark_mcp.common.async_tool import async_variant
+from lark_mcp.common.lazy_import import lazy_import
+
+docx_v1 = lazy_import("lark_oapi.api.docx.v1")
+
+
+def build_get_document_request(document_id: str) -> "docx_v1.GetDocumentRequest":
+    # 构造请求对象
+    return docx_v1.GetDocumentRequest.builder() \
+        .document_id(document_id) \
+        .build()
 
 
 def get_document(
@@ -11,26 +21,17 @@ def get_document(
         app_secret: Optional[str] = Field(None, description="应用密钥")
 ):
     """获取文档内容"""
-    client = lark.Client.builder() \
-        .app_id(app_id) \
-        .app_secret(app_secret) \
-        .log_level(lark.LogLevel.DEBUG) \
-        .build()
-
-    # 构造请求对象
-    request: GetDocumentRequest = GetDocumentRequest.builder() \
-        .document_id(document_id) \
-        .build()
+    client = get_lark_client(app_id, app_secret)
 
     # 发起请求
-    response: GetDocumentResponse = client.docx.v1.document.get(request)
+    response: docx_v1.GetDocumentResponse = client.docx.v1.document.get(build_get_document_request(document_id))
+    return handle_response("client.docx.v1.document.get", response)
+
 
-    # 处理失败返回
-    if not response.success():
-        fail_message = f"client.docx.v1.document.get failed, code: {response.code}, msg: {response.msg}, log_id: {response.get_log_id()}, resp: \n{json.dumps(json.loads(response.raw.content), indent=4, ensure_ascii=False)}"
-        lark.logger.error(fail_message)
-        return fail_message
+@async_variant(get_document)
+async def aget_document(document_id, app_id, app_secret):
+    client = await aget_lark_client(app_id, app_secret)
 
-    # 处理业务结果
-    lark.logger.info(lark.JSON.marshal(response.data, indent=4))
-    return lark.JSON.marshal(response.data, indent=4)
\ No newline at end of file
+    # 发起请求
+    response: docx_v1.GetDocumentResponse = await client.docx.v1.document.aget(build_get_document_request(document_id))
+    return handle_response("client.docx.v1.document.get", response)
@@ -0,0 +1,302 @@
+import re
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import quote, unquote
+
+from lark_mcp.common.lazy_import import lazy_import
+
+docx_v1 = lazy_import("lark_oapi.api.docx.v1")
+
+
+# 飞书文档块类型，见 https://open.feishu.cn/document/server-docs/docs/docs/docx-v1/data-structure/block
+PAGE, TEXT, CODE, QUOTE, TODO, DIVIDER, FILE, IMAGE, TABLE, TABLE_CELL = 1, 2, 14, 15, 17, 22, 23, 27, 31, 32
+BULLET, ORDERED = 12, 13
+# 一级到九级标题的块类型为3到11
+HEADING_TYPES = {block_type: block_type - 2 for block_type in range(3, 12)}
+
+# 块类型 -> 块中文本内容所在的字段
+TEXT_FIELDS = {PAGE: "page", TEXT: "text", BULLET: "bullet", ORDERED: "ordered", CODE: "code", QUOTE: "quote",
+               TODO: "todo", **{block_type: f"heading{level}" for block_type, level in HEADING_TYPES.items()}}
+LIST_TYPES = {BULLET, ORDERED, TODO}
+
+
+def heading_level(block: "docx_v1.Block") -> int:
+    """标题块的级别，非标题块返回0"""
+    return HEADING_TYPES.get(block.block_type, 0)
+
+
+def block_text(block: "docx_v1.Block", markdown: bool = False) -> str:
+    """块中的文本内容，没有文本的块返回空字符串"""
+    field = TEXT_FIELDS.get(block.block_type)
+    text: Optional[docx_v1.Text] = getattr(block, field, None) if field else None
+    if text is None:
+        return ""
+    return "".join(_element_text(element, markdown) for element in text.elements or [])
+
+
+def _element_text(element, markdown: bool) -> str:
+    if element.text_run is not None:
+        content = element.text_run.content or ""
+        style = element.text_run.text_element_style
+        if not markdown or style is None or not content.strip():
+            return content
+        if style.inline_code:
+            content = f"`{content}`"
+        if style.bold:
+            content = f"**{content}**"
+        if style.italic:
+            content = f"*{content}*"
+        if style.strikethrough:
+            content = f"~~{content}~~"
+        if style.link is not None and style.link.url:
+            content = f"[{content}]({unquote(style.link.url)})"
+        return content
+    if element.mention_user is not None:
+        return f"@{element.mention_user.user_id}"
+    if element.mention_doc is not None:
+        title = element.mention_doc.title or element.mention_doc.token
+        return f"[{title}]({unquote(element.mention_doc.url)})" if markdown and element.mention_doc.url else title
+    if element.equation is not None:
+        content = (element.equation.content or "").strip()
+        return f"${content}$" if markdown else content
+    return ""
+
+
+class _PendingTable(object):
+    def __init__(self, block: "docx_v1.Block"):
+        self.block_id = block.block_id
+        self.cells: List[str] = list(block.table.cells or [])
+        self.columns = max(1, block.table.property.column_size or 1) if block.table.property else 1
+        self.contents: Dict[str, List[str]] = {cell: [] for cell in self.cells}
+
+
+class BlockRenderer(object):
+    """
+    按文档顺序把飞书文档块逐个转换为紧凑的Markdown或纯文本
+
+    块可以分多页输入，只保留列表缩进、有序列表编号和未输出完的表格等少量状态；
+    表格要等单元格内容全部读完才能输出，由 close_pending 在表格之后的第一个块到来时输出。
+    """
+
+    def __init__(self, markdown: bool = True):
+        self.markdown = markdown
+        # 列表块的缩进层级
+        self._list_depth: Dict[str, int] = {}
+        # parent_id -> (上一个同级块的类型, 有序列表编号)
+        self._ordered: Dict[str, Tuple[int, int]] = {}
+        # 表格内的块 -> 所属单元格
+        self._cell_of: Dict[str, str] = {}
+        self._table: Optional[_PendingTable] = None
+
+    @property
+    def pending_block_id(self) -> Optional[str]:
+        """尚未输出的表格的块ID"""
+        return self._table.block_id if self._table is not None else None
+
+    def close_pending(self, block: "Optional[docx_v1.Block]" = None) -> List[str]:
+        """block不属于未输出的表格时（或文档结束时）输出该表格"""
+        table = self._table
+        if table is None:
+            return []
+        if block is not None and (block.parent_id == table.block_id or block.parent_id in table.contents
+                                  or block.parent_id in self._cell_of):
+            return []
+        self._table = None
+        self._cell_of.clear()
+        rows = [[" ".join(table.contents[cell]) for cell in table.cells[start:start + table.columns]]
+                for start in range(0, len(table.cells), table.columns)]
+        if not self.markdown:
+            return ["\t".join(row) for row in rows]
+        lines = ["| " + " | ".join(cell.replace("|", "\\|") for cell in row) + " |" for row in rows]
+        if lines:
+            lines.insert(1, "| " + " | ".join(["---"] * table.columns) + " |")
+        return lines
+
+    def render(self, block: "docx_v1.Block") -> List[str]:
+        """转换一个块，返回输出的行"""
+        block_type = block.block_type
+        if block_type == TABLE and block.table is not None:
+            self._table = _PendingTable(block)
+            return []
+        if self._table is not None:
+            cell = block.parent_id if block.parent_id in self._table.contents else self._cell_of.get(block.parent_id)
+            if cell is not None:
+                # 表格内的块只累积文本，表格结束时一起输出
+                self._cell_of[block.block_id] = cell
+                text = block_text(block, self.markdown)
+                if text:
+                    self._table.contents[cell].append(text)
+                return []
+
+        text = block_text(block, self.markdown)
+        number = self._ordered_number(block)
+        if block_type == PAGE:
+            return [f"# {text}" if self.markdown else text] if text else []
+        if block_type in HEADING_TYPES:
+            return ["#" * HEADING_TYPES[block_type] + f" {text}" if self.markdown else text]
+        if block_type in LIST_TYPES:
+            depth = self._list_depth.get(block.parent_id, -1) + 1
+            self._list_depth[block.block_id] = depth
+            if block_type == ORDERED:
+                marker = f"{number}."
+            elif block_type == TODO:
+                done = block.todo is not None and block.todo.style is not None and block.todo.style.done
+                marker = "- [x]" if done else "- [ ]"
+            else:
+                marker = "-"
+            return ["  " * depth + f"{marker} {text}"]
+        if block_type == CODE:
+            return [f"```\n{text}\n```" if self.markdown else text]
+        if block_type == QUOTE:
+            return [f"> {text}" if self.markdown else text]
+        if block_type == DIVIDER:
+            return ["---"] if self.markdown else []
+        if block_type == IMAGE and block.image is not None:
+            return [f"![image]({block.image.token})"] if self.markdown else []
+        if block_type == FILE and block.file is not None:
+            return [f"[{block.file.name}]({block.file.token})" if self.markdown else block.file.name or ""]
+        return [text] if text else []
+
+    def _ordered_number(self, block: "docx_v1.Block") -> int:
+        # 同一父块下连续的有序列表块依次编号，中间出现其他块时重新从1开始
+        last_type, number = self._ordered.get(block.parent_id, (0, 0))
+        number = number + 1 if block.block_type == ORDERED and last_type == ORDERED else 1
+        self._ordered[block.parent_id] = (block.block_type, number)
+        return number
+
+
+# Markdown -> 飞书文档块
+
+_FENCE = re.compile(r"^\s*(```|~~~)")
+_HEADING = re.compile(r"^(#{1,9})\s+(.*?)\s*#*\s*$")
+_DIVIDER = re.compile(r"^\s*([-*_])(\s*\1){2,}\s*$")
+_LIST_ITEM = re.compile(r"^(\s*)([-*+]|\d+[.)])\s+(?:\[([ xX])\]\s+)?(.*)$")
+_QUOTE = re.compile(r"^\s*>\s?(.*)$")
+_TABLE_SEPARATOR = re.compile(r"^\s*\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?\s*$")
+# 行内样式：`代码`、**加粗**、~~删除线~~、*斜体*、[文字](链接)
+_INLINE = re.compile(r"`([^`]+)`|\*\*(.+?)\*\*|~~(.+?)~~|(?<![*\w])[*_](?![*_\s])(.+?)(?<![\s*_])[*_](?![*\w])"
+                     r"|\[([^\]]+)\]\(([^)\s]+)\)")
+
+
+class MarkdownNode(NamedTuple):
+    block: "docx_v1.Block"
+    # 嵌套在该块下的子块（列表的子项）
+    children: List["MarkdownNode"]
+
+
+def _text_run(content: str, **style) -> "docx_v1.TextElement":
+    run = docx_v1.TextRun.builder().content(content)
+    if style:
+        run.text_element_style(_element_style(**style))
+    return docx_v1.TextElement.builder().text_run(run.build()).build()
+
+
+def _element_style(link: Optional[str] = None, **flags) -> "docx_v1.TextElementStyle":
+    builder = docx_v1.TextElementStyle.builder()
+    for name, value in flags.items():
+        getattr(builder, name)(value)
+    if link:
+        # 链接需要URL编码
+        builder.link(docx_v1.Link.builder().url(quote(link, safe="")).build())
+    return builder.build()
+
+
+def inline_elements(text: str) -> "List[docx_v1.TextElement]":
+    """把一行Markdown文本按行内样式拆分为文本元素"""
+    elements, position = [], 0
+    for match in _INLINE.finditer(text):
+        if match.start() > position:
+            elements.append(_text_run(text[position:match.start()]))
+        code, bold, strikethrough, italic, label, url = match.groups()
+        if code is not None:
+            elements.append(_text_run(code, inline_code=True))
+        elif bold is not None:
+            elements.append(_text_run(bold, bold=True))
+        elif strikethrough is not None:
+            elements.append(_text_run(strikethrough, strikethrough=True))
+        elif italic is not None:
+            elements.append(_text_run(italic, italic=True))
+        else:
+            elements.append(_text_run(label, link=url))
+        position = match.end()
+    if position < len(text):
+        elements.append(_text_run(text[position:]))
+    return elements
+
+
+def text_block(block_type: int, text: str, style: "Optional[docx_v1.TextStyle]" = None,
+               inline: bool = True) -> "docx_v1.Block":
+    """带文本内容的块，block_type 决定文本所在的字段"""
+    elements = inline_elements(text) if inline else [_text_run(text)]
+    body = docx_v1.Text.builder().elements(elements)
+    if style is not None:
+        body.style(style)
+    builder = docx_v1.Block.builder().block_type(block_type)
+    getattr(builder, TEXT_FIELDS[block_type])(body.build())
+    return builder.build()
+
+
+def parse_markdown(markdown: str) -> List[MarkdownNode]:
+    """
+    把Markdown转换为飞书文档块树
+
+    支持标题、段落、无序/有序/待办列表（按缩进嵌套）、引用、代码块、分割线和常用行内样式；
+    表格按行转换为文本段落。每个非空行对应一个块。
+    """
+    nodes: List[MarkdownNode] = []
+    # 列表嵌套的 (缩进, 节点)
+    stack: List[Tuple[int, MarkdownNode]] = []
+    lines = markdown.expandtabs(4).splitlines()
+    index = 0
+    while index < len(lines):
+        line = lines[index]
+        index += 1
+        if not line.strip():
+            stack.clear()
+            continue
+
+        fence = _FENCE.match(line)
+        if fence:
+            code = []
+            while index < len(lines) and not lines[index].lstrip().startswith(fence.group(1)):
+                code.append(lines[index])
+                index += 1
+            index += 1
+            stack.clear()
+            if code:
+                nodes.append(MarkdownNode(text_block(CODE, "\n".join(code), inline=False), []))
+            continue
+
+        item = _LIST_ITEM.match(line)
+        if item and not _DIVIDER.match(line):
+            indent, marker, checked, text = item.groups()
+            if checked is not None:
+                block = text_block(TODO, text, docx_v1.TextStyle.builder().done(checked != " ").build())
+            else:
+                block = text_block(BULLET if marker in "-*+" else ORDERED, text)
+            node = MarkdownNode(block, [])
+            while stack and stack[-1][0] >= len(indent):
+                stack.pop()
+            (stack[-1][1].children if stack else nodes).append(node)
+            stack.append((len(indent), node))
+            continue
+
+        stack.clear()
+        heading = _HEADING.match(line)
+        if heading:
+            if heading.group(2):
+                level = len(heading.group(1))
+                nodes.append(MarkdownNode(text_block(level + 2, heading.group(2)), []))
+        elif _DIVIDER.match(line):
+            divider = docx_v1.Block.builder().block_type(DIVIDER).divider(docx_v1.Divider.builder().build()).build()
+            nodes.append(MarkdownNode(divider, []))
+        elif _QUOTE.match(line):
+            text = _QUOTE.match(line).group(1)
+            if text.strip():
+                nodes.append(MarkdownNode(text_block(QUOTE, text), []))
+        elif line.lstrip().startswith("|"):
+            if not _TABLE_SEPARATOR.match(line):
+                cells = [cell.strip() for cell in line.strip().strip("|").split("|")]
+                nodes.append(MarkdownNode(text_block(TEXT, "\t".join(cells)), []))
+        else:
+            nodes.append(MarkdownNode(text_block(TEXT, line.strip()), []))
+    return nodes
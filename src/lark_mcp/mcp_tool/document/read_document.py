@@ -0,0 +1,244 @@
+import asyncio
+from typing import List, Literal, Optional, Tuple
+
+from mcp.server.fastmcp import Context
+from pydantic import Field
+from lark_mcp.mcp_tool.document.markdown import BlockRenderer, block_text, heading_level
+from lark_mcp.mcp_tool.document.document_cache import document_key, get_document_cache
+from lark_mcp.mcp_tool.document.get_document_data import build_get_document_request
+from lark_mcp.common.client_pool import get_lark_client, aget_lark_client
+from lark_mcp.common.response import handle_response, dumps, next_page_token
+from lark_mcp.common.async_tool import async_variant, can_stream
+from lark_mcp.common.lazy_import import lazy_import
+from lark_mcp.common.log import logger
+
+docx_v1 = lazy_import("lark_oapi.api.docx.v1")
+
+# 单次获取文档块的数量上限
+DOCUMENT_BLOCK_PAGE_SIZE = 500
+
+
+def build_list_document_block_request(document_id: str, page_token: Optional[str] = None,
+                                      page_size: int = DOCUMENT_BLOCK_PAGE_SIZE,
+                                      revision_id: int = -1) -> "docx_v1.ListDocumentBlockRequest":
+    # 构造请求对象，document_revision_id为-1表示最新版本
+    builder = docx_v1.ListDocumentBlockRequest.builder() \
+        .document_id(document_id) \
+        .page_size(page_size) \
+        .document_revision_id(revision_id)
+    if page_token:
+        builder.page_token(page_token)
+    request: docx_v1.ListDocumentBlockRequest = builder.build()
+    return request
+
+
+def estimate_tokens(text: str) -> int:
+    # 按UTF-8字节数估算：中文约每字1个token，英文约每3个字符1个token，估算偏保守
+    return (len(text.encode("utf-8")) + 2) // 3
+
+
+def parse_cursor(cursor: Optional[str]) -> Optional[Tuple[Optional[str], Optional[str], int]]:
+    """cursor格式为 page_token|block_id|章节标题级别，返回(page_token, 起始块ID, 章节标题级别)；格式不正确时返回None"""
+    if not cursor:
+        return None, None, 0
+    parts = cursor.rsplit("|", 2)
+    if len(parts) != 3 or not parts[1] or not parts[2].isdigit():
+        return None
+    return parts[0] or None, parts[1], int(parts[2])
+
+
+def read_cache_key(app_id: Optional[str], document_id: str, response: "docx_v1.GetDocumentResponse",
+                   output_format: str, max_tokens: int, section: Optional[str], cursor: Optional[str]) -> Tuple:
+    # 文档版本号来自获取文档信息的响应，读取参数相同且版本未变时结果相同
+    return document_key(app_id, document_id, response.data.document.revision_id,
+                        "read", output_format, max_tokens, section, cursor)
+
+
+class DocumentReader(object):
+    """
+    逐页读取文档块并转换为文本
+
+    每页块转换后即丢弃，只保留输出的文本；达到max_tokens时停止，返回可继续读取的cursor。
+    指定section时只输出标题包含section的章节（到下一个同级或更高级标题为止），章节结束后不再获取后续块。
+    """
+
+    def __init__(self, output_format: str, max_tokens: int, section: Optional[str], cursor: Optional[str]):
+        self.renderer = BlockRenderer(markdown=output_format == "markdown")
+        self.max_tokens = max_tokens
+        self.section = section.strip().lower() if section else None
+        self.page_token, self._resume_block_id, self.section_level = parse_cursor(cursor)
+        self.lines: List[str] = []
+        self.tokens = 0
+        self.blocks = 0
+        self.done = False
+        self.next_cursor: Optional[str] = None
+        self._pending_page_token: Optional[str] = None
+
+    def feed_page(self, page_token: Optional[str], response: "docx_v1.ListDocumentBlockResponse") -> List[str]:
+        """处理一页文档块，返回本页输出的行；读取结束时done为True"""
+        accepted: List[str] = []
+        for block in response.data.items or []:
+            # 从cursor继续读取时跳过已经输出过的块
+            if self._resume_block_id is not None:
+                if block.block_id != self._resume_block_id:
+                    continue
+                self._resume_block_id = None
+
+            pending_block_id = self.renderer.pending_block_id
+            if not self._emit(self.renderer.close_pending(block), accepted):
+                return self._stop(self._pending_page_token, pending_block_id, accepted)
+
+            level = heading_level(block)
+            if self.section and level:
+                if self.section_level and level <= self.section_level:
+                    # 章节结束
+                    self.done = True
+                    return accepted
+                if not self.section_level and self.section in block_text(block).lower():
+                    self.section_level = level
+
+            self.blocks += 1
+            lines = self.renderer.render(block)
+            if self.renderer.pending_block_id == block.block_id:
+                self._pending_page_token = page_token
+            if not self._emit(lines, accepted):
+                return self._stop(page_token, block.block_id, accepted)
+
+        # 没有下一页的page_token时即为文档末尾
+        if next_page_token(response.data, "page_token") is None:
+            pending_block_id = self.renderer.pending_block_id
+            if not self._emit(self.renderer.close_pending(), accepted):
+                return self._stop(self._pending_page_token, pending_block_id, accepted)
+            self.done = True
+        return accepted
+
+    def result(self, document_id: str, streamed: bool = False) -> str:
+        result = {"document_id": document_id}
+        if not streamed:
+            result["content"] = "\n".join(self.lines)
+        result.update({"blocks": self.blocks, "tokens": self.tokens, "truncated": self.next_cursor is not None})
+        if self.next_cursor is not None:
+            result["next_cursor"] = self.next_cursor
+        if self.section and not self.section_level:
+            result["section_found"] = False
+        data = dumps(result)
+        logger.info("read document", document_id=document_id, blocks=self.blocks, tokens=self.tokens)
+        return data
+
+    def _in_section(self) -> bool:
+        return self.section is None or self.section_level > 0
+
+    def _emit(self, lines: List[str], accepted: List[str]) -> bool:
+        """输出一个块的全部行；超出max_tokens时返回False。一个块只会整体输出或整体不输出"""
+        if not lines or not self._in_section():
+            return True
+        cost = sum(estimate_tokens(line) + 1 for line in lines)
+        # 第一个块超出预算时仍然输出，保证每次调用都有进展
+        if self.tokens + cost > self.max_tokens and self.tokens > 0:
+            return False
+        self.tokens += cost
+        accepted.extend(lines)
+        return True
+
+    def _stop(self, page_token: Optional[str], block_id: str, accepted: List[str]) -> List[str]:
+        self.done = True
+        self.next_cursor = f"{page_token or ''}|{block_id}|{self.section_level}"
+        return accepted
+
+
+def read_document(
+        document_id: str = Field(..., description="文档ID"),
+        output_format: Literal["markdown", "text"] = Field("markdown", description="输出格式：markdown或纯文本text"),
+        max_tokens: int = Field(8000, description="最多返回的内容长度（估算的token数），超出时返回next_cursor", ge=1),
+        section: Optional[str] = Field(None, description="只读取标题包含该文字的章节，到下一个同级或更高级标题为止"),
+        cursor: Optional[str] = Field(None, description="继续读取的位置，填写上次返回的next_cursor"),
+        stream: bool = Field(False, description="是否通过进度通知逐页推送内容（需客户端支持进度通知），最终结果只包含汇总信息"),
+        app_id: Optional[str] = Field(None, description="应用唯一标识"),
+        app_secret: Optional[str] = Field(None, description="应用密钥")
+):
+    """读取文档正文，转换为Markdown或纯文本，支持按章节读取和按长度截断后继续读取"""
+    if parse_cursor(cursor) is None:
+        return f"invalid cursor: {cursor}"
+    client = get_lark_client(app_id, app_secret)
+    reader = DocumentReader(output_format, max_tokens, section, cursor)
+
+    # 先获取文档的最新版本号，版本未变时直接返回缓存的内容
+    document: docx_v1.GetDocumentResponse = client.docx.v1.document.get(build_get_document_request(document_id))
+    if not document.success():
+        return handle_response("client.docx.v1.document.get", document)
+    key = read_cache_key(app_id, document_id, document, output_format, max_tokens, section, cursor)
+    cached = get_document_cache().get(key)
+    if cached is not None:
+        return cached
+
+    page_token = reader.page_token
+    while True:
+        # 发起请求，固定读取同一版本，翻页过程中文档被修改也不会混入新版本的块
+        response: docx_v1.ListDocumentBlockResponse = client.docx.v1.document_block.list(
+            build_list_document_block_request(document_id, page_token, revision_id=key[2]))
+        if not response.success():
+            return handle_response("client.docx.v1.document_block.list", response)
+        reader.lines.extend(reader.feed_page(page_token, response))
+        if reader.done:
+            data = reader.result(document_id)
+            get_document_cache().set(key, data)
+            return data
+        # feed_page 在没有下一页时已结束读取
+        page_token = next_page_token(response.data, "page_token")
+
+
+@async_variant(read_document)
+async def aread_document(document_id, output_format, max_tokens, section, cursor, stream, app_id, app_secret,
+                         ctx: Context = None):
+    if parse_cursor(cursor) is None:
+        return f"invalid cursor: {cursor}"
+    client = await aget_lark_client(app_id, app_secret)
+    reader = DocumentReader(output_format, max_tokens, section, cursor)
+    streamed = stream and can_stream(ctx)
+
+    # 逐页推送的结果不包含内容，不经过缓存
+    key, revision_id = None, -1
+    if not streamed:
+        document: docx_v1.GetDocumentResponse = await client.docx.v1.document.aget(
+            build_get_document_request(document_id))
+        if not document.success():
+            return handle_response("client.docx.v1.document.get", document)
+        key = read_cache_key(app_id, document_id, document, output_format, max_tokens, section, cursor)
+        cached = get_document_cache().get(key)
+        if cached is not None:
+            return cached
+        revision_id = key[2]
+
+    def fetch(token: Optional[str]):
+        return asyncio.ensure_future(client.docx.v1.document_block.alist(
+            build_list_document_block_request(document_id, token, revision_id=revision_id)))
+
+    page_token = reader.page_token
+    pending = fetch(page_token)
+    while True:
+        response: docx_v1.ListDocumentBlockResponse = await pending
+        # 已取回的请求不再复用，没有预取下一页时不会重复等待它
+        pending = None
+        if not response.success():
+            return handle_response("client.docx.v1.document_block.list", response)
+
+        # 转换当前页之前先发起下一页的请求；没有下一页时 feed_page 会结束读取
+        next_token = next_page_token(response.data, "page_token")
+        if next_token is not None:
+            pending = fetch(next_token)
+        lines = reader.feed_page(page_token, response)
+        if pending is not None and reader.done:
+            pending.cancel()
+
+        if streamed:
+            # 逐页推送，不在内存中保留已推送的内容
+            if lines:
+                await ctx.report_progress(reader.tokens, message="\n".join(lines))
+        else:
+            reader.lines.extend(lines)
+        if reader.done:
+            data = reader.result(document_id, streamed)
+            if key is not None:
+                get_document_cache().set(key, data)
+            return data
+        page_token = next_token
@@ -1,8 +1,22 @@
-import json
-import lark_oapi as lark
-from lark_oapi.api.drive.v1 import *
 from pydantic import Field
 from typing import Optional
+from lark_mcp.common.client_pool import get_lark_client, aget_lark_client
+from lark_mcp.common.response import handle_response
+from lark_mcp.common.async_tool import async_variant
+from lark_mcp.common.lazy_import import lazy_import
+
+drive_v1 = lazy_import("lark_oapi.api.drive.v1")
+
+
+def build_create_folder_request(name: str, folder_token: str) -> "drive_v1.CreateFolderFileRequest":
+    # 构造请求对象
+    request: drive_v1.CreateFolderFileRequest = drive_v1.CreateFolderFileRequest.builder() \
+        .request_body(drive_v1.CreateFolderFileRequestBody.builder()
+                      .name(name)
+                      .folder_token(folder_token)
+                      .build()) \
+        .build()
+    return request
 
 
 def create_folder(
@@ -12,29 +26,19 @@ def create_folder(
         app_secret: Optional[str] = Field(None, description="应用密钥")
 ):
     """创建文件夹获取文件夹的Token"""
-    client = lark.Client.builder() \
-        .app_id(app_id) \
-        .app_secret(app_secret) \
-        .log_level(lark.LogLevel.DEBUG) \
-        .build()
-
-    # 构造请求对象
-    request: CreateFolderFileRequest = CreateFolderFileRequest.builder() \
-        .request_body(CreateFolderFileRequestBody.builder()
-                      .name(name)
-                      .folder_token(folder_token)
-                      .build()) \
-        .build()
+    client = get_lark_client(app_id, app_secret)
 
     # 发起请求
-    response: CreateFolderFileResponse = client.drive.v1.file.create_folder(request)
+    response: drive_v1.CreateFolderFileResponse = client.drive.v1.file.create_folder(
+        build_create_folder_request(name, folder_token))
+    return handle_response("client.drive.v1.file.create_folder", response)
 
-    # 处理失败返回
-    if not response.success():
-        fail_message = f"client.drive.v1.file.create_folder failed, code: {response.code}, msg: {response.msg}, log_id: {response.get_log_id()}, resp: \n{json.dumps(json.loads(response.raw.content), indent=4, ensure_ascii=False)}"
-        lark.logger.error(fail_message)
-        return fail_message
 
-    # 处理业务结果
-    lark.logger.info(lark.JSON.marshal(response.data, indent=4))
-    return lark.JSON.marshal(response.data, indent=4)
\ No newline at end of file
+@async_variant(create_folder)
+async def acreate_folder(name, folder_token, app_id, app_secret):
+    client = await aget_lark_client(app_id, app_secret)
+
+    # 发起请求
+    response: drive_v1.CreateFolderFileResponse = await client.drive.v1.file.acreate_folder(
+        build_create_folder_request(name, folder_token))
+    return handle_response("client.drive.v1.file.create_folder", response)
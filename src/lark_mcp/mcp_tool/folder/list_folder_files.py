@@ -1,8 +1,88 @@
-import json
-import lark_oapi as lark
-from lark_oapi.api.drive.v1 import *
+import asyncio
+from typing import List, Optional, Tuple
+
+from mcp.server.fastmcp import Context
 from pydantic import Field
-from typing import Optional
+from lark_mcp.common.client_pool import get_lark_client, aget_lark_client
+from lark_mcp.common.response import handle_response, to_plain, dumps, field_tree, nested_fields, next_page_token
+from lark_mcp.common.async_tool import async_variant, can_stream
+from lark_mcp.common.lazy_import import lazy_import
+from lark_mcp.common.log import logger
+
+drive_v1 = lazy_import("lark_oapi.api.drive.v1")
+
+
+def build_list_file_request(folder_token: str, page_size: int, order_by: str, direction: str,
+                            user_id_type: str, page_token: Optional[str] = None) -> "drive_v1.ListFileRequest":
+    # 构造请求对象
+    builder = drive_v1.ListFileRequest.builder() \
+        .page_size(page_size) \
+        .folder_token(folder_token) \
+        .order_by(order_by) \
+        .direction(direction) \
+        .user_id_type(user_id_type)
+    if page_token:
+        builder.page_token(page_token)
+    request: drive_v1.ListFileRequest = builder.build()
+    return request
+
+
+class FileListing(object):
+    """
+    自动翻页时累积的文件列表
+
+    按页累积并检查条目数和字节数预算；条目数预算通过缩小最后一页的page_size精确对齐到页边界，
+    字节数超出预算的整页不返回，它的page_token作为next_page_token，继续获取时不会重复或遗漏。
+    """
+
+    def __init__(self, page_size: int, max_items: int, max_bytes: int, fields: Optional[List[str]] = None):
+        self.page_size = page_size
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.field_tree = field_tree(fields)
+        self.files: List[dict] = []
+        self.count = 0
+        self.bytes = 0
+        self.pages = 0
+        self.has_more = False
+        self.next_page_token: Optional[str] = None
+
+    def next_page_size(self, pending: int = 0) -> int:
+        """下一页的page_size，pending为已取回但尚未累积的文件数"""
+        return max(1, min(self.page_size, self.max_items - self.count - pending))
+
+    def add_page(self, page_token: Optional[str], response: "drive_v1.ListFileResponse") -> Tuple[bool, List[dict]]:
+        """累积一页文件，返回(是否继续翻页, 本页被接受的文件)"""
+        # 先选择字段再计算字节数，只选择少量字段时同样的字节预算可以容纳更多文件
+        files = to_plain(response.data.files or [], self.field_tree)
+        size = sum(len(dumps(file).encode("utf-8")) for file in files)
+        if self.pages and self.bytes + size > self.max_bytes:
+            self.has_more, self.next_page_token = True, page_token
+            return False, []
+
+        self.pages += 1
+        self.count += len(files)
+        self.bytes += size
+        self.has_more = bool(response.data.has_more)
+        self.next_page_token = next_page_token(response.data)
+        proceed = self.next_page_token is not None and self.count < self.max_items and self.bytes < self.max_bytes
+        return proceed, files
+
+    def result(self, streamed: bool = False) -> str:
+        result = {"files": self.files, "has_more": self.has_more}
+        if streamed:
+            result = {"total": self.count, "pages": self.pages, "has_more": self.has_more, "streamed": True}
+        if self.next_page_token:
+            result["next_page_token"] = self.next_page_token
+        data = dumps(result)
+        logger.info("list folder files", pages=self.pages, files=self.count, bytes=self.bytes)
+        return data
+
+
+def _page_fields(fields: Optional[List[str]]) -> Optional[List[str]]:
+    # 字段选择只作用于文件列表，分页信息总是返回
+    files = nested_fields("files", fields)
+    return files + ["has_more", "next_page_token"] if files else None
 
 
 def list_folder_files(
@@ -11,34 +91,79 @@ def list_folder_files(
         order_by: str = Field("EditedTime", description="文件排序字段, 只允许EditedTime, CreatedTime"),
         direction: str = Field("DESC", description="排序方向，允许ASC, DESC"),
         user_id_type: str = Field("open_id", description="用户ID类型，允许open_id, union_id, user_id"),
+        page_token: Optional[str] = Field(None, description="分页标记，首次请求不填；填写上次返回的next_page_token继续获取"),
+        auto_paginate: bool = Field(False, description="是否自动翻页获取后续所有文件，受max_items和max_bytes限制"),
+        max_items: int = Field(1000, description="自动翻页时最多返回的文件数", ge=1),
+        max_bytes: int = Field(262144, description="自动翻页时返回的文件列表最大字节数", ge=1),
+        stream: bool = Field(False,
+                             description="自动翻页时是否通过进度通知逐页推送文件（需客户端支持进度通知），最终结果只包含汇总信息"),
+        fields: Optional[List[str]] = Field(None, description="只返回每个文件的这些字段，如 name、token、type、modified_time；不填返回全部字段"),
         app_id: Optional[str] = Field(None, description="应用唯一标识"),
-        app_secret: Optional[str] = Field(None, description="应用密钥")
+        app_secret: Optional[str] = Field(None, description="应用密钥"),
 ):
     """获取文件夹下的文件列表"""
-    client = lark.Client.builder() \
-        .app_id(app_id) \
-        .app_secret(app_secret) \
-        .log_level(lark.LogLevel.DEBUG) \
-        .build()
+    client = get_lark_client(app_id, app_secret)
+    if not auto_paginate:
+        request = build_list_file_request(folder_token, page_size, order_by, direction, user_id_type, page_token)
 
-    # 构造请求对象
-    request: ListFileRequest = ListFileRequest.builder() \
-        .page_size(page_size) \
-        .folder_token(folder_token) \
-        .order_by(order_by) \
-        .direction(direction) \
-        .user_id_type(user_id_type) \
-        .build()
+        # 发起请求
+        response: drive_v1.ListFileResponse = client.drive.v1.file.list(request)
+        return handle_response("client.drive.v1.file.list", response, _page_fields(fields))
+
+    listing = FileListing(page_size, max_items, max_bytes, fields)
+    while True:
+        request = build_list_file_request(folder_token, listing.next_page_size(), order_by, direction,
+                                          user_id_type, page_token)
+        response: drive_v1.ListFileResponse = client.drive.v1.file.list(request)
+        if not response.success():
+            return handle_response("client.drive.v1.file.list", response)
+        proceed, files = listing.add_page(page_token, response)
+        listing.files.extend(files)
+        if not proceed:
+            return listing.result()
+        page_token = listing.next_page_token
+
+
+@async_variant(list_folder_files)
+async def alist_folder_files(folder_token, page_size, order_by, direction, user_id_type, page_token, auto_paginate,
+                             max_items, max_bytes, stream, fields, app_id, app_secret, ctx: Context = None):
+    client = await aget_lark_client(app_id, app_secret)
+    if not auto_paginate:
+        request = build_list_file_request(folder_token, page_size, order_by, direction, user_id_type, page_token)
+
+        # 发起请求
+        response: drive_v1.ListFileResponse = await client.drive.v1.file.alist(request)
+        return handle_response("client.drive.v1.file.list", response, _page_fields(fields))
+
+    listing = FileListing(page_size, max_items, max_bytes, fields)
+    streamed = stream and can_stream(ctx)
+
+    def fetch(token: Optional[str], page_size: int):
+        return asyncio.ensure_future(client.drive.v1.file.alist(build_list_file_request(
+            folder_token, page_size, order_by, direction, user_id_type, token)))
 
-    # 发起请求
-    response: ListFileResponse = client.drive.v1.file.list(request)
+    pending = fetch(page_token, listing.next_page_size())
+    while True:
+        response: drive_v1.ListFileResponse = await pending
+        if not response.success():
+            return handle_response("client.drive.v1.file.list", response)
 
-    # 处理失败返回
-    if not response.success():
-        fail_message = f"client.drive.v1.file.list failed, code: {response.code}, msg: {response.msg}, log_id: {response.get_log_id()}, resp: \n{json.dumps(json.loads(response.raw.content), indent=4, ensure_ascii=False)}"
-        lark.logger.error(fail_message)
-        return fail_message
+        # 处理当前页之前先发起下一页的请求，网络等待与序列化、推送重叠
+        next_token = next_page_token(response.data)
+        received = len(response.data.files or [])
+        prefetched = next_token is not None and listing.count + received < max_items
+        if prefetched:
+            pending = fetch(next_token, listing.next_page_size(received))
+        proceed, files = listing.add_page(page_token, response)
+        if prefetched and not proceed:
+            pending.cancel()
 
-    # 处理业务结果
-    lark.logger.info(lark.JSON.marshal(response.data, indent=4))
-    return lark.JSON.marshal(response.data, indent=4)
+        if streamed:
+            # 逐页推送，不在内存中保留已推送的文件
+            if files:
+                await ctx.report_progress(listing.count, message=dumps({"files": files}))
+        else:
+            listing.files.extend(files)
+        if not proceed:
+            return listing.result(streamed)
+        page_token = next_token
@@ -0,0 +1,240 @@
+import asyncio
+import os
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from pydantic import Field
+from lark_mcp.mcp_tool.folder.list_folder_files import build_list_file_request
+from lark_mcp.common.client_pool import get_lark_client, aget_lark_client
+from lark_mcp.common.ttl_cache import TTLCache, MISSING
+from lark_mcp.common.jobs import job_progress
+from lark_mcp.common.response import dumps, next_page_token
+from lark_mcp.common.async_tool import async_variant
+from lark_mcp.common.lazy_import import lazy_import
+from lark_mcp.common.log import logger
+
+lark = lazy_import("lark_oapi")
+drive_v1 = lazy_import("lark_oapi.api.drive.v1")
+
+# 遍历配置，可通过环境变量覆盖
+DRIVE_WALK_CONCURRENCY = int(os.getenv("LARK_MCP_DRIVE_WALK_CONCURRENCY", "8"))
+DRIVE_SNAPSHOT_TTL = int(os.getenv("LARK_MCP_DRIVE_SNAPSHOT_TTL", "900"))
+DRIVE_SNAPSHOT_SIZE = int(os.getenv("LARK_MCP_DRIVE_SNAPSHOT_SIZE", "10000"))
+
+# 遍历时每页获取的文件数
+WALK_PAGE_SIZE = 200
+
+# (app_id, folder_token) -> (文件夹的modified_time, 子文件列表)；文件夹未修改时复用，不再重新获取
+_folder_snapshots = TTLCache(DRIVE_SNAPSHOT_SIZE, DRIVE_SNAPSHOT_TTL)
+
+
+class Folder(NamedTuple):
+    token: str
+    path: str
+    depth: int
+    # 从上级文件夹的列表中得到的修改时间，根文件夹和快捷方式指向的文件夹未知
+    modified_time: Optional[int]
+    # 上级文件夹是否在本次遍历中重新获取，复用快照时得到的修改时间可能已过期
+    fresh: bool
+
+
+def _children(response: "drive_v1.ListFileResponse") -> List[dict]:
+    children = []
+    for file in response.data.files or []:
+        child = {"name": file.name, "token": file.token, "type": file.type, "modified_time": file.modified_time}
+        if file.shortcut_info is not None:
+            child["target_type"] = file.shortcut_info.target_type
+            child["target_token"] = file.shortcut_info.target_token
+        children.append(child)
+    return children
+
+
+def _list_request(folder_token: str, page_token: Optional[str]) -> "drive_v1.ListFileRequest":
+    return build_list_file_request(folder_token, WALK_PAGE_SIZE, "EditedTime", "DESC", "open_id", page_token)
+
+
+def list_children(client: "lark.Client",
+                  folder_token: str) -> "Tuple[List[dict], Optional[drive_v1.ListFileResponse]]":
+    """获取文件夹下的全部文件（自动翻页），返回(子文件列表, 失败时的响应)"""
+    children, page_token = [], None
+    while True:
+        response: drive_v1.ListFileResponse = client.drive.v1.file.list(_list_request(folder_token, page_token))
+        if not response.success():
+            return children, response
+        children.extend(_children(response))
+        page_token = next_page_token(response.data)
+        if page_token is None:
+            return children, None
+
+
+async def alist_children(client: "lark.Client",
+                         folder_token: str) -> "Tuple[List[dict], Optional[drive_v1.ListFileResponse]]":
+    children, page_token = [], None
+    while True:
+        response: drive_v1.ListFileResponse = await client.drive.v1.file.alist(_list_request(folder_token, page_token))
+        if not response.success():
+            return children, response
+        children.extend(_children(response))
+        page_token = next_page_token(response.data)
+        if page_token is None:
+            return children, None
+
+
+class DriveWalker(object):
+    """
+    遍历一次文件夹树的状态
+
+    已访问的文件夹按token去重，快捷方式指向已访问的文件夹时不再展开，避免循环；
+    文件夹的modified_time与快照一致时复用快照中的子文件列表，只重新获取修改过的文件夹。
+    modified_time只在上级文件夹本次重新获取时可信：上级复用快照时，子文件夹的modified_time也来自快照，
+    因此这些子文件夹总是重新获取，更深层的修改不会被过期的快照掩盖。
+    """
+
+    def __init__(self, app_id: Optional[str], max_depth: int, max_items: int, full_sync: bool):
+        self.app_id = app_id or ""
+        self.max_depth = max_depth
+        self.max_items = max_items
+        self.full_sync = full_sync
+        self.visited = set()
+        self.items: List[list] = []
+        self.errors: List[Dict] = []
+        self.listed = 0
+        self.reused = 0
+        self.truncated = False
+
+    def start(self, folder_token: str) -> Folder:
+        self.visited.add(folder_token)
+        job_progress(0, total=1)
+        return Folder(folder_token, "", 0, None, True)
+
+    def snapshot(self, folder: Folder) -> Optional[List[dict]]:
+        """文件夹未修改时返回快照中的子文件列表"""
+        if self.full_sync or folder.modified_time is None or not folder.fresh:
+            return None
+        entry = _folder_snapshots.get((self.app_id, folder.token))
+        if entry is MISSING or entry[0] != folder.modified_time:
+            return None
+        self.reused += 1
+        return entry[1]
+
+    def save(self, folder: Folder, children: List[dict]) -> None:
+        self.listed += 1
+        _folder_snapshots.set((self.app_id, folder.token), (folder.modified_time, children))
+
+    def fail(self, folder: Folder, response: "drive_v1.ListFileResponse") -> None:
+        logger.error("client.drive.v1.file.list failed", folder=folder.token, code=response.code, msg=response.msg,
+                     log_id=response.get_log_id())
+        self.errors.append({"path": folder.path or "/", "token": folder.token, "code": response.code,
+                            "msg": response.msg})
+        job_progress()
+
+    def visit(self, folder: Folder, children: List[dict], listed: bool) -> List[Folder]:
+        """记录文件夹下的文件，返回需要继续遍历的子文件夹；listed 表示子文件列表是本次重新获取的"""
+        subfolders = []
+        for child in children:
+            if len(self.items) >= self.max_items:
+                self.truncated = True
+                break
+            path = f"{folder.path}/{child['name']}"
+            self.items.append([path, child["token"], child["type"], child["modified_time"]])
+
+            if child["type"] == "folder":
+                token, modified_time = child["token"], child["modified_time"]
+            elif child.get("target_type") == "folder":
+                # 快捷方式的修改时间不代表目标文件夹的修改时间
+                token, modified_time = child["target_token"], None
+            else:
+                continue
+            if folder.depth + 1 < self.max_depth and token not in self.visited:
+                self.visited.add(token)
+                subfolders.append(Folder(token, path, folder.depth + 1, modified_time, listed))
+        # 后台任务的进度：已遍历的文件夹数/已发现的文件夹数
+        job_progress(1, total=len(subfolders))
+        return subfolders
+
+    def result(self) -> str:
+        # 扁平的紧凑列表：每个条目为 [path, token, type, modified_time]
+        result = {
+            "columns": ["path", "token", "type", "modified_time"],
+            "items": sorted(self.items),
+            "total": len(self.items),
+            "folders_listed": self.listed,
+            "folders_reused": self.reused,
+            "truncated": self.truncated,
+        }
+        if self.errors:
+            result["errors"] = self.errors
+        logger.info("walk folder tree", items=len(self.items), listed=self.listed, reused=self.reused,
+                    errors=len(self.errors))
+        return dumps(result)
+
+
+def walk_folder_tree(
+        folder_token: str = Field("", description="根文件夹token。不填或为空时从用户云空间根目录开始"),
+        max_depth: int = Field(10, description="最大遍历深度，根文件夹下的文件深度为1", ge=1),
+        max_items: int = Field(5000, description="最多返回的文件数，超出时结果中truncated为true", ge=1),
+        full_sync: bool = Field(False, description="是否忽略本地快照，重新获取所有文件夹"),
+        app_id: Optional[str] = Field(None, description="应用唯一标识"),
+        app_secret: Optional[str] = Field(None, description="应用密钥")
+):
+    """递归获取文件夹下所有子文件夹和文件，返回扁平列表（路径、token、类型、修改时间）"""
+    client = get_lark_client(app_id, app_secret)
+    walker = DriveWalker(app_id, max_depth, max_items, full_sync)
+
+    folders = [walker.start(folder_token)]
+    while folders and not walker.truncated:
+        folder = folders.pop(0)
+        children = walker.snapshot(folder)
+        listed = children is None
+        if listed:
+            children, failed = list_children(client, folder.token)
+            if failed is not None:
+                walker.fail(folder, failed)
+                continue
+            walker.save(folder, children)
+        folders.extend(walker.visit(folder, children, listed))
+    return walker.result()
+
+
+@async_variant(walk_folder_tree)
+async def awalk_folder_tree(folder_token, max_depth, max_items, full_sync, app_id, app_secret):
+    client = await aget_lark_client(app_id, app_secret)
+    walker = DriveWalker(app_id, max_depth, max_items, full_sync)
+
+    queue: asyncio.Queue = asyncio.Queue()
+    queue.put_nowait(walker.start(folder_token))
+
+    async def worker():
+        # 多个worker并发获取不同文件夹，同时进行的请求数不超过worker数量
+        while True:
+            folder = await queue.get()
+            try:
+                if walker.truncated:
+                    continue
+                children = walker.snapshot(folder)
+                listed = children is None
+                if listed:
+                    children, failed = await alist_children(client, folder.token)
+                    if failed is not None:
+                        walker.fail(folder, failed)
+                        continue
+                    walker.save(folder, children)
+                for subfolder in walker.visit(folder, children, listed):
+                    queue.put_nowait(subfolder)
+            except Exception as err:
+                logger.error("walk folder failed", folder=folder.token, err=err)
+                walker.errors.append({"path": folder.path or "/", "token": folder.token, "msg": str(err)})
+            finally:
+                queue.task_done()
+
+    workers = [asyncio.ensure_future(worker()) for _ in range(DRIVE_WALK_CONCURRENCY)]
+    try:
+        await queue.join()
+    finally:
+        for task in workers:
+            task.cancel()
+    return walker.result()
+
+
+def get_folder_snapshot_stats() -> Dict[str, int]:
+    """文件夹快照的命中/未命中/淘汰计数"""
+    return _folder_snapshots.stats()
@@ -0,0 +1,57 @@
+from typing import Any, Dict
+
+from pydantic import Field
+from lark_mcp.common.response import dumps
+from lark_mcp.common.jobs import get_job_manager, JobLimitExceeded, SUCCEEDED
+from lark_mcp.common.tenant_registry import current_tenant_id
+
+
+def _job_not_found(job_id: str) -> str:
+    return f"job not found or expired: {job_id}"
+
+
+def submit_job(
+        tool: str = Field(..., description="要在后台运行的工具名称，如walk_folder_tree、broadcast_message、batch_get_user_info"),
+        arguments: Dict[str, Any] = Field(default_factory=dict, description="工具参数，与直接调用该工具时相同"),
+):
+    """在后台运行耗时较长的工具，立即返回job_id；之后通过job_status查询进度，通过job_result获取结果"""
+    manager = get_job_manager()
+    if not manager.has_tool(tool):
+        return f"tool not supported as job: {tool}"
+    try:
+        job = manager.submit(tool, arguments, current_tenant_id())
+    except JobLimitExceeded as err:
+        return str(err)
+    return dumps(job.snapshot())
+
+
+def job_status(
+        job_id: str = Field(..., description="submit_job返回的job_id"),
+):
+    """查询后台任务的状态和进度（已完成数/总数）"""
+    job = get_job_manager().get(job_id, current_tenant_id())
+    if job is None:
+        return _job_not_found(job_id)
+    return dumps(job.snapshot())
+
+
+def job_result(
+        job_id: str = Field(..., description="submit_job返回的job_id"),
+):
+    """获取后台任务的结果：成功时返回工具的原始结果，未完成或失败时返回任务状态"""
+    job = get_job_manager().get(job_id, current_tenant_id())
+    if job is None:
+        return _job_not_found(job_id)
+    if job.status == SUCCEEDED:
+        return job.result
+    return dumps(job.snapshot())
+
+
+def job_cancel(
+        job_id: str = Field(..., description="submit_job返回的job_id"),
+):
+    """取消排队中或运行中的后台任务，已发出的飞书请求不会撤回"""
+    job = get_job_manager().cancel(job_id, current_tenant_id())
+    if job is None:
+        return _job_not_found(job_id)
+    return dumps(job.snapshot())
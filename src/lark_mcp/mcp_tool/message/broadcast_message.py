@@ -0,0 +1,95 @@
+import hashlib
+import json
+import uuid
+from typing import List, Literal, Optional, Tuple
+
+from pydantic import BaseModel, Field
+from lark_mcp.mcp_tool.message.create_message import build_message_request
+from lark_mcp.common.client_pool import get_lark_client, aget_lark_client
+from lark_mcp.common.batch import gather_with_limit, item_status, batch_summary
+from lark_mcp.common.async_tool import async_variant
+
+
+class MessageRecipient(BaseModel):
+    receive_id: str = Field(..., description="消息接收者的ID，ID类型与receive_id_type一致")
+    receive_id_type: Literal["open_id", "user_id", "union_id", "email", "chat_id"] = Field(
+        "open_id", description="接收者ID类型")
+
+
+def recipient_uuid(dedupe_key: str, recipient: MessageRecipient) -> str:
+    """同一次广播发给同一接收者的消息使用固定的uuid，飞书在1小时内按uuid去重，重试不会重复发送"""
+    return uuid.uuid5(uuid.NAMESPACE_URL, f"{dedupe_key}/{recipient.receive_id_type}/{recipient.receive_id}").hex
+
+
+def _broadcast_plan(recipients: List[MessageRecipient], msg_type: str, content: dict, dedupe_key: Optional[str],
+                    dedupe_by_content: bool = False) -> Tuple[str, List[Tuple[int, MessageRecipient, str]]]:
+    """返回(转义后的消息内容, [(接收者序号, 接收者, uuid)])，重复的接收者只发送一次"""
+    # 消息内容只转换一次，所有接收者共用
+    json_escaped_str = json.dumps(content, ensure_ascii=True)
+    if not dedupe_key:
+        if dedupe_by_content:
+            # 按消息内容生成，1小时内同样的广播重新执行时uuid不变，不会重复发送
+            dedupe_key = hashlib.sha256(f"{msg_type}/{json_escaped_str}".encode("utf-8")).hexdigest()
+        else:
+            # 每次调用生成新的去重标识，本次调用内的重试仍使用同一个uuid，但再次发送同样的内容不会被丢弃
+            dedupe_key = uuid.uuid4().hex
+
+    plan, seen = [], set()
+    for index, recipient in enumerate(recipients):
+        key = (recipient.receive_id_type, recipient.receive_id)
+        if key in seen:
+            continue
+        seen.add(key)
+        plan.append((index, recipient, recipient_uuid(dedupe_key, recipient)))
+    return json_escaped_str, plan
+
+
+def _sent_status(index: int, recipient: MessageRecipient, response) -> dict:
+    if isinstance(response, BaseException) or not response.success():
+        status = item_status(index, response)
+        status["receive_id"] = recipient.receive_id
+        return status
+    return item_status(index, response, message_id=response.data.message_id)
+
+
+def broadcast_message(
+        recipients: List[MessageRecipient] = Field(
+            ..., description="消息接收者列表，每个接收者可使用不同的ID类型。重复的接收者只发送一次", min_length=1),
+        msg_type: Literal[
+            "text", "post", "image", "file", "audio", "media", "sticker", "interactive", "share_chat", "share_user", "system"] = Field(
+            ..., description="消息类型，可选值：text(文本)、post(富文本)、image(图片)等"),
+        content: dict = Field(..., description="消息内容JSON字符串，需根据msg_type设置对应格式，不需要转义，例如：{'text': '你好啊，你是谁？'}"),
+        dedupe_key: Optional[str] = Field(
+            None, description="去重标识，1小时内相同去重标识发给同一接收者的消息只发送一次。不填时每次调用使用新的标识"),
+        dedupe_by_content: bool = Field(
+            False, description="未指定dedupe_key时是否按消息内容去重，开启后1小时内发送同样内容的广播只发送一次"),
+        app_id: Optional[str] = Field(None, description="应用唯一标识"),
+        app_secret: Optional[str] = Field(None, description="应用密钥")
+):
+    """给多个用户或群组发送同一条消息，只返回失败的接收者"""
+    client = get_lark_client(app_id, app_secret)
+    json_escaped_str, plan = _broadcast_plan(recipients, msg_type, content, dedupe_key, dedupe_by_content)
+
+    items = []
+    for index, recipient, message_uuid in plan:
+        try:
+            response = client.im.v1.message.create(build_message_request(
+                recipient.receive_id, msg_type, json_escaped_str, recipient.receive_id_type, message_uuid))
+        except Exception as err:
+            response = err
+        items.append(_sent_status(index, recipient, response))
+    return batch_summary(items, failures_only=True)
+
+
+@async_variant(broadcast_message)
+async def abroadcast_message(recipients, msg_type, content, dedupe_key, dedupe_by_content, app_id, app_secret):
+    client = await aget_lark_client(app_id, app_secret)
+    json_escaped_str, plan = _broadcast_plan(recipients, msg_type, content, dedupe_key, dedupe_by_content)
+
+    # 并发发送，同时进行的请求数受 LARK_MCP_BATCH_CONCURRENCY 限制，启用限流时速率由每个租户的限流器控制
+    results = await gather_with_limit(
+        client.im.v1.message.acreate(build_message_request(
+            recipient.receive_id, msg_type, json_escaped_str, recipient.receive_id_type, message_uuid))
+        for _, recipient, message_uuid in plan)
+    return batch_summary([_sent_status(index, recipient, result)
+                          for (index, recipient, _), result in zip(plan, results)], failures_only=True)
@@ -1,9 +1,36 @@
 import json
-import lark_oapi as lark
-from lark_oapi.api.im.v1 import *
 from pydantic import Field
 from typing import Optional, Literal
 from uuid import uuid4
+from lark_mcp.common.client_pool import get_lark_client, aget_lark_client
+from lark_mcp.common.response import handle_response
+from lark_mcp.common.async_tool import async_variant
+from lark_mcp.common.lazy_import import lazy_import
+
+im_v1 = lazy_import("lark_oapi.api.im.v1")
+
+
+def build_create_message_request(receive_id: str, msg_type: str, content: dict, receive_id_type: str,
+                                 message_uuid: Optional[str] = None) -> "im_v1.CreateMessageRequest":
+    # 将JSON对象转换为JSON转义的字符串
+    json_escaped_str = json.dumps(content, ensure_ascii=True)
+    return build_message_request(receive_id, msg_type, json_escaped_str, receive_id_type, message_uuid)
+
+
+def build_message_request(receive_id: str, msg_type: str, json_escaped_str: str, receive_id_type: str,
+                          message_uuid: Optional[str] = None) -> "im_v1.CreateMessageRequest":
+    # 构造请求对象，消息内容为已转换好的JSON字符串
+    request: im_v1.CreateMessageRequest = im_v1.CreateMessageRequest.builder() \
+        .receive_id_type(receive_id_type) \
+        .request_body(im_v1.CreateMessageRequestBody.builder()
+                      .receive_id(receive_id)
+                      .msg_type(msg_type)
+                      .content(json_escaped_str)
+                      .uuid(message_uuid or uuid4().hex)
+                      .build()) \
+        .build()
+    return request
+
 
 def create_message(
         receive_id: str = Field(...,
@@ -18,34 +45,19 @@ def create_message(
         app_secret: Optional[str] = Field(None, description="应用密钥")
 ):
     """发送消息"""
-    client = lark.Client.builder() \
-        .app_id(app_id) \
-        .app_secret(app_secret) \
-        .log_level(lark.LogLevel.DEBUG) \
-        .build()
-    # 将JSON对象转换为JSON转义的字符串
-    json_escaped_str = json.dumps(content, ensure_ascii=True)
-
-    # 构造请求对象
-    request: CreateMessageRequest = CreateMessageRequest.builder() \
-        .receive_id_type(receive_id_type) \
-        .request_body(CreateMessageRequestBody.builder()
-                      .receive_id(receive_id)
-                      .msg_type(msg_type)
-                      .content(json_escaped_str)
-                      .uuid(uuid4().hex)
-                      .build()) \
-        .build()
+    client = get_lark_client(app_id, app_secret)
+    request = build_create_message_request(receive_id, msg_type, content, receive_id_type)
 
     # 发起请求
-    response: CreateMessageResponse = client.im.v1.message.create(request)
+    response: im_v1.CreateMessageResponse = client.im.v1.message.create(request)
+    return handle_response("client.im.v1.message.create", response)
+
 
-    # 处理失败返回
-    if not response.success():
-        fail_message = f"client.im.v1.message.create failed, code: {response.code}, msg: {response.msg}, log_id: {response.get_log_id()}, resp: \n{json.dumps(json.loads(response.raw.content), indent=4, ensure_ascii=False)}"
-        lark.logger.error(fail_message)
-        return fail_message
+@async_variant(create_message)
+async def acreate_message(receive_id, msg_type, content, receive_id_type, app_id, app_secret):
+    client = await aget_lark_client(app_id, app_secret)
+    request = build_create_message_request(receive_id, msg_type, content, receive_id_type)
 
-    # 处理业务结果
-    lark.logger.info(lark.JSON.marshal(response.data, indent=4))
-    return lark.JSON.marshal(response.data, indent=4)
\ No newline at end of file
+    # 发起请求
+    response: im_v1.CreateMessageResponse = await client.im.v1.message.acreate(request)
+    return handle_response("client.im.v1.message.create", response)
@@ -1,43 +1,150 @@
-import json
-import lark_oapi as lark
-from lark_oapi.api.contact.v3 import *
-from pydantic import Field, BaseModel
+from itertools import zip_longest
+from typing import Dict, Tuple, List, Optional
 
+from pydantic import Field
+from lark_mcp.mcp_tool.user_info.contact_cache import get_contact_cache, user_id_key, CONTACT_CHUNK_SIZE, \
+    CONTACT_CACHE_NEGATIVE_TTL
+from lark_mcp.common.client_pool import get_lark_client, aget_lark_client
+from lark_mcp.common.response import to_plain, dumps
+from lark_mcp.common.batch import chunked, chunk_error, gather_with_limit
+from lark_mcp.common.async_tool import async_variant
+from lark_mcp.common.lazy_import import lazy_import
+from lark_mcp.common.log import logger
+
+contact_v3 = lazy_import("lark_oapi.api.contact.v3")
 
-def get_id_user_request(user_id_type: str = Field(default="open_id", description="用户ID类型，默认为 open_id"),
-                        emails: Optional[List[str]] = Field(None,
-                                                            description="最多50个邮箱，不支持企业邮箱，与 mobiles 独立查询"),
-                        mobiles: Optional[List[str]] = Field(None,
-                                                             description="最多50个手机号，海外需带国家代码 +xxx，与 emails 独立查询"),
-                        include_resigned: bool = Field(True, description="是否包含已离职员工，true/false"),
-                        app_id: Optional[str] = Field(None, description="应用唯一标识"),
-                        app_secret: Optional[str] = Field(None, description="应用密钥")):
-    """能够根据用户的邮箱或者手机号查找用户的信息"""
-    client = lark.Client.builder() \
-        .app_id(app_id) \
-        .app_secret(app_secret) \
-        .log_level(lark.LogLevel.DEBUG) \
-        .build()
 
+def build_batch_get_id_user_request(user_id_type: str, emails: Optional[List[str]], mobiles: Optional[List[str]],
+                                    include_resigned: bool) -> "contact_v3.BatchGetIdUserRequest":
     # 构造请求对象
-    request: BatchGetIdUserRequest = BatchGetIdUserRequest.builder() \
+    request: contact_v3.BatchGetIdUserRequest = contact_v3.BatchGetIdUserRequest.builder() \
         .user_id_type(user_id_type) \
-        .request_body(BatchGetIdUserRequestBody.builder()
+        .request_body(contact_v3.BatchGetIdUserRequestBody.builder()
                       .emails(emails)
                       .mobiles(mobiles)
                       .include_resigned(include_resigned)
                       .build()) \
         .build()
+    return request
+
+
+def _lookup_keys(app_id: Optional[str], user_id_type: str, emails: Optional[List[str]],
+                 mobiles: Optional[List[str]], include_resigned: bool) -> Dict[Tuple, str]:
+    """缓存key -> 输入的邮箱/手机号；按输入顺序，只有格式不同的输入只保留第一个"""
+    keys: Dict[Tuple, str] = {}
+    for kind, values in (("email", emails), ("mobile", mobiles)):
+        for value in values or []:
+            keys.setdefault(user_id_key(app_id, user_id_type, include_resigned, kind, value), value)
+    return keys
+
+
+def _miss_chunks(missing: Dict[Tuple, str]) -> List[Dict[str, List[str]]]:
+    # 只查询缓存未命中的邮箱和手机号，按输入的原样发送，每个分片最多50个邮箱、50个手机号
+    email_chunks = chunked([value for key, value in missing.items() if key[-2] == "email"], CONTACT_CHUNK_SIZE)
+    mobile_chunks = chunked([value for key, value in missing.items() if key[-2] == "mobile"], CONTACT_CHUNK_SIZE)
+    chunks = []
+    for emails, mobiles in zip_longest(email_chunks, mobile_chunks, fillvalue=[]):
+        chunk = {}
+        if emails:
+            chunk["emails"] = emails
+        if mobiles:
+            chunk["mobiles"] = mobiles
+        chunks.append(chunk)
+    return chunks
+
+
+def _chunk_request(user_id_type: str, chunk: Dict[str, List[str]],
+                   include_resigned: bool) -> "contact_v3.BatchGetIdUserRequest":
+    return build_batch_get_id_user_request(user_id_type, chunk.get("emails"), chunk.get("mobiles"), include_resigned)
+
+
+def _cache_user_ids(app_id: Optional[str], user_id_type: str, include_resigned: bool, chunk: Dict[str, List[str]],
+                    response: "contact_v3.BatchGetIdUserResponse") -> Tuple[Dict[Tuple, dict], List[dict]]:
+    """按分片中请求的邮箱/手机号缓存查询结果，返回(缓存key -> 条目, 无法对应到输入的条目)"""
+    requested = {user_id_key(app_id, user_id_type, include_resigned, kind, value): (kind, value)
+                 for kind, field in (("email", "emails"), ("mobile", "mobiles")) for value in chunk.get(field, [])}
+    found, not_found, unmatched = {}, {}, []
+    for contact in response.data.user_list or []:
+        kind, value = ("email", contact.email) if contact.email else ("mobile", contact.mobile)
+        entry = to_plain(contact)
+        key = user_id_key(app_id, user_id_type, include_resigned, kind, value) if value else None
+        if key not in requested:
+            unmatched.append(entry)
+            continue
+        (found if contact.user_id else not_found)[key] = entry
+
+    # 飞书没有返回的输入同样是查不到；有无法对应到输入的条目时不能确定哪些输入查不到，不缓存
+    if not unmatched:
+        for key, (kind, value) in requested.items():
+            if key not in found and key not in not_found:
+                not_found[key] = {kind: value}
+
+    # 查不到的用户也缓存，但存活时间更短，避免新入职的员工长时间查不到
+    get_contact_cache().set_many(found)
+    get_contact_cache().set_many(not_found, ttl=CONTACT_CACHE_NEGATIVE_TTL)
+    return {**found, **not_found}, unmatched
+
+
+def _merge_user_ids(app_id: Optional[str], user_id_type: str, include_resigned: bool, keys: Dict[Tuple, str],
+                    found: Dict[Tuple, dict], chunks: List[Dict[str, List[str]]], results: list) -> str:
+    # 合并各分片的查询结果，失败的分片单独列出
+    errors, unmatched = [], []
+    for index, (chunk, result) in enumerate(zip(chunks, results)):
+        error = chunk_error("client.contact.v3.user.batch_get_id", index, result, **chunk)
+        if error is not None:
+            errors.append(error)
+        else:
+            cached, extra = _cache_user_ids(app_id, user_id_type, include_resigned, chunk, result)
+            found.update(cached)
+            unmatched.extend(extra)
+
+    # 全部失败时直接返回错误信息
+    if errors and not found:
+        return "\n".join(error["error"] for error in errors)
+
+    # 按输入顺序返回，无法对应到输入的条目排在最后
+    result = {"user_list": [found[key] for key in keys if key in found] + unmatched}
+    if errors:
+        result["errors"] = errors
+    data = dumps(result)
+    logger.payload("get_id_user_request", data)
+    return data
+
+
+def get_id_user_request(user_id_type: str = Field(default="open_id", description="用户ID类型，默认为 open_id"),
+                        emails: Optional[List[str]] = Field(None,
+                                                            description="邮箱列表，不支持企业邮箱，与 mobiles 独立查询；数量不限，超过50个时自动分批查询"),
+                        mobiles: Optional[List[str]] = Field(None,
+                                                             description="手机号列表，海外需带国家代码 +xxx，与 emails 独立查询；数量不限，超过50个时自动分批查询"),
+                        include_resigned: bool = Field(True, description="是否包含已离职员工，true/false"),
+                        app_id: Optional[str] = Field(None, description="应用唯一标识"),
+                        app_secret: Optional[str] = Field(None, description="应用密钥")):
+    """能够根据用户的邮箱或者手机号查找用户的信息"""
+    # 缓存只按app_id区分，必须先获取client校验凭证再读缓存
+    client = get_lark_client(app_id, app_secret)
+    keys = _lookup_keys(app_id, user_id_type, emails, mobiles, include_resigned)
+    found = get_contact_cache().get_many(keys)
+    chunks = _miss_chunks({key: value for key, value in keys.items() if key not in found})
 
     # 发起请求
-    response: BatchGetIdUserResponse = client.contact.v3.user.batch_get_id(request)
+    results = []
+    for chunk in chunks:
+        try:
+            results.append(client.contact.v3.user.batch_get_id(_chunk_request(user_id_type, chunk, include_resigned)))
+        except Exception as err:
+            results.append(err)
+    return _merge_user_ids(app_id, user_id_type, include_resigned, keys, found, chunks, results)
+
 
-    # 处理失败返回
-    if not response.success():
-        lark.logger.error(
-            f"client.contact.v3.user.batch_get_id failed, code: {response.code}, msg: {response.msg}, log_id: {response.get_log_id()}, resp: \n{json.dumps(json.loads(response.raw.content), indent=4, ensure_ascii=False)}")
-        return f"client.contact.v3.user.batch_get_id failed, code: {response.code}, msg: {response.msg}, log_id: {response.get_log_id()}, resp: \n{json.dumps(json.loads(response.raw.content), indent=4, ensure_ascii=False)}"
+@async_variant(get_id_user_request)
+async def aget_id_user_request(user_id_type, emails, mobiles, include_resigned, app_id, app_secret):
+    client = await aget_lark_client(app_id, app_secret)
+    keys = _lookup_keys(app_id, user_id_type, emails, mobiles, include_resigned)
+    found = get_contact_cache().get_many(keys)
+    chunks = _miss_chunks({key: value for key, value in keys.items() if key not in found})
 
-    # 处理业务结果
-    lark.logger.info(lark.JSON.marshal(response.data, indent=4))
-    return str(lark.JSON.marshal(response.data, indent=4))
+    # 各分片互不依赖，共享同一个client并发请求
+    results = await gather_with_limit(
+        client.contact.v3.user.abatch_get_id(_chunk_request(user_id_type, chunk, include_resigned))
+        for chunk in chunks)
+    return _merge_user_ids(app_id, user_id_type, include_resigned, keys, found, chunks, results)
@@ -0,0 +1,113 @@
+import json
+import os
+import re
+import time
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from lark_mcp.common.sqlite_store import SQLiteStore
+from lark_mcp.common.ttl_cache import TTLCache, MISSING
+
+# 通讯录缓存配置，可通过环境变量覆盖；配置 LARK_MCP_CONTACT_CACHE_DB 后缓存同时写入本地SQLite文件
+CONTACT_CACHE_TTL = int(os.getenv("LARK_MCP_CONTACT_CACHE_TTL", "3600"))
+CONTACT_CACHE_NEGATIVE_TTL = int(os.getenv("LARK_MCP_CONTACT_CACHE_NEGATIVE_TTL", "300"))
+CONTACT_CACHE_SIZE = int(os.getenv("LARK_MCP_CONTACT_CACHE_SIZE", "10000"))
+CONTACT_CACHE_DB = os.getenv("LARK_MCP_CONTACT_CACHE_DB", "")
+
+# 通讯录批量接口单次请求的ID数量上限
+CONTACT_CHUNK_SIZE = 50
+
+
+def normalize_contact(kind: str, value: str) -> str:
+    """邮箱不区分大小写；手机号去掉空格、短横线、括号和中国大陆的 +86 前缀"""
+    value = value.strip()
+    if kind == "email":
+        return value.lower()
+    value = re.sub(r"[\s\-()]", "", value)
+    return value[3:] if value.startswith("+86") else value
+
+
+def user_id_key(app_id: Optional[str], user_id_type: str, include_resigned: bool, kind: str,
+                value: str) -> Tuple:
+    """邮箱/手机号 -> 用户ID 的缓存key，kind 为 email 或 mobile；只有格式不同的邮箱/手机号使用同一个key"""
+    return "user_id", app_id or "", user_id_type, include_resigned, kind, normalize_contact(kind, value)
+
+
+def user_info_key(app_id: Optional[str], user_id_type: str, department_id_type: str, user_id: str) -> Tuple:
+    """用户ID -> 用户信息 的缓存key"""
+    return "user_info", app_id or "", user_id_type, department_id_type, user_id
+
+
+class ContactCache(object):
+    """
+    按租户缓存通讯录查询结果：邮箱/手机号 -> 用户ID，用户ID -> 用户信息
+
+    内存中为有容量上限的 LRU + TTL 缓存；配置了SQLite文件时，内存未命中会再查本地文件，
+    写入时同时写入文件，进程重启后仍可复用。
+    缓存key中只有app_id，调用方必须先通过 get_lark_client 校验 (app_id, app_secret) 再读取缓存。
+    """
+
+    def __init__(self, max_size: int = CONTACT_CACHE_SIZE, ttl: int = CONTACT_CACHE_TTL,
+                 db_path: str = CONTACT_CACHE_DB):
+        self._ttl = ttl
+        self._memory = TTLCache(max_size, ttl)
+        self._store = SQLiteStore(db_path, "contact_cache") if db_path else None
+        self._store_hits = 0
+
+    def get_many(self, keys: Iterable[Tuple]) -> Dict[Tuple, Any]:
+        """返回命中的 key -> value，未命中的key不在结果中"""
+        found: Dict[Tuple, Any] = {}
+        missing: List[Tuple] = []
+        for key in keys:
+            value = self._memory.get(key)
+            if value is MISSING:
+                missing.append(key)
+            else:
+                found[key] = value
+
+        if self._store is not None and missing:
+            rows = self._store.get_many(_store_key(key) for key in missing)
+            now = time.time()
+            for key in missing:
+                row = rows.get(_store_key(key))
+                if row is None:
+                    continue
+                value, expire_at = json.loads(row[0]), row[1]
+                self._memory.set(key, value, ttl=expire_at - now)
+                found[key] = value
+                self._store_hits += 1
+        return found
+
+    def set_many(self, entries: Dict[Tuple, Any], ttl: Optional[int] = None) -> None:
+        ttl = self._ttl if ttl is None else ttl
+        for key, value in entries.items():
+            self._memory.set(key, value, ttl=ttl)
+        if self._store is not None:
+            expire_at = time.time() + ttl
+            self._store.set_many([(_store_key(key), json.dumps(value, ensure_ascii=False).encode("utf-8"), expire_at)
+                                  for key, value in entries.items()])
+
+    def clear(self) -> None:
+        self._memory.clear()
+
+    def stats(self) -> Dict[str, int]:
+        stats = self._memory.stats()
+        stats["persistent"] = self._store is not None
+        stats["store_hits"] = self._store_hits
+        return stats
+
+
+def _store_key(key: Hashable) -> str:
+    return json.dumps(key, ensure_ascii=False, separators=(",", ":"))
+
+
+# 进程级共享的通讯录缓存
+_contact_cache = ContactCache()
+
+
+def get_contact_cache() -> ContactCache:
+    return _contact_cache
+
+
+def get_contact_cache_stats() -> Dict[str, int]:
+    """通讯录缓存的命中/未命中/淘汰计数"""
+    return _contact_cache.stats()
@@ -1,50 +1,112 @@
-import json
+from typing import Dict, Tuple, List, Optional
 
-import lark_oapi as lark
-from lark_oapi.api.contact.v3 import *
-from pydantic import Field, BaseModel
-from typing import Literal
+from pydantic import Field
+from lark_mcp.mcp_tool.user_info.contact_cache import get_contact_cache, user_info_key, CONTACT_CHUNK_SIZE
+from lark_mcp.common.client_pool import get_lark_client, aget_lark_client
+from lark_mcp.common.response import to_plain, dumps, project
+from lark_mcp.common.batch import chunked, chunk_error, gather_with_limit
+from lark_mcp.common.async_tool import async_variant
+from lark_mcp.common.lazy_import import lazy_import
+from lark_mcp.common.log import logger
+
+contact_v3 = lazy_import("lark_oapi.api.contact.v3")
+
+
+def build_batch_user_request(user_ids: List[str], user_id_type: str,
+                             department_id_type: str) -> "contact_v3.BatchUserRequest":
+    # 构造请求对象
+    request: contact_v3.BatchUserRequest = contact_v3.BatchUserRequest.builder() \
+        .user_id_type(user_id_type) \
+        .department_id_type(department_id_type) \
+        .user_ids(user_ids) \
+        .build()
+    return request
+
+
+def _user_info_keys(app_id: Optional[str], user_ids: List[str], user_id_type: str,
+                    department_id_type: str) -> List[Tuple]:
+    # 去重并保持输入顺序
+    return list(dict.fromkeys(user_info_key(app_id, user_id_type, department_id_type, user_id)
+                              for user_id in user_ids))
+
+
+def _cache_user_infos(app_id: Optional[str], user_id_type: str, department_id_type: str,
+                      response: "contact_v3.BatchUserResponse") -> Dict[Tuple, dict]:
+    found = {}
+    for user in response.data.items or []:
+        user_id = getattr(user, user_id_type, None)
+        if user_id:
+            found[user_info_key(app_id, user_id_type, department_id_type, user_id)] = \
+                to_plain(user)
+    get_contact_cache().set_many(found)
+    return found
+
+
+def _merge_user_infos(app_id: Optional[str], user_id_type: str, department_id_type: str, keys: List[Tuple],
+                      found: Dict[Tuple, dict], chunks: List[List[str]], results: list,
+                      fields: Optional[List[str]]) -> str:
+    # 合并各分片的查询结果，失败的分片单独列出
+    errors = []
+    for index, (chunk, result) in enumerate(zip(chunks, results)):
+        error = chunk_error("client.contact.v3.user.batch", index, result, user_ids=chunk)
+        if error is not None:
+            errors.append(error)
+        else:
+            found.update(_cache_user_infos(app_id, user_id_type, department_id_type, result))
+
+    # 全部失败时直接返回错误信息
+    if errors and not found:
+        return "\n".join(error["error"] for error in errors)
+
+    # 按输入顺序返回，查不到或无权限的用户不在结果中
+    # 缓存中保存完整的用户信息，返回时再选择字段
+    result = {"items": [project(found[key], fields) for key in keys if key in found]}
+    if errors:
+        result["errors"] = errors
+    data = dumps(result)
+    logger.payload("get_user_info", data)
+    return data
 
 
 def batch_get_user_info(user_ids: List[str] = Field(...,
-                                                      description="用户ID列表，ID类型与 user_id_type 参数一致。单次请求最多支持50个用户ID。"),
+                                                      description="用户ID列表，ID类型与 user_id_type 参数一致。数量不限，超过50个时自动分批查询。"),
                           user_id_type: Optional[str] = Field(default="open_id",
                                                               description="用户ID类型，可选值：open_id、union_id、user_id。"),
                           department_id_type: Optional[str] = Field(default="open_department_id",
                                                                     description="部门ID类型，可选值：open_department_id、department_id。"),
+                          fields: Optional[List[str]] = Field(None,
+                                                              description="只返回每个用户的这些字段，如 name、email、open_id、department_ids；不填返回全部字段"),
                           app_id: Optional[str] = Field(None, description="应用唯一标识"),
                           app_secret: Optional[str] = Field(None, description="应用密钥")
                           ):
     """根据该工具可以批量获取用户的具体信息"""
-    # 创建client
-    # client = lark.Client.builder() \
-    #     .app_id("cli_a8e97890b87d900b") \
-    #     .app_secret("Li5w1A3yxy2GCfaaEYGlBhEDI5xr2cBT") \
-    #     .log_level(lark.LogLevel.DEBUG) \
-    #     .build()
-    client = lark.Client.builder() \
-        .app_id(app_id) \
-        .app_secret(app_secret) \
-        .log_level(lark.LogLevel.DEBUG) \
-        .build()
-
-    # 构造请求对象
-    request: BatchUserRequest = BatchUserRequest.builder() \
-        .user_id_type(user_id_type) \
-        .department_id_type(department_id_type) \
-        .user_ids(user_ids) \
-        .build()
+    # 创建client；缓存只按app_id区分，必须先校验凭证再读缓存
+    client = get_lark_client(app_id, app_secret)
+    keys = _user_info_keys(app_id, user_ids, user_id_type, department_id_type)
+    found = get_contact_cache().get_many(keys)
+    # 只查询缓存未命中的用户，每个分片最多50个用户ID
+    chunks = chunked([key[-1] for key in keys if key not in found], CONTACT_CHUNK_SIZE)
 
     # 发起请求
-    response: BatchUserResponse = client.contact.v3.user.batch(request)
+    results = []
+    for chunk in chunks:
+        try:
+            results.append(client.contact.v3.user.batch(build_batch_user_request(chunk, user_id_type,
+                                                                                 department_id_type)))
+        except Exception as err:
+            results.append(err)
+    return _merge_user_infos(app_id, user_id_type, department_id_type, keys, found, chunks, results, fields)
 
-    # 处理失败返回
-    if not response.success():
-        lark.logger.error(
-            f"client.contact.v3.user.batch failed, code: {response.code}, msg: {response.msg}, log_id: {response.get_log_id()}, resp: \n{json.dumps(json.loads(response.raw.content), indent=4, ensure_ascii=False)}")
-        return str(f"client.contact.v3.user.batch failed, code: {response.code}, msg: {response.msg}, log_id: {response.get_log_id()}, resp: \n{json.dumps(json.loads(response.raw.content), indent=4, ensure_ascii=False)}")
 
-    # 处理业务结果
-    lark.logger.info(lark.JSON.marshal(response.data, indent=4))
+@async_variant(batch_get_user_info)
+async def abatch_get_user_info(user_ids, user_id_type, department_id_type, fields, app_id, app_secret):
+    client = await aget_lark_client(app_id, app_secret)
+    keys = _user_info_keys(app_id, user_ids, user_id_type, department_id_type)
+    found = get_contact_cache().get_many(keys)
+    chunks = chunked([key[-1] for key in keys if key not in found], CONTACT_CHUNK_SIZE)
 
-    return lark.JSON.marshal(response.data, indent=4)
+    # 各分片互不依赖，共享同一个client并发请求
+    results = await gather_with_limit(
+        client.contact.v3.user.abatch(build_batch_user_request(chunk, user_id_type, department_id_type))
+        for chunk in chunks)
+    return _merge_user_infos(app_id, user_id_type, department_id_type, keys, found, chunks, results, fields)